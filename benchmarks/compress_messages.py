@@ -0,0 +1,82 @@
+"""compress_messages.py
+
+Benchmarks building the single user message sent to DeepSeek.
+
+Every turn of a session appends a few messages and renders the whole
+transcript again. The legacy builder concatenated the transcript with +=
+from the first message on each turn; the Conversation keeps the previous
+render and only formats the messages appended since.
+
+Run from the repository root:
+    python -m benchmarks.compress_messages --messages 1000 2000 4000
+"""
+
+import time
+import argparse
+
+from core.conversation import Conversation
+from core.tools_util import compress_messages_to_single_user_message
+
+
+def legacy_compress_messages(messages: list) -> list:
+    """The previous builder, concatenating the transcript with +=."""
+    formatted_output = ""
+    for message in messages:
+        role = message.get("role", "unknown")
+        content = message.get("content", "")
+        formatted_output += f"\n=====\n[{role.upper()}]:\n=====\n{content}\n\n"
+    return [{"role": "user", "content": formatted_output}]
+
+
+def make_message(index: int, message_chars: int) -> dict:
+    """Builds a message of about message_chars characters."""
+    role = ("user", "assistant", "tool")[index % 3]
+    text = f"Message {index} about the research question. "
+    return {"role": role, "content": (text * (message_chars // len(text) + 1))[:message_chars]}
+
+
+def run_session(messages, compress, total: int, message_chars: int) -> float:
+    """
+    Appends total messages, rendering the transcript after each one.
+
+    Returns:
+        float: The seconds spent rendering.
+    """
+    elapsed = 0.0
+    for index in range(total):
+        messages.append(make_message(index, message_chars))
+        start = time.perf_counter()
+        compress(messages)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def main() -> None:
+    """Runs the benchmark for each transcript length."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--messages", type=int, nargs="+", default=[1000, 2000, 4000])
+    parser.add_argument("--message-chars", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'Messages':>8} {'Legacy s':>10} {'Incremental s':>14} {'Speedup':>8}")
+    for total in args.messages:
+        legacy = run_session([], legacy_compress_messages, total, args.message_chars)
+        incremental = run_session(
+            Conversation(),
+            compress_messages_to_single_user_message,
+            total,
+            args.message_chars,
+        )
+        # both builders must produce the same prompt
+        check = [make_message(index, args.message_chars) for index in range(total)]
+        assert legacy_compress_messages(check) == compress_messages_to_single_user_message(
+            Conversation(check)
+        )
+        print(
+            f"{total:>8} {legacy:>10.3f} {incremental:>14.3f} "
+            f"{legacy / max(incremental, 1e-9):>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""async_research_professional.py"""
+
+import asyncio
+
+from core.client_factory import get_async_client, aclose_async_clients
+from core.http_session import aclose_async_session
+from core.utilities import with_current_datetime, analyze_scores
+from core.llm_helpers import (
+    async_call_llm_api_with_retry,
+    print_token_usage_details,
+    check_tokens_exceeded,
+)
+from core.token_counter import MessageTokenCounter
+from core.context_compactor import ContextCompactor
+from core.conversation import Conversation
+from core.citation_registry import with_bibliography
+from core.report_writer import async_write_final_report
+from core.tools_util import (
+    async_process_tool_calls,
+    async_submit_tool_call,
+    compress_messages_to_single_user_message,
+)
+from core.reasoning_stream import async_stream_reasoning_response
+from core.prompt_helpers import async_score_answer, async_get_manager_feedback
+from core.reasoning import (
+    get_model_args,
+    get_reasoning_tools_and_messages,
+    expand_reasoning,
+)
+from core.research_professional import (
+    tools,
+    get_tool_system_message,
+    get_final_report_prompt,
+)
+from core.config import (
+    Service,
+    USE_SERVICE_REASONING,
+    DEEPSEEK_USE_MODEL,
+    GROQ_USE_MODEL,
+    OPENAI_USE_MODEL,
+    TOGETHER_USE_MODEL,
+    USE_MULTI_ROUND_TEST_TIME_SCALING,
+    MAX_TRIES_FOR_TEST_TIME_SCALING,
+    USE_REASONING_EXPANSION,
+    MAX_TRIES_TO_INCREASE_SCORE,
+    MODELS_WITH_TOOL_USAGE,
+    USE_PREFLIGHT_TOKEN_CHECK,
+    USE_CONTEXT_COMPACTION,
+    USE_STREAMING_REASONING,
+)
+
+
+async def async_call_research_professional(
+    question: str, prompt: str, model_version: str = OPENAI_USE_MODEL
+) -> str:
+    """
+    Runs the research reasoning loop on the event loop.
+
+    This is the one engine behind both APIs; call_research_professional runs
+    it with asyncio.run. LLM calls and tool calls are awaited instead of
+    blocking a thread, so one event loop can drive many sessions at once.
+    Scores are kept per session.
+
+    Args:
+        question (str): The user's question.
+        prompt (str): The initial prompt.
+        model_version (str): The model version to use.
+
+    Returns:
+        str: The final answer or report.
+    """
+
+    if USE_SERVICE_REASONING == Service.DEEPSEEK:
+        model_version = DEEPSEEK_USE_MODEL
+    if USE_SERVICE_REASONING == Service.GROQ:
+        model_version = GROQ_USE_MODEL
+    if USE_SERVICE_REASONING == Service.TOGETHER:
+        model_version = TOGETHER_USE_MODEL
+
+    is_final_answer = False
+
+    messages = Conversation()
+    session_scores = []
+
+    if model_version not in MODELS_WITH_TOOL_USAGE:
+        messages.append({"role": "user", "content": get_tool_system_message()})
+    messages.append({"role": "user", "content": with_current_datetime(prompt)})
+
+    use_streaming = (
+        USE_STREAMING_REASONING
+        and model_version not in MODELS_WITH_TOOL_USAGE
+        and USE_SERVICE_REASONING != Service.FIREWORKS
+    )
+
+    llm_call_count_to_increase_score = 0
+    # https://arxiv.org/pdf/2503.19855
+    counter_for_multi_round_test_time_scaling = 0
+
+    token_counter = MessageTokenCounter(model_version)
+    compactor = (
+        ContextCompactor(
+            token_counter,
+            get_model_args(model_version, USE_SERVICE_REASONING, tools)[0],
+        )
+        if USE_CONTEXT_COMPACTION
+        else None
+    )
+
+    # Main ReAct loop
+    for _ in range(100):
+
+        # condense older tool results before the prompt budget is reached
+        if compactor:
+            messages = await asyncio.to_thread(compactor.compact, messages)
+
+        # for DeepSeek they don't support multiple messages
+        # need to create a big string with user/assistant messages
+        # and set as single user message
+        if USE_SERVICE_REASONING == Service.DEEPSEEK:
+            base_args = {
+                "messages": compress_messages_to_single_user_message(messages),
+            }
+        else:
+            base_args = {
+                "messages": messages,
+            }
+
+        client = get_async_client(USE_SERVICE_REASONING)
+
+        MAX_PROMPT_TOKENS, model_args = get_model_args(  # pylint: disable=invalid-name
+            model_version, USE_SERVICE_REASONING, tools
+        )
+
+        # Merge common and model-specific settings
+        args = {**base_args, **model_args}
+        token_counter.count(messages, model_args.get("tools"))
+        if (
+            USE_PREFLIGHT_TOKEN_CHECK
+            and not is_final_answer
+            and token_counter.exceeds(MAX_PROMPT_TOKENS)
+        ):
+            is_final_answer, messages = check_tokens_exceeded(
+                is_final_answer, messages, question
+            )
+            continue
+
+        print(f"***** REASONING LOOP ***** {USE_SERVICE_REASONING} {model_version}")
+        streamed_tool_tasks = None
+        if use_streaming:
+            # tool calls start while the rest of the response is still generating
+            streamed_tool_tasks = []
+            response = await async_stream_reasoning_response(
+                client,
+                args,
+                USE_SERVICE_REASONING,
+                lambda tc: streamed_tool_tasks.append(  # pylint: disable=cell-var-from-loop
+                    (tc, async_submit_tool_call(tc, model_version, question))
+                ),
+            )
+        else:
+            response = await async_call_llm_api_with_retry(
+                client, args, service=USE_SERVICE_REASONING
+            )
+
+        msg = response.choices[0].message
+
+        assistant_content = msg.content
+
+        print("\n\n")
+        print(">" * 100)
+        print(f"{assistant_content}")
+        print("<" * 100)
+        print("\n\n")
+
+        finish_reason = response.choices[0].finish_reason
+
+        token_counter.record_usage(response)
+
+        # fallback for requests the pre-flight estimate let through
+        if response.usage.prompt_tokens > MAX_PROMPT_TOKENS and not is_final_answer:
+            for _, task in streamed_tool_tasks or []:
+                task.cancel()
+            is_final_answer, messages = check_tokens_exceeded(
+                is_final_answer, messages, question
+            )
+            continue
+
+        tool_calls, messages, assistant_content, reasoning_content = (
+            get_reasoning_tools_and_messages(
+                model_version, messages, msg, assistant_content, response
+            )
+        )
+
+        if USE_REASONING_EXPANSION:
+            messages = await asyncio.to_thread(
+                expand_reasoning, reasoning_content, tool_calls, messages
+            )
+
+        print_token_usage_details(response, USE_SERVICE_REASONING, model_version)
+
+        if not tool_calls:
+            for _, task in streamed_tool_tasks or []:
+                task.cancel()
+
+        # If there are tool calls, handle them
+        if tool_calls:
+            messages = await async_process_tool_calls(
+                messages,
+                tool_calls,
+                model_version,
+                streamed_tool_tasks,
+                question,
+            )
+            # After tool calls, continue loop so the model sees the new tool outputs
+            continue
+
+        # If no tool calls, check finish_reason
+        if finish_reason == "stop":
+
+            if USE_MULTI_ROUND_TEST_TIME_SCALING:
+                if counter_for_multi_round_test_time_scaling == 0:
+                    counter_for_multi_round_test_time_scaling += 1
+                    messages.pop()
+                    revise_prompt = f"The assistant’s previous answer is: <answer>{assistant_content}</answer>, and please re-answer."
+                    messages.append({"role": "user", "content": revise_prompt})
+                    continue
+                elif (
+                    counter_for_multi_round_test_time_scaling
+                    <= MAX_TRIES_FOR_TEST_TIME_SCALING
+                ):
+                    counter_for_multi_round_test_time_scaling += 1
+                    messages.pop()
+                    messages.pop()
+                    revise_prompt = f"The assistant’s previous answer is: <answer>{assistant_content}</answer>, and please re-answer."
+                    messages.append({"role": "user", "content": revise_prompt})
+                    continue
+                else:
+                    messages.pop(-2)
+                    counter_for_multi_round_test_time_scaling = 0
+
+            #####################
+            # SCORING
+            #####################
+            is_pass_threshold, scoring_pros_cons = await async_score_answer(
+                question, messages, session_scores
+            )
+            is_score_worse, streak_count = analyze_scores(session_scores)
+
+            if streak_count >= MAX_TRIES_TO_INCREASE_SCORE:
+                is_pass_threshold = True
+
+            if (
+                is_score_worse or streak_count > 1
+            ) and llm_call_count_to_increase_score <= 1:
+                llm_call_count_to_increase_score += 1
+                session_scores.pop()
+                messages.pop()
+                continue
+            else:
+                llm_call_count_to_increase_score = 0
+
+            if is_score_worse or streak_count > 1:
+                is_pass_threshold = True
+
+            if is_pass_threshold:
+                #####################
+                # FINAL ANSWER
+                #####################
+                prompt = with_bibliography(get_final_report_prompt(question), messages)
+
+                print("*" * 50)
+                print("***** PRODUCING FINAL ANSWER *****")
+                print("*" * 50)
+                return await async_write_final_report(prompt, question, messages)
+            else:
+                #####################
+                # MANAGER FEEDBACK
+                #####################
+                manager_feedback = await async_get_manager_feedback(
+                    question, assistant_content, session_scores
+                )
+                if is_score_worse:
+                    revise_prompt = f"Your work has not improved, this is worse than the last work. Use more tools and revise your response based on your Manager's feedback:{manager_feedback}\n\n{scoring_pros_cons}"
+                elif (MAX_TRIES_TO_INCREASE_SCORE > 0) and (streak_count > 1):
+                    revise_prompt = f"Your work needs to improve, this was no improvement over the last work. Use more tools and revise your response based on your Manager's feedback:{manager_feedback}\n\n{scoring_pros_cons}"
+                else:
+                    revise_prompt = f"Use more tools and revise your response based on your Manager's feedback:{manager_feedback}\n\n{scoring_pros_cons}"
+                messages.append({"role": "user", "content": revise_prompt})
+                continue
+
+        elif finish_reason in ["length", "max_tokens", "content_filter"]:
+            print("The model's response ended due to finish_reason =", finish_reason)
+            break
+
+        if assistant_content.strip():
+            print("\nAssistant:\n" + assistant_content)
+            return assistant_content
+
+    return "Lacked sufficient details to complete request."
+
+
+async def async_run_research_sessions(
+    sessions: list, model_version: str = OPENAI_USE_MODEL
+) -> list:
+    """
+    Runs many research sessions concurrently on the running event loop.
+
+    Args:
+        sessions (list): (question, prompt) tuples.
+        model_version (str, optional): The model version to use.
+
+    Returns:
+        list: The final answers, in the same order as sessions.
+    """
+    try:
+        return await asyncio.gather(
+            *(
+                async_call_research_professional(question, prompt, model_version)
+                for question, prompt in sessions
+            )
+        )
+    finally:
+        await aclose_async_clients()
+        await aclose_async_session()
+
+
+def run_research_sessions(
+    sessions: list, model_version: str = OPENAI_USE_MODEL
+) -> list:
+    """
+    Synchronous wrapper running many research sessions on one event loop.
+
+    Args:
+        sessions (list): (question, prompt) tuples.
+        model_version (str, optional): The model version to use.
+
+    Returns:
+        list: The final answers, in the same order as sessions.
+    """
+    return asyncio.run(async_run_research_sessions(sessions, model_version))
+
+
+def run_research_professional(
+    question: str, prompt: str, model_version: str = OPENAI_USE_MODEL
+) -> str:
+    """
+    Synchronous wrapper running a single session on the async engine.
+
+    Args:
+        question (str): The user's question.
+        prompt (str): The initial prompt.
+        model_version (str, optional): The model version to use.
+
+    Returns:
+        str: The final answer or report.
+    """
+    return run_research_sessions([(question, prompt)], model_version)[0]
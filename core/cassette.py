@@ -0,0 +1,289 @@
+"""cassette.py"""
+
+import os
+import json
+import time
+import asyncio
+import atexit
+from collections import deque
+from threading import Lock
+from typing import Optional
+
+from core.response_cache import make_response_key
+from core.config import (
+    CASSETTE_MODE,
+    CASSETTE_PATH,
+    CASSETTE_LATENCY_SCALE,
+)
+
+CASSETTE_MODES = {"off", "record", "replay"}
+
+
+class CassetteMiss(LookupError):
+    """Raised on replay when the cassette has no recording for a request."""
+
+    # the recording cannot appear by retrying
+    retryable = False
+
+
+class RecordedError(RuntimeError):
+    """
+    Replays a failure that was recorded after the live call's own retries.
+
+    Its message is the live exception's own text, so anything built from
+    str(e), such as a tool result quoted in a later prompt, matches the
+    recorded run.
+    """
+
+    retryable = False
+
+    def __init__(self, message: str, error_type: str = None):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+def get_usage(body) -> dict:
+    """
+    Returns the usage block of a recorded response body, if any.
+
+    Args:
+        body: The response body.
+
+    Returns:
+        dict: The usage block, or {}.
+    """
+    usage = body.get("usage") if isinstance(body, dict) else None
+    return usage if isinstance(usage, dict) else {}
+
+
+class Cassette:
+    """
+    Records every LLM, Perplexity and Firecrawl interaction of a run to a
+    JSONL file and serves them back on replay.
+
+    Each line holds the interaction kind, a fingerprint of the request, the
+    response body, the latency observed by the caller (retries included) and
+    the usage block. Replay serves recordings with the same fingerprint in
+    recorded order and sleeps for the recorded latency times
+    CASSETTE_LATENCY_SCALE (0 replays as fast as possible).
+    """
+
+    def __init__(self, path: str, mode: str, latency_scale: float = 1.0):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = Lock()
+        self._recordings = {}
+        self._file = None
+        self.interactions = 0
+        self.recorded_latency = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        if mode == "replay":
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._recordings.setdefault(
+                            entry["fingerprint"], deque()
+                        ).append(entry)
+        elif mode == "record":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+
+    def _count(self, entry: dict) -> None:
+        usage = get_usage(entry["body"])
+        with self._lock:
+            self.interactions += 1
+            self.recorded_latency += entry["latency"]
+            self.prompt_tokens += usage.get("prompt_tokens") or 0
+            self.completion_tokens += usage.get("completion_tokens") or 0
+
+    def _next_recording(self, kind: str, service_name: str, fingerprint: str) -> dict:
+        with self._lock:
+            recordings = self._recordings.get(fingerprint)
+            if not recordings:
+                raise CassetteMiss(
+                    f"No {kind} recording for {service_name} in {self.path}"
+                )
+            entry = recordings.popleft()
+        self._count(entry)
+        return entry
+
+    def _record(
+        self,
+        kind: str,
+        service_name: str,
+        fingerprint: str,
+        body,
+        latency: float,
+        error: Exception = None,
+    ) -> None:
+        entry = {
+            "kind": kind,
+            "service": service_name,
+            "fingerprint": fingerprint,
+            "latency": latency,
+            "usage": get_usage(body),
+            "body": body,
+            "recorded_at": time.time(),
+        }
+        if error is not None:
+            entry["error"] = str(error)
+            entry["error_type"] = type(error).__name__
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+        self._count(entry)
+
+    def _record_error(
+        self, kind: str, service_name: str, fingerprint: str, error, start: float
+    ) -> None:
+        self._record(
+            kind,
+            service_name,
+            fingerprint,
+            None,
+            time.monotonic() - start,
+            error=error,
+        )
+
+    def _replay_result(self, entry: dict, load):
+        if "error" in entry:
+            raise RecordedError(entry["error"], entry.get("error_type"))
+        return load(entry["body"]) if load else entry["body"]
+
+    def call(
+        self, kind: str, service_name: str, request: dict, func, dump=None, load=None
+    ):
+        """
+        Records or replays one interaction.
+
+        Args:
+            kind (str): "llm", "perplexity" or "firecrawl".
+            service_name (str): The service the request goes to.
+            request (dict): The request that identifies the interaction.
+            func (callable): Makes the live call.
+            dump (callable, optional): Turns the result into a JSON body.
+            load (callable, optional): Turns a recorded body back into a result.
+
+        Raises:
+            CassetteMiss: On replay when the request was never recorded.
+
+        Returns:
+            Any: The live or replayed result.
+        """
+        fingerprint = make_response_key(f"{kind}:{service_name}", request)
+        if self.mode == "replay":
+            entry = self._next_recording(kind, service_name, fingerprint)
+            if self.latency_scale > 0:
+                time.sleep(entry["latency"] * self.latency_scale)
+            return self._replay_result(entry, load)
+        start = time.monotonic()
+        try:
+            result = func()
+        except Exception as e:
+            self._record_error(kind, service_name, fingerprint, e, start)
+            raise
+        latency = time.monotonic() - start
+        body = dump(result) if dump else result
+        self._record(kind, service_name, fingerprint, body, latency)
+        return result
+
+    async def async_call(
+        self, kind: str, service_name: str, request: dict, func, dump=None, load=None
+    ):
+        """
+        Records or replays one interaction without blocking the event loop.
+
+        Args:
+            kind (str): "llm", "perplexity" or "firecrawl".
+            service_name (str): The service the request goes to.
+            request (dict): The request that identifies the interaction.
+            func (callable): Returns an awaitable that makes the live call.
+            dump (callable, optional): Turns the result into a JSON body.
+            load (callable, optional): Turns a recorded body back into a result.
+
+        Raises:
+            CassetteMiss: On replay when the request was never recorded.
+
+        Returns:
+            Any: The live or replayed result.
+        """
+        fingerprint = make_response_key(f"{kind}:{service_name}", request)
+        if self.mode == "replay":
+            entry = self._next_recording(kind, service_name, fingerprint)
+            if self.latency_scale > 0:
+                await asyncio.sleep(entry["latency"] * self.latency_scale)
+            return self._replay_result(entry, load)
+        start = time.monotonic()
+        try:
+            result = await func()
+        except Exception as e:
+            self._record_error(kind, service_name, fingerprint, e, start)
+            raise
+        latency = time.monotonic() - start
+        body = dump(result) if dump else result
+        self._record(kind, service_name, fingerprint, body, latency)
+        return result
+
+    def close(self) -> None:
+        """
+        Closes the recording file.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_cassette = None
+_cassette_lock = Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    Returns the shared cassette.
+
+    Returns:
+        Optional[Cassette]: The cassette, or None when CASSETTE_MODE is off.
+    """
+    global _cassette  # pylint: disable=global-statement
+    if CASSETTE_MODE == "off":
+        return None
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette(
+                    CASSETTE_PATH, CASSETTE_MODE, CASSETTE_LATENCY_SCALE
+                )
+    return _cassette
+
+
+def print_cassette_stats() -> None:
+    """
+    Prints the interactions, recorded latency and tokens of the cassette.
+    """
+    if _cassette is None:
+        return
+    print(
+        f"CASSETTE... Mode {_cassette.mode} Interactions {_cassette.interactions} "
+        f"Recorded_Latency {_cassette.recorded_latency:.1f}s "
+        f"Prompt {_cassette.prompt_tokens} Completion {_cassette.completion_tokens}"
+    )
+
+
+def close_cassette() -> None:
+    """
+    Closes the shared cassette.
+    """
+    if _cassette is not None:
+        _cassette.close()
+
+
+atexit.register(close_cassette)
@@ -0,0 +1,280 @@
+"""circuit_breaker.py"""
+
+import time
+from threading import Lock
+
+from core.retry_policy import is_retryable_error, get_status_code
+from core.config import (
+    Service,
+    USE_CIRCUIT_BREAKER,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    CIRCUIT_HALF_OPEN_PROBES,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose circuit is open."""
+
+    # tells RetryPolicy to fail fast instead of sleeping through its schedule
+    retryable = False
+
+
+def is_service_failure(error: Exception) -> bool:
+    """
+    Returns True if an error means the service itself is degraded.
+
+    Client errors (4xx) and rate limiting (429) prove the service answered,
+    so they do not count towards opening the circuit.
+
+    Args:
+        error (Exception): The raised exception.
+
+    Returns:
+        bool: True for timeouts, connection failures and 5xx responses.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    return is_retryable_error(error) and get_status_code(error) != 429
+
+
+class CircuitBreaker:
+    """
+    Opens after consecutive service failures, short-circuits calls while open,
+    then lets a few probe calls through (half open) to decide whether to close.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+        half_open_probes: int = CIRCUIT_HALF_OPEN_PROBES,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.lock = Lock()
+
+    def _refresh(self) -> None:
+        """Moves an open circuit to half open once the reset timeout has passed."""
+        if (
+            self.state == OPEN
+            and time.monotonic() - self.opened_at >= self.reset_timeout
+        ):
+            self.state = HALF_OPEN
+            self.probes_in_flight = 0
+            print(f"CIRCUIT BREAKER... {self.name} half open, probing")
+
+    def is_available(self) -> bool:
+        """
+        Returns True if a call would currently be let through.
+
+        Returns:
+            bool: False while open or while all probes are in flight.
+        """
+        with self.lock:
+            self._refresh()
+            if self.state == OPEN:
+                return False
+            if self.state == HALF_OPEN:
+                return self.probes_in_flight < self.half_open_probes
+            return True
+
+    def before_call(self) -> bool:
+        """
+        Admits a call or raises CircuitOpenError.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or has no probe slot free.
+
+        Returns:
+            bool: True if the call took a half-open probe slot.
+        """
+        with self.lock:
+            self._refresh()
+            if self.state == CLOSED:
+                return False
+            if self.state == HALF_OPEN and self.probes_in_flight < self.half_open_probes:
+                self.probes_in_flight += 1
+                return True
+            raise CircuitOpenError(f"Circuit for {self.name} is {self.state}")
+
+    def release_probe(self) -> None:
+        """Frees the probe slot of a call that ended without an outcome."""
+        with self.lock:
+            if self.state == HALF_OPEN and self.probes_in_flight > 0:
+                self.probes_in_flight -= 1
+
+    def record_success(self) -> None:
+        """Closes the circuit and resets the failure count."""
+        with self.lock:
+            if self.state != CLOSED:
+                print(f"CIRCUIT BREAKER... {self.name} closed")
+            self.state = CLOSED
+            self.failures = 0
+            self.probes_in_flight = 0
+
+    def record_failure(self, error: Exception) -> None:
+        """
+        Counts a failed call and opens the circuit when needed.
+
+        Args:
+            error (Exception): The raised exception.
+        """
+        if not is_service_failure(error):
+            if not isinstance(error, CircuitOpenError):
+                self.record_success()
+            return
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(
+                        f"CIRCUIT BREAKER... {self.name} open for "
+                        f"{self.reset_timeout}s after {self.failures} failures"
+                    )
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.probes_in_flight = 0
+
+    def call(self, func, *args, **kwargs):
+        """
+        Calls func through the breaker.
+
+        Args:
+            func (callable): The function to call.
+
+        Returns:
+            Any: The return value of func.
+        """
+        probe = self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            # interrupted: the probe proved nothing, let another one through
+            if probe:
+                self.release_probe()
+            raise
+        self.record_success()
+        return result
+
+    async def async_call(self, func, *args, **kwargs):
+        """
+        Awaits func through the breaker.
+
+        Args:
+            func (callable): The coroutine function to call.
+
+        Returns:
+            Any: The return value of func.
+        """
+        probe = self.before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            # cancelled (e.g. a losing hedge) or interrupted: free the probe slot
+            if probe:
+                self.release_probe()
+            raise
+        self.record_success()
+        return result
+
+
+_breakers = {}
+_breakers_lock = Lock()
+
+
+def call_through(breaker: CircuitBreaker, func, *args, **kwargs):
+    """
+    Calls func through a breaker, or directly when breakers are disabled.
+
+    Args:
+        breaker (CircuitBreaker): The breaker, may be None.
+        func (callable): The function to call.
+
+    Returns:
+        Any: The return value of func.
+    """
+    if breaker is None:
+        return func(*args, **kwargs)
+    return breaker.call(func, *args, **kwargs)
+
+
+async def async_call_through(breaker: CircuitBreaker, func, *args, **kwargs):
+    """
+    Awaits func through a breaker, or directly when breakers are disabled.
+
+    Args:
+        breaker (CircuitBreaker): The breaker, may be None.
+        func (callable): The coroutine function to call.
+
+    Returns:
+        Any: The return value of func.
+    """
+    if breaker is None:
+        return await func(*args, **kwargs)
+    return await breaker.async_call(func, *args, **kwargs)
+
+
+def get_circuit_breaker(service: Service, endpoint: str) -> CircuitBreaker:
+    """
+    Returns the shared circuit breaker for a service endpoint.
+
+    Args:
+        service (Service): The service identifier.
+        endpoint (str): The endpoint path, e.g. "chat/completions".
+
+    Returns:
+        CircuitBreaker: The breaker, or None when disabled.
+    """
+    if not USE_CIRCUIT_BREAKER:
+        return None
+    key = (service, endpoint)
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(f"{service.name} {endpoint}")
+        return _breakers[key]
+
+
+def get_circuit_states() -> dict:
+    """
+    Returns the state of every circuit breaker.
+
+    Returns:
+        dict: (service, endpoint) -> {"state", "failures"}.
+    """
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    states = {}
+    for key, breaker in breakers.items():
+        with breaker.lock:
+            breaker._refresh()  # pylint: disable=protected-access
+            states[key] = {"state": breaker.state, "failures": breaker.failures}
+    return states
+
+
+def print_circuit_states() -> None:
+    """
+    Prints the state of every circuit breaker.
+    """
+    for (service, endpoint), state in get_circuit_states().items():
+        print(
+            f"CIRCUIT BREAKER... {service.name} {endpoint} "
+            f"{state['state']} failures {state['failures']}"
+        )
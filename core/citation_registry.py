@@ -0,0 +1,192 @@
+"""citation_registry.py"""
+
+import re
+from threading import Lock
+from urllib.parse import urlsplit
+
+from core.page_cache import canonicalize_url
+from core.passage_filter import split_citations
+from core.config import USE_CITATION_REGISTRY
+
+# "[3] https://example.com/page" lines of a Perplexity Citations block
+CITATION_LINE_PATTERN = re.compile(r"^\s*\[(\d+)\]\s+(\S+)\s*$", re.MULTILINE)
+# "[3]" references in the answer text
+REFERENCE_PATTERN = re.compile(r"\[(\d+)\]")
+# "[S3]" source ids in rewritten tool results
+SOURCE_ID_PATTERN = re.compile(r"\[(S\d+)\]")
+# a source id given as a tool argument, e.g. "S3" or "[S3]"
+SOURCE_ID_ARGUMENT_PATTERN = re.compile(r"\[?[Ss]\d+\]?")
+
+
+class CitationRegistry:
+    """
+    Interns cited URLs and gives each one a short, stable source id.
+
+    URLs are kept in their canonical form, so spellings that differ only in
+    tracking parameters, fragments or case share an id.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._urls = {}
+        self._lock = Lock()
+        self.rewritten = 0
+        self.chars_before = 0
+        self.chars_after = 0
+
+    def intern(self, url: str) -> str:
+        """
+        Returns the source id of a URL, assigning one if it is new.
+
+        Args:
+            url (str): The cited URL.
+
+        Returns:
+            str: The source id, e.g. S3.
+        """
+        key = canonicalize_url(url)
+        with self._lock:
+            source_id = self._ids.get(key)
+            if source_id is None:
+                source_id = f"S{len(self._ids) + 1}"
+                self._ids[key] = source_id
+                self._urls[source_id] = key
+            return source_id
+
+    def resolve(self, source_id: str) -> str:
+        """
+        Returns the URL of a source id.
+
+        Args:
+            source_id (str): The source id, with or without brackets.
+
+        Returns:
+            str: The URL, or None if the id is unknown.
+        """
+        with self._lock:
+            return self._urls.get(source_id.strip().strip("[]").upper())
+
+    def record_rewrite(self, chars_before: int, chars_after: int) -> None:
+        """Counts a rewritten tool result."""
+        with self._lock:
+            self.rewritten += 1
+            self.chars_before += chars_before
+            self.chars_after += chars_after
+
+    @property
+    def size(self) -> int:
+        """The number of interned URLs."""
+        return len(self._ids)
+
+
+citation_registry = CitationRegistry()
+
+
+def rewrite_citations(text: str) -> str:
+    """
+    Replaces the numbered citations of a search result with source ids.
+
+    "[2]" references in the answer become "[S7]", and the Citations block
+    lists each id with its host only. Text without a Citations block, such
+    as an error message, is returned unchanged.
+
+    Args:
+        text (str): The search result.
+
+    Returns:
+        str: The search result citing source ids.
+    """
+    if not USE_CITATION_REGISTRY:
+        return text
+    body, citations = split_citations(text)
+    entries = CITATION_LINE_PATTERN.findall(citations)
+    if not entries:
+        return text
+
+    source_ids = {
+        number: citation_registry.intern(url) for number, url in entries
+    }
+    body = REFERENCE_PATTERN.sub(
+        lambda match: f"[{source_ids.get(match.group(1), match.group(1))}]", body
+    )
+    lines = [
+        f"[{source_ids[number]}] {urlsplit(url).hostname or url}"
+        for number, url in entries
+    ]
+    rewritten = body + "\n\nCitations:\n" + "\n".join(lines)
+    citation_registry.record_rewrite(len(text), len(rewritten))
+    return rewritten
+
+
+def resolve_citation_url(url: str) -> str:
+    """
+    Resolves a source id passed where a URL is expected.
+
+    Args:
+        url (str): A URL or a source id such as S3.
+
+    Returns:
+        str: The URL of the source id, or url unchanged.
+    """
+    if not SOURCE_ID_ARGUMENT_PATTERN.fullmatch(url.strip()):
+        return url
+    return citation_registry.resolve(url) or url
+
+
+def get_bibliography(messages) -> str:
+    """
+    Lists the URLs of every source id cited in a conversation.
+
+    Args:
+        messages: The message stack.
+
+    Returns:
+        str: The bibliography, or "" when nothing was cited.
+    """
+    cited = {}
+    for message in messages:
+        content = (
+            message.get("content")
+            if isinstance(message, dict)
+            else getattr(message, "content", None)
+        )
+        if isinstance(content, str):
+            cited.update(dict.fromkeys(SOURCE_ID_PATTERN.findall(content)))
+    lines = []
+    for source_id in sorted(cited, key=lambda source_id: int(source_id[1:])):
+        url = citation_registry.resolve(source_id)
+        if url:
+            lines.append(f"[{source_id}] {url}")
+    return "\n".join(lines)
+
+
+def with_bibliography(prompt: str, messages) -> str:
+    """
+    Appends the bibliography of a conversation to the final report prompt.
+
+    Args:
+        prompt (str): The final report prompt.
+        messages: The message stack.
+
+    Returns:
+        str: The prompt, followed by the sources cited in the conversation.
+    """
+    bibliography = get_bibliography(messages)
+    if not bibliography:
+        return prompt
+    return (
+        f"{prompt}\n\nThe research cites sources by id, e.g. [S1]. Cite them in "
+        f"the report with their complete URL from this list:\n\n{bibliography}"
+    )
+
+
+def print_citation_registry_stats() -> None:
+    """
+    Prints how many URLs were interned and how much text the ids saved.
+    """
+    registry = citation_registry
+    if registry.rewritten:
+        print(
+            f"CITATIONS... Sources {registry.size} Rewritten {registry.rewritten} "
+            f"Chars {registry.chars_before} -> {registry.chars_after}"
+        )
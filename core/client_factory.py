@@ -1,53 +1,270 @@
 """client_factory.py"""
 
-from openai import OpenAI
-from groq import Groq
-from together import Together
-from core.fireworks_client import FireworksAiClient
+import asyncio
+import atexit
+import weakref
+from threading import Lock
+
+import httpx
+from openai import (
+    OpenAI,
+    AsyncOpenAI,
+    DefaultHttpxClient as OpenAIHttpxClient,
+    DefaultAsyncHttpxClient as OpenAIAsyncHttpxClient,
+)
+from groq import (
+    Groq,
+    AsyncGroq,
+    DefaultHttpxClient as GroqHttpxClient,
+    DefaultAsyncHttpxClient as GroqAsyncHttpxClient,
+)
+from together import (
+    Together,
+    AsyncTogether,
+    DefaultHttpxClient as TogetherHttpxClient,
+    DefaultAsyncHttpxClient as TogetherAsyncHttpxClient,
+)
+from core.fireworks_client import FireworksAiClient, AsyncFireworksAiClient
 from core.config import (
     Service,
     OPENAI_API_KEY,
     FIREWORKS_API_KEY,
     GROQ_API_KEY,
     TOGETHER_API_KEY,
+    OPENAI_BASE_URL,
+    GROQ_BASE_URL,
+    TOGETHER_BASE_URL,
+    DEEPSEEK_BASE_URL,
+    CLIENT_POOL_SIZE,
+    CLIENT_KEEPALIVE_EXPIRY,
 )
 
+# Process-wide registry of provider clients keyed by (Service, api_key)
+_clients = {}
+_clients_lock = Lock()
+
+# Async clients per event loop, keyed by (Service, api_key); their pools are
+# bound to the loop that created them. Keyed by the loop object, not its id,
+# so a new loop never gets the clients of a finished one
+_async_clients = weakref.WeakKeyDictionary()
+
 
-def get_client(use_service: Service):
+def _get_api_key(use_service: Service) -> str:
     """
-    Returns an instantiated client for the specified AI service.
+    Returns the configured API key for the specified AI service.
 
     Args:
         use_service (Service): The service identifier.
 
+    Returns:
+        str: The API key.
+    """
+    api_key_mapping = {
+        Service.DEEPSEEK: "nothing",
+        Service.GROQ: GROQ_API_KEY,
+        Service.OPENAI: OPENAI_API_KEY,
+        Service.TOGETHER: TOGETHER_API_KEY,
+        Service.FIREWORKS: FIREWORKS_API_KEY,
+    }
+    if use_service not in api_key_mapping:
+        raise ValueError(f"Unsupported service: {use_service}")
+    return api_key_mapping[use_service]
+
+
+def _get_connection_limits() -> httpx.Limits:
+    """
+    Returns the keep-alive connection pool limits shared by all SDK clients.
+
+    Returns:
+        httpx.Limits: Pool limits sized to CLIENT_POOL_SIZE.
+    """
+    return httpx.Limits(
+        max_connections=CLIENT_POOL_SIZE,
+        max_keepalive_connections=CLIENT_POOL_SIZE,
+        keepalive_expiry=CLIENT_KEEPALIVE_EXPIRY,
+    )
+
+
+def _create_client(use_service: Service, api_key: str):
+    """
+    Instantiates a new client for the specified AI service.
+
+    Args:
+        use_service (Service): The service identifier.
+        api_key (str): The API key for the service.
+
     Raises:
         ValueError: If the service is unsupported.
 
     Returns:
         Any: The client instance.
     """
+    # SDK retries are disabled, call_llm_api_with_retry owns the retry policy
     service_mapping = {
-        Service.DEEPSEEK: lambda: OpenAI(base_url="http://localhost:9001"),
-        Service.GROQ: Groq,
-        Service.OPENAI: OpenAI,
-        Service.TOGETHER: Together,
-        Service.FIREWORKS: FireworksAiClient,
+        Service.DEEPSEEK: lambda: OpenAI(
+            base_url=DEEPSEEK_BASE_URL,
+            api_key=api_key,
+            max_retries=0,
+            http_client=OpenAIHttpxClient(limits=_get_connection_limits()),
+        ),
+        Service.GROQ: lambda: Groq(
+            base_url=GROQ_BASE_URL,
+            api_key=api_key,
+            max_retries=0,
+            http_client=GroqHttpxClient(limits=_get_connection_limits()),
+        ),
+        Service.OPENAI: lambda: OpenAI(
+            base_url=OPENAI_BASE_URL,
+            api_key=api_key,
+            max_retries=0,
+            http_client=OpenAIHttpxClient(limits=_get_connection_limits()),
+        ),
+        Service.TOGETHER: lambda: Together(
+            base_url=TOGETHER_BASE_URL,
+            api_key=api_key,
+            max_retries=0,
+            http_client=TogetherHttpxClient(limits=_get_connection_limits()),
+        ),
+        Service.FIREWORKS: lambda: FireworksAiClient(api_key),
     }
     if use_service not in service_mapping:
         raise ValueError(f"Unsupported service: {use_service}")
-    client_class_or_factory = service_mapping[use_service]
-    client = (
-        client_class_or_factory()
-        if callable(client_class_or_factory)
-        else client_class_or_factory()
-    )
-    # Set API keys based on service
-    api_key_mapping = {
-        Service.DEEPSEEK: "nothing",
-        Service.GROQ: GROQ_API_KEY,
-        Service.OPENAI: OPENAI_API_KEY,
-        Service.TOGETHER: TOGETHER_API_KEY,
-        Service.FIREWORKS: FIREWORKS_API_KEY,
+    return service_mapping[use_service]()
+
+
+def get_client(use_service: Service, api_key: str = None):
+    """
+    Returns a pooled client for the specified AI service.
+
+    Clients are created once per (service, api_key) and reused by every
+    caller and thread, so their keep-alive connections are reused too.
+
+    Args:
+        use_service (Service): The service identifier.
+        api_key (str, optional): Overrides the configured API key.
+
+    Raises:
+        ValueError: If the service is unsupported.
+
+    Returns:
+        Any: The client instance.
+    """
+    if api_key is None:
+        api_key = _get_api_key(use_service)
+    key = (use_service, api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _create_client(use_service, api_key)
+                _clients[key] = client
+    return client
+
+
+def close_clients() -> None:
+    """
+    Closes every pooled client and empties the registry.
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"Error closing client {type(client).__name__}: {e}")
+
+
+def _create_async_client(use_service: Service, api_key: str):
+    """
+    Instantiates a new async client for the specified AI service.
+
+    Args:
+        use_service (Service): The service identifier.
+        api_key (str): The API key for the service.
+
+    Raises:
+        ValueError: If the service is unsupported.
+
+    Returns:
+        Any: The async client instance.
+    """
+    # SDK retries are disabled, async_call_llm_api_with_retry owns the retry policy
+    service_mapping = {
+        Service.DEEPSEEK: lambda: AsyncOpenAI(
+            base_url=DEEPSEEK_BASE_URL,
+            api_key=api_key,
+            max_retries=0,
+            http_client=OpenAIAsyncHttpxClient(limits=_get_connection_limits()),
+        ),
+        Service.GROQ: lambda: AsyncGroq(
+            base_url=GROQ_BASE_URL,
+            api_key=api_key,
+            max_retries=0,
+            http_client=GroqAsyncHttpxClient(limits=_get_connection_limits()),
+        ),
+        Service.OPENAI: lambda: AsyncOpenAI(
+            base_url=OPENAI_BASE_URL,
+            api_key=api_key,
+            max_retries=0,
+            http_client=OpenAIAsyncHttpxClient(limits=_get_connection_limits()),
+        ),
+        Service.TOGETHER: lambda: AsyncTogether(
+            base_url=TOGETHER_BASE_URL,
+            api_key=api_key,
+            max_retries=0,
+            http_client=TogetherAsyncHttpxClient(limits=_get_connection_limits()),
+        ),
+        Service.FIREWORKS: lambda: AsyncFireworksAiClient(api_key),
     }
-    client.api_key = api_key_mapping[use_service]
+    if use_service not in service_mapping:
+        raise ValueError(f"Unsupported service: {use_service}")
+    return service_mapping[use_service]()
+
+
+def get_async_client(use_service: Service, api_key: str = None):
+    """
+    Returns a pooled async client for the specified AI service.
+
+    Must be called from a coroutine. Clients are created once per
+    (service, api_key) for the running event loop and shared by every
+    session and tool call on that loop.
+
+    Args:
+        use_service (Service): The service identifier.
+        api_key (str, optional): Overrides the configured API key.
+
+    Raises:
+        ValueError: If the service is unsupported.
+
+    Returns:
+        Any: The async client instance.
+    """
+    if api_key is None:
+        api_key = _get_api_key(use_service)
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get((use_service, api_key))
+    if client is None:
+        client = _create_async_client(use_service, api_key)
+        clients[(use_service, api_key)] = client
     return client
+
+
+async def aclose_async_clients() -> None:
+    """
+    Closes every async client bound to the running event loop.
+    """
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                await close()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"Error closing client {type(client).__name__}: {e}")
+
+
+atexit.register(close_clients)
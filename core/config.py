@@ -14,6 +14,7 @@ class Service(Enum):
     TOGETHER = auto()
     PERPLEXITY = auto()
     FIREWORKS = auto()
+    FIRECRAWL = auto()
 
 
 # Model Identifiers
@@ -60,6 +61,14 @@ USE_SERVICE_SUMMARY = Service.OPENAI
 OPENAI_USE_MODEL_SUMMARY = OPENAI_O1_MINI
 LLM_USE_MODEL_SUMMARY = GROQ_LLAMA_3_VERSATILE
 
+# CONTEXT COMPACTION
+USE_SERVICE_COMPACTION = Service.GROQ
+LLM_USE_MODEL_COMPACTION = GROQ_LLAMA_4_SCOUT
+
+# REPORT SECTION NOTES
+USE_SERVICE_REPORT_SECTION = Service.GROQ
+LLM_USE_MODEL_REPORT_SECTION = GROQ_LLAMA_4_SCOUT
+
 ANSWER_QUALITY_THRESHOLD = 1.0  # 0.00 - 1.00
 MODELS_WITH_TOOL_USAGE = {OPENAI_O1, OPENAI_O3_MINI}
 MAX_TOOL_PARALLEL_THREADS = 20
@@ -79,9 +88,104 @@ PERPLEXITY_MODELS_WITH_REASONING_TOKENS = {
 }
 PERPLEXITY_SEARCH_CONTENT_SIZE = "high"  # high, medium, low
 
+# WEB SEARCH CACHE (SQLite, shared by threads, sessions and runs)
+USE_SEARCH_CACHE = True
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", ".cache/search_cache.sqlite3")
+SEARCH_CACHE_TTLS = {  # seconds an answer stays fresh, per search_recency_filter
+    "hour": 10 * 60,
+    "day": 3 * 60 * 60,
+    "week": 24 * 60 * 60,
+    "month": 3 * 24 * 60 * 60,
+    "year": 14 * 24 * 60 * 60,
+}
+SEARCH_CACHE_DEFAULT_TTL = 24 * 60 * 60  # in seconds
+
+# FIRECRAWL SETTINGS
+FIRECRAWL_TIMEOUT = 60  # total seconds per scrape request, including download
+FIRECRAWL_CONNECT_TIMEOUT = 10  # in seconds
+FIRECRAWL_MAX_RESPONSE_BYTES = 5_000_000  # stop downloading after this many bytes
+FIRECRAWL_MAX_PAGE_TOKENS = 8000  # token budget per scraped page
+
+# NEAR-DUPLICATE QUERY DETECTION (local MinHash/LSH over past queries, no network)
+USE_QUERY_DEDUP = True
+QUERY_DEDUP_THRESHOLD = 0.8  # Jaccard similarity of query shingles, 0.00 - 1.00
+QUERY_SHINGLE_SIZE = 4  # characters per shingle
+QUERY_MINHASH_PERMUTATIONS = 64
+QUERY_LSH_BANDS = 16  # more bands find lower-similarity candidates
+
+# PAGE CACHE (scraped markdown, SQLite, shared by threads, sessions and runs)
+USE_PAGE_CACHE = True
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", ".cache/page_cache.sqlite3")
+PAGE_CACHE_MAX_AGE = 7 * 24 * 60 * 60  # seconds before a page is revalidated
+PAGE_CACHE_MAX_BYTES = 200_000_000  # compressed bodies kept on disk, LRU evicted
+PAGE_CACHE_REVALIDATE_TIMEOUT = 5  # seconds for conditional HEAD requests
+PAGE_CACHE_VALIDATOR_WORKERS = 4  # threads sending validator HEAD requests
+
+# LLM RESPONSE CACHE
+# off, record (call live and save), replay (serve saved, call live and save on a
+# miss) or replay_only (serve saved, fail on a miss)
+RESPONSE_CACHE_MODE = os.getenv("RESPONSE_CACHE_MODE", "off")
+RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", ".cache/llm_responses")
+
+# SESSION CASSETTE
+# off, record (write every LLM, Perplexity and Firecrawl interaction of the run)
+# or replay (serve the run from the cassette without any network access)
+# the response, search and page caches and the query index are bypassed while it is on
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off")
+CASSETTE_PATH = os.getenv("CASSETTE_PATH", "cassettes/session.jsonl")
+# 1 replays at recorded speed, 0 as fast as possible
+CASSETTE_LATENCY_SCALE = float(os.getenv("CASSETTE_LATENCY_SCALE", "1.0"))
+
 # RETRY SETTINGS
-LLM_RETRY_WAIT_TIME = 20  # in seconds
+LLM_RETRY_WAIT_TIME = 20  # max backoff between retries, in seconds
 LLM_RETRY_COUNT = 5
+LLM_RETRY_BASE_WAIT_TIME = 1  # first backoff step, doubled each retry, in seconds
+LLM_RETRY_DEADLINE = 300  # total time per call including retries, in seconds
+
+# RATE LIMIT SETTINGS (client side, shared by all threads and sessions)
+USE_RATE_LIMITER = True
+RATE_LIMITS = {  # 0 means unlimited
+    Service.OPENAI: {"requests_per_minute": 500, "tokens_per_minute": 200000},
+    Service.GROQ: {"requests_per_minute": 1000, "tokens_per_minute": 300000},
+    Service.TOGETHER: {"requests_per_minute": 600, "tokens_per_minute": 0},
+    Service.FIREWORKS: {"requests_per_minute": 600, "tokens_per_minute": 0},
+    Service.PERPLEXITY: {"requests_per_minute": 50, "tokens_per_minute": 0},
+    Service.FIRECRAWL: {"requests_per_minute": 100, "tokens_per_minute": 0},
+}
+RATE_LIMITS_BY_MODEL = {  # overrides RATE_LIMITS for a specific model
+    OPENAI_O1: {"requests_per_minute": 500, "tokens_per_minute": 30000},
+}
+
+# HEDGED REQUESTS AND FAILOVER (call_llm only)
+USE_LLM_ROUTER = False
+EQUIVALENT_MODELS = [  # interchangeable (service, model) groups, in failover order
+    [
+        (Service.GROQ, GROQ_LLAMA_4_MAVERICK),
+        (Service.TOGETHER, TOGETHER_LLAMA_4_MAVERICK),
+        (Service.FIREWORKS, FIREWORKS_LLAMA_4_MAVERICK),
+    ],
+]
+HEDGE_LATENCY_PERCENTILE = 95  # hedge once a call is slower than this percentile
+HEDGE_MIN_SAMPLES = 10  # latencies needed before the percentile is trusted
+HEDGE_DEFAULT_DELAY = 30  # hedge delay until enough samples, in seconds
+HEDGE_MIN_DELAY = 2  # in seconds
+HEDGE_MAX_DELAY = 120  # in seconds
+LATENCY_WINDOW_SIZE = 200  # latencies kept per service and model
+ROUTER_RETRY_COUNT = 2  # tries per candidate before failing over
+
+# CIRCUIT BREAKER (per service and endpoint, shared by all threads and sessions)
+USE_CIRCUIT_BREAKER = True
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures before opening
+CIRCUIT_RESET_TIMEOUT = 30  # seconds open before probing again
+CIRCUIT_HALF_OPEN_PROBES = 1  # concurrent probe calls while half open
+
+# CONNECTION POOL SETTINGS
+CLIENT_POOL_SIZE = MAX_TOOL_PARALLEL_THREADS  # keep-alive connections per client
+CLIENT_KEEPALIVE_EXPIRY = 30  # in seconds
+HTTP_POOL_HOSTS = 10  # distinct hosts kept in the shared HTTP session
+HTTP_POOL_MAXSIZE = MAX_TOOL_PARALLEL_THREADS  # connections per host
+ASYNC_HTTP_POOL_SIZE = 100  # connections per event loop for the async engine
+ORIGIN_POOL_HOSTS = 20  # page origins kept in the validator session, apart from the providers
 
 # USE THINK TWICE SETTINGS
 USE_MULTI_ROUND_TEST_TIME_SCALING = False
@@ -96,6 +200,63 @@ LLM_USE_MODEL_EXPANDED_REASONING = TOGETHER_USE_MODEL
 if USE_SERVICE_REASONING == Service.OPENAI:
     USE_REASONING_EXPANSION = False  # OpenAI doesn't give reasoning tokens
 
+# STREAMING REASONING
+# stream reasoning responses and start each tool call as soon as its JSON block closes
+USE_STREAMING_REASONING = False
+
+# PROMPT LAYOUT
+# keep earlier messages byte-stable for provider prompt caching: timestamps go
+# after the prompt and tool results are appended in the order they were called
+USE_PREFIX_STABLE_LAYOUT = True
+
+# PROMPT TEMPLATES
+PROMPT_RELOAD_INTERVAL = 2  # seconds between mtime checks of a prompt file
+
+# TOKEN COUNTING
+# count prompt tokens before each reasoning call and shortcut to the final answer
+# before an oversized request is sent, not after it has been paid for
+USE_PREFLIGHT_TOKEN_CHECK = True
+TOKEN_CHARS_PER_TOKEN = 4.0  # fallback estimate when tiktoken is not installed
+TOKENS_PER_MESSAGE = 4  # role and separator overhead of each message
+TOKEN_CALIBRATION_RATE = 0.3  # weight of each reported usage in the calibration
+
+# CONTEXT COMPACTION
+# condense older tool results and turns in the background before the prompt
+# budget is reached, so research continues instead of shortcutting to an answer
+USE_CONTEXT_COMPACTION = True
+COMPACTION_TRIGGER_RATIO = 0.6  # share of the prompt budget that starts compaction
+COMPACTION_KEEP_FIRST = 2  # leading messages (instructions, question) never compacted
+COMPACTION_KEEP_RECENT = 6  # latest messages never compacted
+COMPACTION_MIN_TOKENS = 1000  # smaller messages are not worth a compaction call
+COMPACTION_TARGET_TOKENS = 400  # length asked of each compacted message
+COMPACTION_WAIT_TIMEOUT = 60  # seconds to wait for compaction when over budget
+COMPACTION_MAX_WORKERS = 4
+
+# PASSAGE FILTERING
+# keep only the passages of long tool results most relevant to the question and
+# sub-query (BM25); the full text stays retrievable with retrieve_full_tool_result
+USE_PASSAGE_FILTER = True
+PASSAGE_FILTER_MIN_TOKENS = 1500  # shorter tool results are kept whole
+PASSAGE_TOKENS = 150  # target size of a passage
+PASSAGE_TOP_K = 8  # most passages kept per tool result
+PASSAGE_TOKEN_BUDGET = 1200  # most tokens of passages kept per tool result
+PASSAGE_STORE_SIZE = 500  # full tool results kept in memory for retrieval
+
+# CITATION REGISTRY
+# search results cite sources by short session-stable ids (S1, S2, ...) instead
+# of repeating full URLs; the URLs are listed once, in the final report prompt
+USE_CITATION_REGISTRY = True
+
+# MAP-REDUCE REPORT
+# draft notes for each part of the transcript in parallel with a cheaper model,
+# then write the final report from the notes in one reduce call
+USE_MAP_REDUCE_REPORT = True
+REPORT_MIN_TOKENS = 8000  # shorter transcripts are summarized in one call
+REPORT_SECTION_TOKENS = 6000  # most transcript tokens per section
+REPORT_MAX_SECTIONS = 12  # sections grow past REPORT_SECTION_TOKENS to stay under this
+REPORT_NOTES_TOKENS = 800  # length asked of each section's notes
+REPORT_MAX_WORKERS = 8
+
 # Markers for think tokens
 THINK_START = "<think>"
 THINK_END = "</think>"
@@ -108,6 +269,29 @@ FIREWORKS_API_KEY = os.getenv("FIREWORKS_API_KEY", "...")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "...")
 TOGETHER_API_KEY = os.getenv("TOGETHER_API_KEY", "...")
 
+# Provider base URLs (override to point at a proxy or at core.mock_provider_server)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com")
+TOGETHER_BASE_URL = os.getenv("TOGETHER_BASE_URL", "https://api.together.xyz/v1")
+FIREWORKS_BASE_URL = os.getenv(
+    "FIREWORKS_BASE_URL", "https://api.fireworks.ai/inference/v1"
+)
+PERPLEXITY_BASE_URL = os.getenv("PERPLEXITY_BASE_URL", "https://api.perplexity.ai")
+FIRECRAWL_BASE_URL = os.getenv("FIRECRAWL_BASE_URL", "https://api.firecrawl.dev")
+DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "http://localhost:9001")
+
+# Routes every provider to one local mock server, e.g. http://localhost:9100
+MOCK_PROVIDER_BASE_URL = os.getenv("MOCK_PROVIDER_BASE_URL", "")
+if MOCK_PROVIDER_BASE_URL:
+    MOCK_PROVIDER_BASE_URL = MOCK_PROVIDER_BASE_URL.rstrip("/")
+    OPENAI_BASE_URL = f"{MOCK_PROVIDER_BASE_URL}/v1"
+    GROQ_BASE_URL = MOCK_PROVIDER_BASE_URL
+    TOGETHER_BASE_URL = f"{MOCK_PROVIDER_BASE_URL}/v1"
+    FIREWORKS_BASE_URL = f"{MOCK_PROVIDER_BASE_URL}/inference/v1"
+    PERPLEXITY_BASE_URL = MOCK_PROVIDER_BASE_URL
+    FIRECRAWL_BASE_URL = MOCK_PROVIDER_BASE_URL
+    DEEPSEEK_BASE_URL = MOCK_PROVIDER_BASE_URL
+
 # Global Variables
 research_questions = []
 scores = []
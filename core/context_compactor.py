@@ -0,0 +1,258 @@
+"""context_compactor.py"""
+
+import re
+import atexit
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Lock
+
+from core.llm_helpers import call_llm
+from core.token_counter import MessageTokenCounter, get_message_text
+from core.citation_registry import SOURCE_ID_PATTERN
+from core.config import (
+    USE_SERVICE_COMPACTION,
+    LLM_USE_MODEL_COMPACTION,
+    COMPACTION_TRIGGER_RATIO,
+    COMPACTION_KEEP_FIRST,
+    COMPACTION_KEEP_RECENT,
+    COMPACTION_MIN_TOKENS,
+    COMPACTION_TARGET_TOKENS,
+    COMPACTION_WAIT_TIMEOUT,
+    COMPACTION_MAX_WORKERS,
+)
+
+COMPACTED_MARKER = "[Compacted]"
+
+URL_PATTERN = re.compile(r"https?://[^\s)\]>\"'`]+")
+# "[S3] example.com" lines of a rewritten Citations block
+SOURCE_LINE_PATTERN = re.compile(r"^\s*\[(S\d+)\][^\n]*$", re.MULTILINE)
+
+
+def get_urls(text: str) -> list:
+    """
+    Returns the unique URLs of a text in order of appearance.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        list: The URLs.
+    """
+    return list(dict.fromkeys(url.rstrip(".,;:") for url in URL_PATTERN.findall(text)))
+
+
+def get_sources(text: str) -> list:
+    """
+    Returns the citations of a text that must survive compaction.
+
+    These are the URLs, and the source ids such as [S3] that search results
+    cite once the citation registry rewrote them, each with its Citations
+    line when the text has one.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        list: (key, line) pairs, the key to look for in the condensed text
+        and the line to append when it is missing.
+    """
+    lines = {
+        match.group(1): match.group(0).strip()
+        for match in SOURCE_LINE_PATTERN.finditer(text)
+    }
+    source_ids = dict.fromkeys(SOURCE_ID_PATTERN.findall(text))
+    return [(url, url) for url in get_urls(text)] + [
+        (f"[{source_id}]", lines.get(source_id, f"[{source_id}]"))
+        for source_id in source_ids
+    ]
+
+
+def condense_extractively(text: str, max_chars: int) -> str:
+    """
+    Keeps the leading sentences of a text and every URL it cites.
+
+    Args:
+        text (str): The text.
+        max_chars (int): The length of text to keep, URLs excluded.
+
+    Returns:
+        str: The condensed text.
+    """
+    kept = []
+    length = 0
+    for sentence in re.split(r"(?<=[.!?])\s+|\n+", text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if length + len(sentence) > max_chars:
+            break
+        kept.append(sentence)
+        length += len(sentence) + 1
+    condensed = " ".join(kept) or text[:max_chars]
+    return keep_citations(condensed, get_sources(text))
+
+
+def keep_citations(condensed: str, sources: list) -> str:
+    """
+    Appends the sources the condensed text dropped, so citations survive compaction.
+
+    Args:
+        condensed (str): The condensed text.
+        sources (list): The (key, line) pairs of the original text, from get_sources.
+
+    Returns:
+        str: The condensed text with every original URL and source id.
+    """
+    missing = [line for key, line in sources if key not in condensed]
+    if not missing:
+        return condensed
+    return condensed + "\n\nSources:\n" + "\n".join(missing)
+
+
+def compact_text(text: str) -> str:
+    """
+    Summarizes a tool result or turn with the compaction model.
+
+    Falls back to extractive condensing when the model call fails.
+
+    Args:
+        text (str): The message content.
+
+    Returns:
+        str: The compacted content, marked as compacted.
+    """
+    prompt = f"""
+    Condense the research notes below to at most {COMPACTION_TARGET_TOKENS} tokens. Keep every fact, number, date, name and conclusion that could matter to a research question, drop repetition and filler. Keep every URL and every source id such as [S3] exactly as written next to the fact it supports. Respond with the condensed notes only, no introduction or commentary.
+
+    ```notes
+    {text}
+    ```
+    """
+    summary = call_llm(prompt, LLM_USE_MODEL_COMPACTION, USE_SERVICE_COMPACTION)
+    if not summary or summary.startswith("Error calling LLM"):
+        summary = condense_extractively(text, COMPACTION_TARGET_TOKENS * 4)
+    else:
+        summary = keep_citations(summary.strip(), get_sources(text))
+    return f"{COMPACTED_MARKER} {summary}"
+
+
+_compaction_executor = None
+_compaction_executor_lock = Lock()
+_stats = {"compacted": 0}
+_stats_lock = Lock()
+
+
+def get_compaction_executor() -> ThreadPoolExecutor:
+    """
+    Returns the process-wide executor that runs compaction calls.
+
+    Returns:
+        ThreadPoolExecutor: The shared executor.
+    """
+    global _compaction_executor  # pylint: disable=global-statement
+    if _compaction_executor is None:
+        with _compaction_executor_lock:
+            if _compaction_executor is None:
+                _compaction_executor = ThreadPoolExecutor(
+                    max_workers=COMPACTION_MAX_WORKERS,
+                    thread_name_prefix="compaction",
+                )
+                atexit.register(_compaction_executor.shutdown, cancel_futures=True)
+    return _compaction_executor
+
+
+class ContextCompactor:
+    """
+    Condenses older messages of a session in the background.
+
+    Once the prompt passes COMPACTION_TRIGGER_RATIO of its budget, the large
+    messages between the leading instructions and the most recent turns are
+    compacted as one batch on a shared executor while research continues.
+    When the whole batch is done its results replace the original messages,
+    matched by identity, in a single step so the prompt prefix changes once
+    per batch. Only when the prompt is already over budget does the loop wait
+    for a running batch.
+    """
+
+    def __init__(self, token_counter: MessageTokenCounter, max_prompt_tokens: int):
+        self.token_counter = token_counter
+        self.max_prompt_tokens = max_prompt_tokens
+        self.trigger_tokens = int(max_prompt_tokens * COMPACTION_TRIGGER_RATIO)
+        self._batch = {}
+        self.compacted = 0
+
+    def _get_candidates(self, messages: list) -> list:
+        estimator = self.token_counter.estimator
+        candidates = []
+        end = len(messages) - COMPACTION_KEEP_RECENT
+        for message in messages[COMPACTION_KEEP_FIRST:end]:
+            # SDK messages carry tool_calls the provider must see unchanged
+            if not isinstance(message, dict) or message.get("tool_calls"):
+                continue
+            content = message.get("content")
+            if not isinstance(content, str) or content.startswith(COMPACTED_MARKER):
+                continue
+            tokens = estimator.count_raw(get_message_text(message)) * estimator.scale
+            if tokens >= COMPACTION_MIN_TOKENS:
+                candidates.append(message)
+        return candidates
+
+    def _start_batch(self, messages: list) -> None:
+        executor = get_compaction_executor()
+        for message in self._get_candidates(messages):
+            self._batch[id(message)] = (
+                message,
+                executor.submit(compact_text, message["content"]),
+            )
+        if self._batch:
+            print(f"COMPACTION... Condensing {len(self._batch)} older messages")
+
+    def _apply_batch(self, messages: list) -> None:
+        if not all(future.done() for _, future in self._batch.values()):
+            return
+        for index, message in enumerate(messages):
+            entry = self._batch.get(id(message))
+            if entry is None or entry[0] is not message:
+                continue
+            try:
+                content = entry[1].result()
+            except Exception:  # pylint: disable=broad-exception-caught
+                content = None
+            if content:
+                # keeps the message type, e.g. a ToolResultMessage
+                messages[index] = type(message)(message, content=content)
+                self.compacted += 1
+                with _stats_lock:
+                    _stats["compacted"] += 1
+        self._batch = {}
+
+    def compact(self, messages: list) -> list:
+        """
+        Applies a finished compaction batch and starts a new one if needed.
+
+        Args:
+            messages (list): The message stack, updated in place.
+
+        Returns:
+            list: The message stack.
+        """
+        if self._batch:
+            self._apply_batch(messages)
+        tokens = self.token_counter.count(messages)
+        if not self._batch and tokens > self.trigger_tokens:
+            self._start_batch(messages)
+        if self._batch and tokens > self.max_prompt_tokens:
+            # over budget: waiting beats shortcutting the session to an answer
+            wait(
+                [future for _, future in self._batch.values()],
+                timeout=COMPACTION_WAIT_TIMEOUT,
+            )
+            self._apply_batch(messages)
+        return messages
+
+
+def print_compaction_stats() -> None:
+    """
+    Prints how many messages were compacted.
+    """
+    if _stats["compacted"]:
+        print(f"COMPACTION... Compacted_Messages {_stats['compacted']}")
@@ -0,0 +1,108 @@
+"""conversation.py"""
+
+
+class Conversation(list):
+    """
+    A message list that remembers its last rendering.
+
+    DeepSeek gets the whole transcript as one user message, rendered again
+    on every turn. A Conversation keeps the text of the last render, so a
+    render after appends only formats the new messages. It is a plain list
+    otherwise and is sent to providers as is. Any change other than an
+    append (pop, item assignment, insert, ...) drops the kept text.
+    """
+
+    __slots__ = ("_rendered",)
+
+    def __init__(self, messages=()):
+        super().__init__(messages)
+        # (render function, rendered message count, text) of the last render()
+        self._rendered = None
+
+    def _changed(self) -> None:
+        self._rendered = None
+
+    def __setitem__(self, index, message) -> None:
+        self._changed()
+        super().__setitem__(index, message)
+
+    def __delitem__(self, index) -> None:
+        self._changed()
+        super().__delitem__(index)
+
+    def __imul__(self, count):
+        self._changed()
+        return super().__imul__(count)
+
+    def pop(self, index: int = -1):
+        """Removes and returns a message, the last one by default."""
+        self._changed()
+        return super().pop(index)
+
+    def insert(self, index: int, message) -> None:
+        """Inserts a message before index."""
+        self._changed()
+        super().insert(index, message)
+
+    def remove(self, message) -> None:
+        """Removes the first occurrence of a message."""
+        self._changed()
+        super().remove(message)
+
+    def clear(self) -> None:
+        """Removes every message."""
+        self._changed()
+        super().clear()
+
+    def sort(self, *args, **kwargs) -> None:
+        """Sorts the messages in place."""
+        self._changed()
+        super().sort(*args, **kwargs)
+
+    def reverse(self) -> None:
+        """Reverses the messages in place."""
+        self._changed()
+        super().reverse()
+
+    def copy(self) -> "Conversation":
+        """
+        Returns a shallow copy that keeps the last rendering.
+
+        Returns:
+            Conversation: The copy, changing it does not change this one.
+        """
+        conversation = Conversation(self)
+        conversation._rendered = self._rendered
+        return conversation
+
+    def render(self, render_message) -> str:
+        """
+        Renders the messages into one string.
+
+        Args:
+            render_message (callable): Returns the text of one message.
+
+        Returns:
+            str: The rendered messages.
+        """
+        cached = self._rendered
+        if (
+            cached is not None
+            and cached[0] is render_message
+            and cached[1] <= len(self)
+        ):
+            _, count, text = cached
+        else:
+            count, text = 0, ""
+        text += "".join(render_message(message) for message in self[count:])
+        self._rendered = (render_message, len(self), text)
+        return text
+
+
+class ToolResultMessage(dict):
+    """
+    A message holding a tool result.
+
+    Providers see a plain message dict. The type tells the report writer
+    where a tool result starts, whichever tool produced it.
+    """
@@ -1,29 +1,135 @@
 """program"""
 
-import requests
+import time
 
-from core.config import FIRECRAWL_API_KEY
+import httpx
+
+from core.config import (
+    Service,
+    FIRECRAWL_API_KEY,
+    FIRECRAWL_BASE_URL,
+    FIRECRAWL_TIMEOUT,
+    FIRECRAWL_CONNECT_TIMEOUT,
+    FIRECRAWL_MAX_RESPONSE_BYTES,
+)
+from core.http_session import get_session, get_async_session
+from core.retry_policy import DEFAULT_RETRY_POLICY, get_attempt_timeout
+from core.cassette import get_cassette
+from core.rate_limiter import get_rate_limiter
+from core.circuit_breaker import (
+    get_circuit_breaker,
+    call_through,
+    async_call_through,
+)
+from core.scrape_pipeline import (
+    read_limited_body,
+    async_read_limited_body,
+    decode_scrape_body,
+)
 
 
 class FireCrawlClient:
     """FireCrawlClient"""
 
-    def scrape_with_firecrawl(self, url):
-        """scrape_with_firecrawl"""
-        endpoint = "https://api.firecrawl.dev/v1/scrape"
+    endpoint = f"{FIRECRAWL_BASE_URL}/v1/scrape"
+
+    def _build_request(self, url: str) -> tuple:
+        """
+        Builds the headers and payload for a Firecrawl scrape.
+
+        Args:
+            url (str): The URL to scrape.
 
+        Returns:
+            Tuple(dict, dict): headers, payload.
+        """
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
         }
 
-        payload = {"url": url, "formats": ["markdown"], "timeout": 180000}
+        payload = {
+            "url": url,
+            "formats": ["markdown"],
+            "onlyMainContent": True,
+            "excludeTags": ["nav", "footer", "header", "aside"],
+            # leave Firecrawl time to answer before our own deadline fires
+            "timeout": int((FIRECRAWL_TIMEOUT - 5) * 1000),
+        }
+        return headers, payload
+
+    def scrape_with_firecrawl(self, url):
+        """scrape_with_firecrawl"""
+        headers, payload = self._build_request(url)
+
+        limiter = get_rate_limiter(Service.FIRECRAWL)
+        breaker = get_circuit_breaker(Service.FIRECRAWL, "v1/scrape")
+
+        def post():
+            if limiter:
+                limiter.acquire()
+            timeout = get_attempt_timeout(FIRECRAWL_TIMEOUT)
+            deadline = time.monotonic() + timeout
+            response = get_session().post(
+                self.endpoint,
+                headers=headers,
+                json=payload,
+                stream=True,
+                timeout=(min(FIRECRAWL_CONNECT_TIMEOUT, timeout), timeout),
+            )
+
+            try:
+                response.raise_for_status()
+                body, truncated = read_limited_body(
+                    response.iter_content(65536),
+                    FIRECRAWL_MAX_RESPONSE_BYTES,
+                    deadline,
+                )
+            finally:
+                response.close()
+            return decode_scrape_body(body, truncated)
+
+        def call():
+            return DEFAULT_RETRY_POLICY.call(
+                call_through, breaker, post, label="FIRECRAWL"
+            )
+
+        cassette = get_cassette()
+        if cassette:
+            return cassette.call("firecrawl", Service.FIRECRAWL.name, payload, call)
+        return call()
+
+    async def async_scrape_with_firecrawl(self, url):
+        """async_scrape_with_firecrawl"""
+        headers, payload = self._build_request(url)
+
+        limiter = get_rate_limiter(Service.FIRECRAWL)
+        breaker = get_circuit_breaker(Service.FIRECRAWL, "v1/scrape")
+
+        async def post():
+            if limiter:
+                await limiter.async_acquire()
+            deadline = time.monotonic() + FIRECRAWL_TIMEOUT
+            timeout = httpx.Timeout(FIRECRAWL_TIMEOUT, connect=FIRECRAWL_CONNECT_TIMEOUT)
+            async with get_async_session().stream(
+                "POST", self.endpoint, headers=headers, json=payload, timeout=timeout
+            ) as response:
+                response.raise_for_status()
+                body, truncated = await async_read_limited_body(
+                    response.aiter_bytes(65536),
+                    FIRECRAWL_MAX_RESPONSE_BYTES,
+                    deadline,
+                )
+            return decode_scrape_body(body, truncated)
 
-        response = requests.post(
-            endpoint, headers=headers, json=payload, timeout=180000
-        )
+        async def call():
+            return await DEFAULT_RETRY_POLICY.async_call(
+                async_call_through, breaker, post, label="FIRECRAWL"
+            )
 
-        if response.status_code == 200:
-            return response.json()
-        else:
-            response.raise_for_status()
+        cassette = get_cassette()
+        if cassette:
+            return await cassette.async_call(
+                "firecrawl", Service.FIRECRAWL.name, payload, call
+            )
+        return await call()
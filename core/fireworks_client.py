@@ -1,16 +1,18 @@
 """fireworks_client.py"""
 
 import json
-import requests
 from openai.types.chat.chat_completion import ChatCompletion
 
+from core.http_session import get_session, get_async_session
+from core.config import FIREWORKS_BASE_URL
+
 
 class FireworksAiCompletions:
     """FireworksAiCompletions"""
 
     def __init__(self, api_key: str):
         self.api_key = api_key
-        self.url = "https://api.fireworks.ai/inference/v1/chat/completions"
+        self.url = f"{FIREWORKS_BASE_URL}/chat/completions"
 
     def create(self, **kwargs) -> ChatCompletion:
         """
@@ -28,8 +30,9 @@ class FireworksAiCompletions:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
         }
-        response = requests.request(
-            "POST", self.url, headers=headers, data=json.dumps(kwargs), timeout=180
+        timeout = kwargs.pop("timeout", 180)
+        response = get_session().post(
+            self.url, headers=headers, data=json.dumps(kwargs), timeout=timeout
         )
         response.raise_for_status()
         return ChatCompletion.model_validate(response.json())
@@ -72,3 +75,49 @@ class FireworksAiClient:
         self._api_key = value
         if self.chat:
             self.chat.api_key = value
+
+
+class AsyncFireworksAiCompletions(FireworksAiCompletions):
+    """AsyncFireworksAiCompletions"""
+
+    async def create(self, **kwargs) -> ChatCompletion:
+        """
+        Calls the Fireworks AI completions endpoint without blocking the event loop.
+
+        Returns:
+            ChatCompletion: The validated chat completion response.
+        """
+        if not self.api_key:
+            raise ValueError(
+                "API key is not set. Please set the api_key property on the FireworksAiClient."
+            )
+        headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        }
+        timeout = kwargs.pop("timeout", 180)
+        response = await get_async_session().post(
+            self.url, headers=headers, content=json.dumps(kwargs), timeout=timeout
+        )
+        response.raise_for_status()
+        return ChatCompletion.model_validate(response.json())
+
+
+class AsyncFireworksAiChatClient(FireworksAiChatClient):
+    """AsyncFireworksAiChatClient"""
+
+    def __init__(self, api_key: str):  # pylint: disable=super-init-not-called
+        self.completions = AsyncFireworksAiCompletions(api_key)
+
+
+class AsyncFireworksAiClient(FireworksAiClient):
+    """AsyncFireworksAiClient"""
+
+    def __init__(self, api_key: str = None):  # pylint: disable=super-init-not-called
+        from core.config import FIREWORKS_API_KEY
+
+        if api_key is None:
+            api_key = FIREWORKS_API_KEY
+        self._api_key = api_key
+        self.chat = AsyncFireworksAiChatClient(self._api_key)
@@ -0,0 +1,175 @@
+"""http_session.py"""
+
+import asyncio
+import atexit
+import weakref
+from threading import Lock
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.config import (
+    HTTP_POOL_HOSTS,
+    HTTP_POOL_MAXSIZE,
+    ASYNC_HTTP_POOL_SIZE,
+    ORIGIN_POOL_HOSTS,
+    PAGE_CACHE_VALIDATOR_WORKERS,
+)
+
+# Process-wide keep-alive session shared by the raw HTTP clients
+_session = None
+_session_lock = Lock()
+
+# Session for requests to scraped pages' origins, so their many hosts do not
+# evict the provider connections of the shared session
+_origin_session = None
+_origin_session_lock = Lock()
+
+# One async client per event loop, connections are bound to their loop. Keyed
+# by the loop object, not its id, so a new loop never gets a finished one's client
+_async_sessions = weakref.WeakKeyDictionary()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the shared, pooled HTTP session.
+
+    The session keeps at most HTTP_POOL_MAXSIZE connections per host and blocks
+    callers when the pool is exhausted, so it is safe to use from every worker
+    thread.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session  # pylint: disable=global-statement
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_HOSTS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                    pool_block=True,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Accept-Encoding": "gzip, deflate"})
+                _session = session
+    return _session
+
+
+def get_origin_session() -> requests.Session:
+    """
+    Returns the session used for requests to scraped pages' origins.
+
+    Page validators go to a new host for almost every page. Keeping them out
+    of the shared session stops those hosts from evicting the pooled
+    connections to the providers.
+
+    Returns:
+        requests.Session: The origin session.
+    """
+    global _origin_session  # pylint: disable=global-statement
+    if _origin_session is None:
+        with _origin_session_lock:
+            if _origin_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=ORIGIN_POOL_HOSTS,
+                    pool_maxsize=PAGE_CACHE_VALIDATOR_WORKERS,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _origin_session = session
+    return _origin_session
+
+
+def get_http_stats() -> dict:
+    """
+    Returns connection reuse counters per host for the shared session.
+
+    Returns:
+        dict: host -> {"requests", "connections", "reused"}.
+    """
+    stats = {}
+    session = _session
+    if session is None:
+        return stats
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            entry = stats.setdefault(
+                host, {"requests": 0, "connections": 0, "reused": 0}
+            )
+            entry["requests"] += pool.num_requests
+            entry["connections"] += pool.num_connections
+            entry["reused"] += max(pool.num_requests - pool.num_connections, 0)
+    return stats
+
+
+def print_http_stats() -> None:
+    """
+    Prints connection reuse counters for the shared session.
+    """
+    for host, entry in get_http_stats().items():
+        print(
+            f"HTTP POOL... {host} Requests {entry['requests']} "
+            f"Connections {entry['connections']} Reused {entry['reused']}"
+        )
+
+
+def close_session() -> None:
+    """
+    Closes the shared and origin sessions and their pooled connections.
+    """
+    global _session, _origin_session  # pylint: disable=global-statement
+    with _session_lock:
+        session = _session
+        _session = None
+    with _origin_session_lock:
+        origin_session = _origin_session
+        _origin_session = None
+    for pooled in (session, origin_session):
+        if pooled is not None:
+            pooled.close()
+
+
+def get_async_session() -> httpx.AsyncClient:
+    """
+    Returns the pooled async HTTP client for the running event loop.
+
+    Must be called from a coroutine. The client holds at most
+    ASYNC_HTTP_POOL_SIZE connections, extra requests wait for a free one.
+
+    Returns:
+        httpx.AsyncClient: The shared async client.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_sessions.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=ASYNC_HTTP_POOL_SIZE,
+                max_keepalive_connections=ASYNC_HTTP_POOL_SIZE,
+            ),
+            headers={"Accept-Encoding": "gzip, deflate"},
+        )
+        _async_sessions[loop] = client
+    return client
+
+
+async def aclose_async_session() -> None:
+    """
+    Closes the async HTTP client bound to the running event loop.
+    """
+    client = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+atexit.register(close_session)
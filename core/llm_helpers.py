@@ -1,23 +1,45 @@
 """llm_helpers.py"""
 
-import time
+import asyncio
 from typing import Tuple
 
-from openai import OpenAI
-
-from core.client_factory import get_client
-from core.utilities import remove_think_text, get_current_datetime
-from core.pricing import get_model_pricing
+from core.client_factory import get_client, get_async_client
+from core.retry_policy import RetryPolicy, get_attempt_timeout
+from core.circuit_breaker import (
+    get_circuit_breaker,
+    call_through,
+    async_call_through,
+)
+from core.rate_limiter import (
+    get_rate_limiter,
+    estimate_request_tokens,
+    get_usage_tokens,
+)
+from core.response_cache import (
+    get_response_cache,
+    get_service_name,
+    dump_response,
+    load_response,
+    is_replayed,
+)
+from core.cassette import get_cassette
+from core.utilities import remove_think_text, with_current_datetime
+from core.pricing import get_model_pricing, get_cached_input_price
 from core.config import (
     lock,
     Service,
     LLM_RETRY_WAIT_TIME,
     LLM_RETRY_COUNT,
+    LLM_RETRY_DEADLINE,
+    USE_LLM_ROUTER,
     GRAND_TOTAL_COST,
-    OPENAI_API_KEY,
     OPENAI_GPT_4O,
 )
 
+# Prompt tokens sent and the share providers served from their prompt cache
+PROMPT_TOKENS_TOTAL = 0
+CACHED_TOKENS_TOTAL = 0
+
 
 def process_and_store_message(tmp_messages, retval_text):
     """
@@ -29,7 +51,7 @@ def process_and_store_message(tmp_messages, retval_text):
     - retval_text (str): The output text to be processed.
     """
 
-    last_message = str(tmp_messages.copy().pop()) if len(tmp_messages) > 0 else None
+    last_message = str(tmp_messages[-1]) if len(tmp_messages) > 0 else None
 
     # Print input and output to console
     print("INPUT")
@@ -64,33 +86,123 @@ def call_llm_api_with_retry(
     args: dict,
     retry_count: int = LLM_RETRY_COUNT,
     retry_wait_time: int = LLM_RETRY_WAIT_TIME,
+    service: Service = None,
 ):
     """
     Calls the LLM API with retries if necessary.
 
+    Transient errors are retried with capped exponential backoff and jitter,
+    honoring Retry-After headers, permanent errors (e.g. 400, 401, 404) fail fast.
+    When service is given every attempt waits for the service/model rate limiter
+    and goes through the service circuit breaker, which fails fast while open.
+    Non-streaming calls are recorded and replayed by the response cache when
+    RESPONSE_CACHE_MODE is set.
+
     Args:
         client: The LLM client instance.
         args (dict): Arguments for the API call.
-        retry_count (int): Maximum number of retries.
-        retry_wait_time (int): Wait time between retries.
+        retry_count (int): Maximum number of tries.
+        retry_wait_time (int): Maximum backoff between retries.
+        service (Service, optional): The service, used for rate limiting.
 
     Returns:
         Response object from the API.
     """
-    llm_call_count = 0
-    while llm_call_count < retry_count:
-        try:
-            llm_call_count += 1
-            if llm_call_count > 1:
-                print(f"LLM CALL TRY {llm_call_count} of {retry_count}")
-            response = client.chat.completions.create(**args)
-            return response
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            print(f"Error calling LLM, waiting {retry_wait_time} seconds: {e}")
-            if llm_call_count < retry_count:
-                time.sleep(retry_wait_time)
-            else:
-                raise
+    policy = RetryPolicy(max_attempts=retry_count, max_delay=retry_wait_time)
+    limiter = get_rate_limiter(service, args.get("model")) if service else None
+    estimated_tokens = estimate_request_tokens(args) if limiter else 0
+    breaker = get_circuit_breaker(service, "chat/completions") if service else None
+
+    def create():
+        if limiter:
+            limiter.acquire(estimated_tokens)
+        # a hung request must not outlive the retry deadline
+        response = call_through(
+            breaker,
+            client.chat.completions.create,
+            **args,
+            timeout=get_attempt_timeout(LLM_RETRY_DEADLINE),
+        )
+        if limiter:
+            limiter.record_usage(estimated_tokens, get_usage_tokens(response))
+        return response
+
+    service_name = get_service_name(service, client)
+    cache = get_response_cache() if not args.get("stream") else None
+
+    def call():
+        if cache:
+            cached = cache.get(service_name, args)
+            if cached is not None:
+                return cached
+        response = policy.call(create)
+        if cache:
+            cache.put(service_name, args, response)
+        return response
+
+    cassette = get_cassette() if not args.get("stream") else None
+    if cassette:
+        return cassette.call(
+            "llm", service_name, args, call, dump=dump_response, load=load_response
+        )
+    return call()
+
+
+async def async_call_llm_api_with_retry(
+    client,
+    args: dict,
+    retry_count: int = LLM_RETRY_COUNT,
+    retry_wait_time: int = LLM_RETRY_WAIT_TIME,
+    service: Service = None,
+):
+    """
+    Calls the LLM API through an async client with retries if necessary.
+
+    Args:
+        client: The async LLM client instance.
+        args (dict): Arguments for the API call.
+        retry_count (int): Maximum number of tries.
+        retry_wait_time (int): Maximum backoff between retries.
+        service (Service, optional): The service, used for rate limiting.
+
+    Returns:
+        Response object from the API.
+    """
+    policy = RetryPolicy(max_attempts=retry_count, max_delay=retry_wait_time)
+    limiter = get_rate_limiter(service, args.get("model")) if service else None
+    estimated_tokens = estimate_request_tokens(args) if limiter else 0
+    breaker = get_circuit_breaker(service, "chat/completions") if service else None
+
+    async def create():
+        if limiter:
+            await limiter.async_acquire(estimated_tokens)
+        response = await async_call_through(
+            breaker, client.chat.completions.create, **args
+        )
+        if limiter:
+            limiter.record_usage(estimated_tokens, get_usage_tokens(response))
+        return response
+
+    service_name = get_service_name(service, client)
+    cache = get_response_cache() if not args.get("stream") else None
+
+    async def call():
+        # the response cache reads and writes files, keep it off the event loop
+        if cache:
+            cached = await asyncio.to_thread(cache.get, service_name, args)
+            if cached is not None:
+                return cached
+        response = await policy.async_call(create)
+        if cache:
+            await asyncio.to_thread(cache.put, service_name, args, response)
+        return response
+
+    cassette = get_cassette() if not args.get("stream") else None
+    if cassette:
+        return await cassette.async_call(
+            "llm", service_name, args, call, dump=dump_response, load=load_response
+        )
+    return await call()
 
 
 def call_llm(
@@ -113,12 +225,11 @@ def call_llm(
     Returns:
         str: The assistant's response text.
     """
-    tmp_messages = []
     retval_text = ""
 
     if messages is None:
         tmp_messages = [
-            {"role": "user", "content": get_current_datetime() + "\n" + prompt}
+            {"role": "user", "content": with_current_datetime(prompt)}
         ]
     else:
         tmp_messages = messages.copy()
@@ -130,7 +241,14 @@ def call_llm(
     }
 
     try:
-        retval = call_llm_api_with_retry(client, args)
+        if USE_LLM_ROUTER:
+            from core.llm_router import (  # pylint: disable=import-outside-toplevel
+                call_llm_routed,
+            )
+
+            retval, USE_SERVICE, model = call_llm_routed(USE_SERVICE, model, args)
+        else:
+            retval = call_llm_api_with_retry(client, args, service=USE_SERVICE)
         if message_prefix:
             print(f"{message_prefix} {USE_SERVICE} {model}")
         print_token_usage_details(retval, USE_SERVICE, model)
@@ -155,22 +273,22 @@ def call_openai(prompt: str, model: str = None, messages: list = None) -> str:
         str: The assistant's response text.
     """
 
-    tmp_messages = []
     retval_text = ""
 
     if messages is None:
         tmp_messages = [
-            {"role": "user", "content": get_current_datetime() + "\n" + prompt}
+            {"role": "user", "content": with_current_datetime(prompt)}
         ]
     else:
         tmp_messages = messages.copy()
         tmp_messages.append({"role": "user", "content": prompt})
 
     try:
-        openai_client = OpenAI()
-        openai_client.api_key = OPENAI_API_KEY
-        completion = openai_client.chat.completions.create(
-            model=model if model else OPENAI_GPT_4O, messages=tmp_messages
+        openai_client = get_client(Service.OPENAI)
+        completion = call_llm_api_with_retry(
+            openai_client,
+            {"model": model if model else OPENAI_GPT_4O, "messages": tmp_messages},
+            service=Service.OPENAI,
         )
         print_token_usage_details(
             completion, Service.OPENAI, model if model else OPENAI_GPT_4O
@@ -184,22 +302,165 @@ def call_openai(prompt: str, model: str = None, messages: list = None) -> str:
     return retval_text
 
 
+async def async_call_llm(
+    prompt: str,
+    model: str,
+    USE_SERVICE: Service,  # pylint:disable=invalid-name
+    message_prefix: str = None,
+    messages: list = None,
+) -> str:
+    """
+    Calls an LLM with the given prompt and messages without blocking the event loop.
+
+    Args:
+        prompt (str): The prompt text.
+        model (str): The model identifier.
+        USE_SERVICE (Service): The service to use.
+        message_prefix (str, optional): A prefix message for logging.
+        messages (list, optional): A list of message dicts.
+
+    Returns:
+        str: The assistant's response text.
+    """
+    retval_text = ""
+
+    if messages is None:
+        tmp_messages = [
+            {"role": "user", "content": with_current_datetime(prompt)}
+        ]
+    else:
+        tmp_messages = messages.copy()
+        tmp_messages.append({"role": "user", "content": prompt})
+    client = get_async_client(USE_SERVICE)
+    args = {
+        "model": model,
+        "messages": tmp_messages,
+    }
+
+    try:
+        if USE_LLM_ROUTER:
+            from core.llm_router import (  # pylint: disable=import-outside-toplevel
+                async_call_llm_routed,
+            )
+
+            retval, USE_SERVICE, model = await async_call_llm_routed(
+                USE_SERVICE, model, args
+            )
+        else:
+            retval = await async_call_llm_api_with_retry(
+                client, args, service=USE_SERVICE
+            )
+        if message_prefix:
+            print(f"{message_prefix} {USE_SERVICE} {model}")
+        print_token_usage_details(retval, USE_SERVICE, model)
+        retval_text = retval.choices[0].message.content
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        retval_text = f"Error calling LLM model='{model}': {str(e)}"
+
+    await asyncio.to_thread(process_and_store_message, tmp_messages, retval_text)
+    return retval_text
+
+
+async def async_call_openai(
+    prompt: str, model: str = None, messages: list = None
+) -> str:
+    """
+    Calls OpenAI's chat API without blocking the event loop.
+
+    Args:
+        prompt (str): The prompt text.
+        model (str, optional): The model to use.
+        messages (list, optional): List of message dicts.
+
+    Returns:
+        str: The assistant's response text.
+    """
+
+    retval_text = ""
+
+    if messages is None:
+        tmp_messages = [
+            {"role": "user", "content": with_current_datetime(prompt)}
+        ]
+    else:
+        tmp_messages = messages.copy()
+        tmp_messages.append({"role": "user", "content": prompt})
+
+    try:
+        openai_client = get_async_client(Service.OPENAI)
+        completion = await async_call_llm_api_with_retry(
+            openai_client,
+            {"model": model if model else OPENAI_GPT_4O, "messages": tmp_messages},
+            service=Service.OPENAI,
+        )
+        print_token_usage_details(
+            completion, Service.OPENAI, model if model else OPENAI_GPT_4O
+        )
+        retval_text = completion.choices[0].message.content
+        retval_text = remove_think_text(retval_text)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        retval_text = f"Error calling LLM model='{model}': {str(e)}"
+
+    await asyncio.to_thread(process_and_store_message, tmp_messages, retval_text)
+    return retval_text
+
+
+def get_cached_tokens(usage) -> int:
+    """
+    Returns the prompt tokens the provider served from its prompt cache.
+
+    Args:
+        usage: The usage block of a response.
+
+    Returns:
+        int: Cached prompt tokens, 0 if not reported.
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        cached_tokens = details.get("cached_tokens")
+    else:
+        cached_tokens = getattr(details, "cached_tokens", None)
+    if cached_tokens is None:
+        # DeepSeek reports cache hits at the top level
+        cached_tokens = getattr(usage, "prompt_cache_hit_tokens", None)
+    return cached_tokens if isinstance(cached_tokens, int) else 0
+
+
+def print_prompt_cache_stats() -> None:
+    """
+    Prints how many prompt tokens providers served from their prompt cache.
+    """
+    if PROMPT_TOKENS_TOTAL:
+        print(
+            f"PROMPT CACHE... Prompt {PROMPT_TOKENS_TOTAL} "
+            f"Cached {CACHED_TOKENS_TOTAL} "
+            f"Hit_Rate {CACHED_TOKENS_TOTAL / PROMPT_TOKENS_TOTAL:.0%}"
+        )
+
+
 def print_token_usage_details(
     response,
     service: Service,
     model: str,
     perplexity_content_size: str = None,
     print_row: bool = True,
-) -> None:
+) -> float:
     """
     Logs token usage details and pricing information.
 
+    Responses replayed from the response cache were not billed, their price
+    is counted as saved by the cache instead of added to the grand total.
+
     Args:
         response: The LLM response object.
         service (Service): The service used.
         model (str): The model identifier.
         perplexity_content_size (str, optional): Perplexity content size.
         print_row (bool, optional): If True, prints a summary row.
+
+    Returns:
+        float: The cost of this call in dollars, 0 if usage is missing or
+        the response was replayed.
     """
     usage = getattr(response, "usage", None)
     input_price, output_price, additional = get_model_pricing(
@@ -208,8 +469,11 @@ def print_token_usage_details(
     if usage:
         prompt_tokens = getattr(usage, "prompt_tokens", "N/A")
         completion_tokens = getattr(usage, "completion_tokens", "N/A")
+        cached_tokens = get_cached_tokens(usage)
         input_cost = (
-            (prompt_tokens / 1000000) * input_price
+            ((prompt_tokens - cached_tokens) / 1000000) * input_price
+            + (cached_tokens / 1000000)
+            * get_cached_input_price(service, model, input_price)
             if isinstance(prompt_tokens, (int, float))
             else 0
         )
@@ -219,14 +483,32 @@ def print_token_usage_details(
             else 0
         )
         global GRAND_TOTAL_COST  # pylint: disable=global-statement
+        global PROMPT_TOKENS_TOTAL  # pylint: disable=global-statement
+        global CACHED_TOKENS_TOTAL  # pylint: disable=global-statement
+        if is_replayed(response):
+            cache = get_response_cache()
+            if cache:
+                cache.add_cost_saved(input_cost + output_cost + additional)
+            if print_row:
+                print(
+                    f"USAGE... Replayed Prompt {prompt_tokens} Completion "
+                    f"{completion_tokens} -> $0 Grand_Total ${GRAND_TOTAL_COST:.6f}"
+                )
+            return 0.0
         GRAND_TOTAL_COST += input_cost + output_cost + additional
+        if isinstance(prompt_tokens, int):
+            PROMPT_TOKENS_TOTAL += prompt_tokens
+            CACHED_TOKENS_TOTAL += cached_tokens
         if print_row:
+            cached = f" (Cached {cached_tokens})" if cached_tokens else ""
             print(
-                f"USAGE... Prompt {prompt_tokens} -> ${input_cost:.6f} "
+                f"USAGE... Prompt {prompt_tokens}{cached} -> ${input_cost:.6f} "
                 f"Completion {completion_tokens} -> ${output_cost:.6f} "
                 f"Tools -> ${additional:.6f} "
                 f"Grand_Total ${GRAND_TOTAL_COST:.6f}"
             )
+        return input_cost + output_cost + additional
+    return 0.0
 
 
 def check_tokens_exceeded(
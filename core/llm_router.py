@@ -0,0 +1,343 @@
+"""llm_router.py"""
+
+import time
+import atexit
+import asyncio
+from collections import deque
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Tuple
+
+from core.client_factory import get_client, get_async_client
+from core.llm_helpers import (
+    call_llm_api_with_retry,
+    async_call_llm_api_with_retry,
+    print_token_usage_details,
+)
+from core.circuit_breaker import get_circuit_breaker
+from core.config import (
+    Service,
+    EQUIVALENT_MODELS,
+    HEDGE_LATENCY_PERCENTILE,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_DEFAULT_DELAY,
+    HEDGE_MIN_DELAY,
+    HEDGE_MAX_DELAY,
+    LATENCY_WINDOW_SIZE,
+    ROUTER_RETRY_COUNT,
+    MAX_TOOL_PARALLEL_THREADS,
+)
+
+
+class LatencyTracker:
+    """
+    Sliding window of successful call latencies per (service, model).
+    """
+
+    def __init__(self, window_size: int = LATENCY_WINDOW_SIZE):
+        self.window_size = window_size
+        self.samples = {}
+        self.lock = Lock()
+
+    def record(self, service: Service, model: str, seconds: float) -> None:
+        """
+        Records the latency of a successful call.
+
+        Args:
+            service (Service): The service identifier.
+            model (str): The model identifier.
+            seconds (float): The call latency.
+        """
+        with self.lock:
+            self.samples.setdefault(
+                (service, model), deque(maxlen=self.window_size)
+            ).append(seconds)
+
+    def percentile(self, service: Service, model: str, percentile: float) -> float:
+        """
+        Returns a latency percentile, or None without enough samples.
+
+        Args:
+            service (Service): The service identifier.
+            model (str): The model identifier.
+            percentile (float): 0 - 100.
+
+        Returns:
+            float: The latency in seconds.
+        """
+        with self.lock:
+            samples = sorted(self.samples.get((service, model), ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index]
+
+    def get_stats(self) -> dict:
+        """
+        Returns p50/p95/p99 latency per (service, model).
+
+        Returns:
+            dict: (service, model) -> {"count", "p50", "p95", "p99"}.
+        """
+        with self.lock:
+            keys = list(self.samples)
+        stats = {}
+        for service, model in keys:
+            with self.lock:
+                samples = sorted(self.samples[(service, model)])
+            stats[(service, model)] = {
+                "count": len(samples),
+                **{
+                    f"p{p}": samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+                    for p in (50, 95, 99)
+                },
+            }
+        return stats
+
+
+latency_tracker = LatencyTracker()
+
+_router_executor = None
+_router_executor_lock = Lock()
+
+
+def get_router_executor() -> ThreadPoolExecutor:
+    """
+    Returns the process-wide executor that runs hedged calls.
+
+    Returns:
+        ThreadPoolExecutor: The shared executor.
+    """
+    global _router_executor  # pylint: disable=global-statement
+    if _router_executor is None:
+        with _router_executor_lock:
+            if _router_executor is None:
+                _router_executor = ThreadPoolExecutor(
+                    max_workers=MAX_TOOL_PARALLEL_THREADS,
+                    thread_name_prefix="llm-router",
+                )
+                atexit.register(_router_executor.shutdown, cancel_futures=True)
+    return _router_executor
+
+
+def _count_hedge_loser(future) -> None:
+    """
+    Adds the cost of a call that lost the hedge race to the grand total.
+
+    A running sync call cannot be cancelled, so the provider bills it in
+    full; its usage is counted once it finishes.
+    """
+    if future.cancelled() or future.exception() is not None:
+        return
+    response, service, model = future.result()
+    cost = print_token_usage_details(response, service, model, print_row=False)
+    print(f"HEDGE LOSER... {service} {model} ${cost:.6f}")
+
+
+def get_equivalent_models(service: Service, model: str) -> list:
+    """
+    Returns the (service, model) candidates for a request, requested one first
+    unless its circuit breaker is open.
+
+    Args:
+        service (Service): The requested service.
+        model (str): The requested model.
+
+    Returns:
+        list: (service, model) tuples.
+    """
+    candidates = [(service, model)]
+    for group in EQUIVALENT_MODELS:
+        if (service, model) in group:
+            candidates.extend(c for c in group if c != (service, model))
+            break
+
+    # reroute around providers whose circuit is open, keep them as last resort
+    def is_available(candidate):
+        breaker = get_circuit_breaker(candidate[0], "chat/completions")
+        return breaker is None or breaker.is_available()
+
+    return sorted(candidates, key=lambda c: not is_available(c))
+
+
+def get_hedge_delay(service: Service, model: str) -> float:
+    """
+    Returns how long to wait on a request before sending a hedged duplicate.
+
+    Args:
+        service (Service): The service identifier.
+        model (str): The model identifier.
+
+    Returns:
+        float: Seconds.
+    """
+    delay = latency_tracker.percentile(service, model, HEDGE_LATENCY_PERCENTILE)
+    if delay is None:
+        return HEDGE_DEFAULT_DELAY
+    return min(max(delay, HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+
+def _call_candidate(service: Service, model: str, args: dict):
+    """
+    Calls one candidate and records its latency on success.
+
+    Returns:
+        Tuple: (response, service, model).
+    """
+    started = time.monotonic()
+    response = call_llm_api_with_retry(
+        get_client(service),
+        {**args, "model": model},
+        retry_count=ROUTER_RETRY_COUNT,
+        service=service,
+    )
+    latency_tracker.record(service, model, time.monotonic() - started)
+    return response, service, model
+
+
+def call_llm_routed(service: Service, model: str, args: dict) -> Tuple:
+    """
+    Calls an LLM with hedging and failover across equivalent providers.
+
+    If the request is still running after the provider's latency percentile,
+    a duplicate is sent to the next equivalent model and the first good answer
+    wins. Errors fail over to the next candidate immediately.
+
+    Args:
+        service (Service): The requested service.
+        model (str): The requested model.
+        args (dict): Arguments for the API call.
+
+    Returns:
+        Tuple: (response, service, model) of the winning call.
+    """
+    candidates = get_equivalent_models(service, model)
+    executor = get_router_executor()
+    # the first available candidate, the requested one unless its circuit is open
+    last_service, last_model = candidates[0]
+    next_index = 1
+    pending = {executor.submit(_call_candidate, last_service, last_model, args)}
+    last_submit = time.monotonic()
+    last_error = None
+    while pending:
+        timeout = None
+        if next_index < len(candidates):
+            timeout = max(
+                get_hedge_delay(last_service, last_model)
+                - (time.monotonic() - last_submit),
+                0,
+            )
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        submit_next = not done
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                last_error = e
+                submit_next = True
+                continue
+            for loser in (done | pending) - {future}:
+                loser.add_done_callback(_count_hedge_loser)
+            return result
+        if submit_next and next_index < len(candidates):
+            last_service, last_model = candidates[next_index]
+            next_index += 1
+            print(
+                f"{'FAILOVER' if done else 'HEDGING'}... {last_service} {last_model}"
+            )
+            pending.add(
+                executor.submit(_call_candidate, last_service, last_model, args)
+            )
+            last_submit = time.monotonic()
+    raise last_error
+
+
+async def _async_call_candidate(service: Service, model: str, args: dict):
+    """
+    Awaits one candidate and records its latency on success.
+
+    Returns:
+        Tuple: (response, service, model).
+    """
+    started = time.monotonic()
+    response = await async_call_llm_api_with_retry(
+        get_async_client(service),
+        {**args, "model": model},
+        retry_count=ROUTER_RETRY_COUNT,
+        service=service,
+    )
+    latency_tracker.record(service, model, time.monotonic() - started)
+    return response, service, model
+
+
+async def async_call_llm_routed(service: Service, model: str, args: dict) -> Tuple:
+    """
+    Calls an LLM with hedging and failover across equivalent providers on the event loop.
+
+    Args:
+        service (Service): The requested service.
+        model (str): The requested model.
+        args (dict): Arguments for the API call.
+
+    Returns:
+        Tuple: (response, service, model) of the winning call.
+    """
+    candidates = get_equivalent_models(service, model)
+    last_service, last_model = candidates[0]
+    next_index = 1
+    pending = {
+        asyncio.ensure_future(_async_call_candidate(last_service, last_model, args))
+    }
+    last_submit = time.monotonic()
+    last_error = None
+    try:
+        while pending:
+            timeout = None
+            if next_index < len(candidates):
+                timeout = max(
+                    get_hedge_delay(last_service, last_model)
+                    - (time.monotonic() - last_submit),
+                    0,
+                )
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            submit_next = not done
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    last_error = e
+                    submit_next = True
+                    continue
+                # pending losers are cancelled below, finished ones were billed
+                for loser in done - {future}:
+                    _count_hedge_loser(loser)
+                return result
+            if submit_next and next_index < len(candidates):
+                last_service, last_model = candidates[next_index]
+                next_index += 1
+                print(
+                    f"{'FAILOVER' if done else 'HEDGING'}... {last_service} {last_model}"
+                )
+                pending.add(
+                    asyncio.ensure_future(
+                        _async_call_candidate(last_service, last_model, args)
+                    )
+                )
+                last_submit = time.monotonic()
+        raise last_error
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def print_latency_stats() -> None:
+    """
+    Prints tail latency per provider and model.
+    """
+    for (service, model), stats in latency_tracker.get_stats().items():
+        print(
+            f"LATENCY... {service} {model} Calls {stats['count']} "
+            f"p50 {stats['p50']:.2f}s p95 {stats['p95']:.2f}s p99 {stats['p99']:.2f}s"
+        )
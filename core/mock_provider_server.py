@@ -0,0 +1,492 @@
+"""mock_provider_server.py
+
+Local stand-in for the OpenAI-compatible chat providers, Perplexity and
+Firecrawl, for offline benchmarking. Run it and point the clients at it:
+
+    python -m core.mock_provider_server --port 9100 --latency-median 0.8
+    MOCK_PROVIDER_BASE_URL=http://localhost:9100 python main.py
+
+Scripted responses (--script) are a JSON list tried in order; the first entry
+whose conditions all hold answers the request:
+
+    [
+        {"turn": 0, "tool_calls": [{"name": "web_search",
+                                    "arguments": {"query": "..."}}]},
+        {"match": "Critical_Evaluation", "content": "{...}"},
+        {"content": "Final answer."}
+    ]
+
+"match" is a substring of the request messages, "turn" the number of assistant
+messages already in the request and "model" the requested model. "tool_calls"
+are returned as native tool calls when the request has tools, and as JSON
+blocks in the content otherwise, the way the reasoning models write them.
+"""
+
+import re
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+from threading import Lock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONTENT = (
+    "This is a mock answer from the local provider server. "
+    "It stands in for a real model response during offline benchmarks."
+)
+DEFAULT_CITATIONS = [
+    "https://example.com/mock-source-1",
+    "https://example.org/mock-source-2",
+    "https://example.net/mock-source-3",
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used for the mock usage block."""
+    return len(text) // 4 + 1
+
+
+class MockProviderSettings:
+    """Latency, failure injection and scripted responses for the mock server."""
+
+    def __init__(
+        self,
+        latency_median: float = 0.5,
+        latency_sigma: float = 0.5,
+        latency_max: float = 30.0,
+        chunk_delay: float = 0.02,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        page_bytes: int = 20000,
+        script: list = None,
+        seed: int = None,
+    ):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.latency_max = latency_max
+        self.chunk_delay = chunk_delay
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.page_bytes = page_bytes
+        self.script = script or []
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self.stats = {}
+
+    def sample_latency(self) -> float:
+        """
+        Draws a response latency from a lognormal distribution.
+
+        Returns:
+            float: Seconds to wait before answering.
+        """
+        if self.latency_median <= 0:
+            return 0.0
+        with self._lock:
+            latency = self._random.lognormvariate(
+                math.log(self.latency_median), self.latency_sigma
+            )
+        return min(latency, self.latency_max)
+
+    def sample_failure(self):
+        """
+        Decides whether to inject a failure for this request.
+
+        Returns:
+            Optional[int]: 429, 500 or None.
+        """
+        with self._lock:
+            draw = self._random.random()
+        if draw < self.rate_limit_rate:
+            return 429
+        if draw < self.rate_limit_rate + self.error_rate:
+            return 500
+        return None
+
+    def count(self, route: str, outcome: str) -> None:
+        """Counts a request by route and outcome for the /stats endpoint."""
+        with self._lock:
+            route_stats = self.stats.setdefault(route, {})
+            route_stats[outcome] = route_stats.get(outcome, 0) + 1
+
+    def find_scripted_response(self, body: dict):
+        """
+        Returns the first script entry matching the request.
+
+        Args:
+            body (dict): The chat completion request.
+
+        Returns:
+            Optional[dict]: The script entry, or None.
+        """
+        messages = body.get("messages") or []
+        text = json.dumps(messages, ensure_ascii=False)
+        turn = sum(1 for message in messages if message.get("role") == "assistant")
+        for entry in self.script:
+            if "match" in entry and entry["match"] not in text:
+                continue
+            if "turn" in entry and entry["turn"] != turn:
+                continue
+            if "model" in entry and entry["model"] != body.get("model"):
+                continue
+            return entry
+        return None
+
+
+def build_chat_message(settings: MockProviderSettings, body: dict) -> dict:
+    """
+    Builds the assistant message for a chat completion request.
+
+    Args:
+        settings (MockProviderSettings): The server settings.
+        body (dict): The chat completion request.
+
+    Returns:
+        dict: The assistant message.
+    """
+    entry = settings.find_scripted_response(body) or {}
+    content = entry.get("content", DEFAULT_CONTENT if not entry else "")
+    tool_calls = entry.get("tool_calls") or []
+    message = {"role": "assistant", "content": content}
+
+    if tool_calls and body.get("tools"):
+        message["tool_calls"] = [
+            {
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {
+                    "name": call["name"],
+                    "arguments": json.dumps(call.get("arguments", {})),
+                },
+            }
+            for call in tool_calls
+        ]
+        message["content"] = content or None
+    elif tool_calls:
+        blocks = "\n\n".join(
+            f"```json\n{json.dumps(call)}\n```" for call in tool_calls
+        )
+        message["content"] = f"{content}\n\n{blocks}".strip()
+    return message
+
+
+def build_usage(body: dict, message: dict) -> dict:
+    """
+    Builds an OpenAI usage block from the request and response sizes.
+
+    Args:
+        body (dict): The chat completion request.
+        message (dict): The assistant message.
+
+    Returns:
+        dict: The usage block.
+    """
+    prompt_tokens = estimate_tokens(json.dumps(body.get("messages") or []))
+    completion_tokens = estimate_tokens(
+        (message.get("content") or "") + json.dumps(message.get("tool_calls") or [])
+    )
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def build_chat_completion(settings: MockProviderSettings, body: dict) -> dict:
+    """
+    Builds a non-streaming chat completion, with citations for Perplexity models.
+
+    Args:
+        settings (MockProviderSettings): The server settings.
+        body (dict): The chat completion request.
+
+    Returns:
+        dict: The chat completion response.
+    """
+    message = build_chat_message(settings, body)
+    model = body.get("model", "mock-model")
+    response = {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+            }
+        ],
+        "usage": build_usage(body, message),
+    }
+    if model.startswith("sonar"):
+        response["citations"] = list(DEFAULT_CITATIONS)
+    return response
+
+
+def iter_chat_chunks(settings: MockProviderSettings, body: dict):
+    """
+    Yields chat completion chunks for a streaming request.
+
+    Args:
+        settings (MockProviderSettings): The server settings.
+        body (dict): The chat completion request.
+
+    Yields:
+        dict: Each chat.completion.chunk in order.
+    """
+    message = build_chat_message(settings, body)
+    chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+    base = {
+        "id": chunk_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "mock-model"),
+    }
+
+    def chunk(delta: dict, finish_reason=None) -> dict:
+        return {
+            **base,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    yield chunk({"role": "assistant", "content": ""})
+    for piece in re.findall(r"\S+\s*|\s+", message.get("content") or ""):
+        yield chunk({"content": piece})
+    for index, call in enumerate(message.get("tool_calls") or []):
+        yield chunk(
+            {
+                "tool_calls": [
+                    {
+                        "index": index,
+                        "id": call["id"],
+                        "type": "function",
+                        "function": {
+                            "name": call["function"]["name"],
+                            "arguments": call["function"]["arguments"],
+                        },
+                    }
+                ]
+            }
+        )
+    yield chunk({}, "tool_calls" if message.get("tool_calls") else "stop")
+    if (body.get("stream_options") or {}).get("include_usage"):
+        yield {**base, "choices": [], "usage": build_usage(body, message)}
+
+
+def build_scrape_response(settings: MockProviderSettings, body: dict) -> dict:
+    """
+    Builds a Firecrawl /v1/scrape response with a synthetic page.
+
+    Args:
+        settings (MockProviderSettings): The server settings.
+        body (dict): The scrape request.
+
+    Returns:
+        dict: The Firecrawl response.
+    """
+    url = body.get("url", "https://example.com/")
+    parts = [
+        "[Skip to content](#main)",
+        "* [Home](/)\n* [About](/about)\n* [Contact](/contact)",
+        f"# Mock page for {url}",
+    ]
+    paragraph = (
+        "This paragraph is synthetic page content served by the mock provider "
+        "server. It has enough words to look like a real article body."
+    )
+    size = sum(len(part) for part in parts)
+    index = 0
+    while size < settings.page_bytes:
+        index += 1
+        text = f"{paragraph} (paragraph {index})"
+        parts.append(text)
+        size += len(text) + 2
+    parts.append("© 2025 Mock Site. All rights reserved.")
+    return {
+        "success": True,
+        "data": {
+            "markdown": "\n\n".join(parts),
+            "metadata": {"title": "Mock page", "sourceURL": url, "statusCode": 200},
+        },
+    }
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    """Serves the mock provider routes."""
+
+    protocol_version = "HTTP/1.1"
+    settings = MockProviderSettings()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def _send_json(self, status: int, data: dict, headers: dict = None) -> None:
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_failure(self, status: int) -> None:
+        if status == 429:
+            retry_after = self.settings.retry_after
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                {
+                    "Retry-After": f"{retry_after:g}",
+                    "x-ratelimit-reset-requests": f"{retry_after:g}s",
+                },
+            )
+        else:
+            self._send_json(
+                status,
+                {"error": {"message": "Mock server error", "type": "server_error"}},
+            )
+
+    def _send_stream(self, body: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for chunk in iter_chat_chunks(self.settings, body):
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if self.settings.chunk_delay > 0:
+                time.sleep(self.settings.chunk_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serves /stats with request counts per route and outcome."""
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send_json(200, self.settings.stats)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Serves chat completions and Firecrawl scrapes."""
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path.endswith("/chat/completions"):
+            route = "chat"
+        elif path.endswith("/scrape"):
+            route = "scrape"
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+            return
+
+        time.sleep(self.settings.sample_latency())
+        failure = self.settings.sample_failure()
+        if failure:
+            self.settings.count(route, str(failure))
+            self._send_failure(failure)
+            return
+
+        self.settings.count(route, "200")
+        if route == "scrape":
+            self._send_json(200, build_scrape_response(self.settings, body))
+        elif body.get("stream"):
+            self._send_stream(body)
+        else:
+            self._send_json(200, build_chat_completion(self.settings, body))
+
+
+def create_server(
+    host: str = "127.0.0.1", port: int = 9100, settings: MockProviderSettings = None
+) -> ThreadingHTTPServer:
+    """
+    Creates a threaded mock provider server; call serve_forever() to run it.
+
+    Args:
+        host (str, optional): The interface to bind.
+        port (int, optional): The port to bind, 0 for any free port.
+        settings (MockProviderSettings, optional): Latency and failure settings.
+
+    Returns:
+        ThreadingHTTPServer: The server.
+    """
+    handler = type(
+        "ConfiguredMockProviderHandler",
+        (MockProviderHandler,),
+        {"settings": settings or MockProviderSettings()},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    """Runs the mock provider server from the command line."""
+    parser = argparse.ArgumentParser(description="Local mock LLM/search provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument(
+        "--latency-median", type=float, default=0.5, help="seconds, 0 to disable"
+    )
+    parser.add_argument(
+        "--latency-sigma", type=float, default=0.5, help="lognormal shape"
+    )
+    parser.add_argument("--latency-max", type=float, default=30.0)
+    parser.add_argument(
+        "--chunk-delay", type=float, default=0.02, help="seconds between chunks"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction answered with 500"
+    )
+    parser.add_argument(
+        "--rate-limit-rate", type=float, default=0.0, help="fraction answered with 429"
+    )
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument(
+        "--page-bytes", type=int, default=20000, help="size of scraped pages"
+    )
+    parser.add_argument("--script", help="JSON file of scripted responses")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    script = []
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as file:
+            script = json.load(file)
+
+    settings = MockProviderSettings(
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        latency_max=args.latency_max,
+        chunk_delay=args.chunk_delay,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        page_bytes=args.page_bytes,
+        script=script,
+        seed=args.seed,
+    )
+    server = create_server(args.host, args.port, settings)
+    print(f"Mock provider server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
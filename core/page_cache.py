@@ -0,0 +1,453 @@
+"""page_cache.py"""
+
+import time
+import zlib
+import atexit
+import hashlib
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from core.sqlite_store import SQLiteStore
+from core.http_session import get_origin_session, get_async_session
+from core.config import (
+    USE_PAGE_CACHE,
+    CASSETTE_MODE,
+    PAGE_CACHE_PATH,
+    PAGE_CACHE_MAX_AGE,
+    PAGE_CACHE_MAX_BYTES,
+    PAGE_CACHE_REVALIDATE_TIMEOUT,
+    PAGE_CACHE_VALIDATOR_WORKERS,
+)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ref_src"}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonicalizes a URL so equivalent spellings share a cache entry.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, and sorts the query string.
+
+    Args:
+        url (str): The URL.
+
+    Returns:
+        str: The canonical URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith("utm_") and name.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def get_validators(headers) -> dict:
+    """
+    Returns the HTTP cache validators from response headers.
+
+    Args:
+        headers: The response headers.
+
+    Returns:
+        dict: etag and last_modified, either may be None.
+    """
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+    }
+
+
+def get_conditional_headers(etag: str, last_modified: str) -> dict:
+    """
+    Builds If-None-Match / If-Modified-Since request headers.
+
+    Args:
+        etag (str): The stored ETag.
+        last_modified (str): The stored Last-Modified date.
+
+    Returns:
+        dict: The conditional request headers.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+class PageCache(SQLiteStore):
+    """
+    Content-addressed cache of scraped page markdown.
+
+    URLs map to bodies by content hash, so mirrors and redirects that serve
+    the same page share one zlib-compressed body.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(
+            path,
+            """
+            CREATE TABLE IF NOT EXISTS bodies (
+                content_hash TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            );
+            CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access);
+            CREATE INDEX IF NOT EXISTS pages_content_hash ON pages (content_hash);
+            """,
+        )
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evicted = 0
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """
+        Returns the cached entry for a URL, fresh or stale.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            Optional[dict]: markdown, fetched_at, etag and last_modified, or None.
+        """
+        canonical_url = canonicalize_url(url)
+        connection = self._connect()
+        row = connection.execute(
+            """
+            SELECT bodies.body, pages.fetched_at, pages.etag, pages.last_modified
+            FROM pages JOIN bodies ON bodies.content_hash = pages.content_hash
+            WHERE pages.url = ?
+            """,
+            (canonical_url,),
+        ).fetchone()
+        if row is None:
+            return None
+        connection.execute(
+            "UPDATE pages SET last_access = ? WHERE url = ?",
+            (time.time(), canonical_url),
+        )
+        return {
+            "markdown": zlib.decompress(row[0]).decode("utf-8"),
+            "fetched_at": row[1],
+            "etag": row[2],
+            "last_modified": row[3],
+        }
+
+    def is_fresh(self, entry: dict) -> bool:
+        """Returns True if an entry is younger than PAGE_CACHE_MAX_AGE."""
+        return time.time() - entry["fetched_at"] < PAGE_CACHE_MAX_AGE
+
+    def record_hit(self, url: str, revalidated: bool = False) -> None:
+        """
+        Counts a hit, marking the entry fresh again if it was revalidated.
+
+        Args:
+            url (str): The URL.
+            revalidated (bool, optional): True if the origin answered 304.
+        """
+        if revalidated:
+            self._connect().execute(
+                "UPDATE pages SET fetched_at = ? WHERE url = ?",
+                (time.time(), canonicalize_url(url)),
+            )
+            self._count("revalidated")
+        self._count("hits")
+
+    def record_miss(self) -> None:
+        """Counts a miss."""
+        self._count("misses")
+
+    def put(self, url: str, markdown: str) -> None:
+        """
+        Stores a page and evicts least recently used pages over the size cap.
+
+        The body, the page row, the cleanup of the body it replaces and the
+        eviction run in one transaction, so another writer's cleanup cannot
+        delete the body between its insert and the page row that references it.
+
+        Args:
+            url (str): The URL.
+            markdown (str): The page markdown.
+        """
+        encoded = markdown.encode("utf-8")
+        content_hash = hashlib.sha256(encoded).hexdigest()
+        body = zlib.compress(encoded, 6)
+        now = time.time()
+        url = canonicalize_url(url)
+        with self._transaction() as connection:
+            replaced = connection.execute(
+                "SELECT content_hash FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            connection.execute(
+                "INSERT OR IGNORE INTO bodies (content_hash, body, size) VALUES (?, ?, ?)",
+                (content_hash, body, len(body)),
+            )
+            connection.execute(
+                """
+                INSERT OR REPLACE INTO pages (url, content_hash, fetched_at, last_access)
+                VALUES (?, ?, ?, ?)
+                """,
+                (url, content_hash, now, now),
+            )
+            if replaced and replaced[0] != content_hash:
+                self._delete_unreferenced_body(connection, replaced[0])
+            self._evict(connection, PAGE_CACHE_MAX_BYTES)
+
+    def set_validators(self, url: str, etag: str, last_modified: str) -> None:
+        """
+        Stores the origin's ETag and Last-Modified for later revalidation.
+
+        Args:
+            url (str): The URL.
+            etag (str): The ETag header.
+            last_modified (str): The Last-Modified header.
+        """
+        self._connect().execute(
+            "UPDATE pages SET etag = ?, last_modified = ? WHERE url = ?",
+            (etag, last_modified, canonicalize_url(url)),
+        )
+
+    def _delete_unreferenced_body(self, connection, content_hash: str) -> int:
+        shared = connection.execute(
+            "SELECT 1 FROM pages WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+        if shared is not None:
+            return 0
+        size = connection.execute(
+            "SELECT size FROM bodies WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        connection.execute("DELETE FROM bodies WHERE content_hash = ?", (content_hash,))
+        return size[0] if size else 0
+
+    def get_size(self) -> int:
+        """
+        Returns the compressed size of every stored body.
+
+        Returns:
+            int: Total bytes.
+        """
+        row = self._connect().execute("SELECT SUM(size) FROM bodies").fetchone()
+        return row[0] or 0
+
+    def evict(self, max_bytes: int = PAGE_CACHE_MAX_BYTES) -> int:
+        """
+        Evicts least recently used pages until the bodies fit in max_bytes.
+
+        Args:
+            max_bytes (int, optional): The disk size cap.
+
+        Returns:
+            int: The number of pages evicted.
+        """
+        with self._transaction() as connection:
+            return self._evict(connection, max_bytes)
+
+    def _evict(self, connection, max_bytes: int) -> int:
+        row = connection.execute("SELECT SUM(size) FROM bodies").fetchone()
+        excess = (row[0] or 0) - max_bytes
+        evicted = 0
+        while excess > 0:
+            row = connection.execute(
+                "SELECT url, content_hash FROM pages ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            connection.execute("DELETE FROM pages WHERE url = ?", (row[0],))
+            excess -= self._delete_unreferenced_body(connection, row[1])
+            evicted += 1
+        if evicted:
+            with self._lock:
+                self.evicted += evicted
+        return evicted
+
+    def get_stats(self) -> dict:
+        """
+        Returns this process's cache counters.
+
+        Returns:
+            dict: hits, misses, revalidated, evicted and hit_rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "evicted": self.evicted,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def revalidate(entry: dict, url: str) -> bool:
+    """
+    Asks the origin whether a stale entry is still current.
+
+    Args:
+        entry (dict): The cached entry.
+        url (str): The URL.
+
+    Returns:
+        bool: True if the origin answered 304 Not Modified.
+    """
+    headers = get_conditional_headers(entry["etag"], entry["last_modified"])
+    if not headers:
+        return False
+    try:
+        response = get_origin_session().head(
+            url,
+            headers=headers,
+            allow_redirects=True,
+            timeout=PAGE_CACHE_REVALIDATE_TIMEOUT,
+        )
+        return response.status_code == 304
+    except Exception:  # pylint: disable=broad-exception-caught
+        return False
+
+
+async def async_revalidate(entry: dict, url: str) -> bool:
+    """
+    Asks the origin whether a stale entry is still current without blocking
+    the event loop.
+
+    Args:
+        entry (dict): The cached entry.
+        url (str): The URL.
+
+    Returns:
+        bool: True if the origin answered 304 Not Modified.
+    """
+    headers = get_conditional_headers(entry["etag"], entry["last_modified"])
+    if not headers:
+        return False
+    try:
+        response = await get_async_session().head(
+            url,
+            headers=headers,
+            follow_redirects=True,
+            timeout=PAGE_CACHE_REVALIDATE_TIMEOUT,
+        )
+        return response.status_code == 304
+    except Exception:  # pylint: disable=broad-exception-caught
+        return False
+
+
+_validator_executor = None
+_validator_executor_lock = Lock()
+
+
+def get_validator_executor() -> ThreadPoolExecutor:
+    """
+    Returns the process-wide executor that sends validator HEAD requests.
+
+    Returns:
+        ThreadPoolExecutor: The shared executor.
+    """
+    global _validator_executor  # pylint: disable=global-statement
+    if _validator_executor is None:
+        with _validator_executor_lock:
+            if _validator_executor is None:
+                _validator_executor = ThreadPoolExecutor(
+                    max_workers=PAGE_CACHE_VALIDATOR_WORKERS,
+                    thread_name_prefix="validators",
+                )
+                atexit.register(_validator_executor.shutdown, cancel_futures=True)
+    return _validator_executor
+
+
+def capture_validators(cache: PageCache, url: str) -> None:
+    """
+    Fetches the origin's validators for a freshly stored page in the background.
+
+    Firecrawl does not pass the origin's headers through, so a best-effort
+    HEAD request on the bounded validator executor collects ETag and
+    Last-Modified for later revalidation.
+
+    Args:
+        cache (PageCache): The page cache.
+        url (str): The URL.
+    """
+
+    def head():
+        try:
+            response = get_origin_session().head(
+                url, allow_redirects=True, timeout=PAGE_CACHE_REVALIDATE_TIMEOUT
+            )
+            validators = get_validators(response.headers)
+            if validators["etag"] or validators["last_modified"]:
+                cache.set_validators(url, **validators)
+        except Exception:  # pylint: disable=broad-exception-caught
+            pass
+
+    get_validator_executor().submit(head)
+
+
+_page_cache = None
+_page_cache_lock = Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """
+    Returns the shared page cache.
+
+    Returns:
+        Optional[PageCache]: The cache, or None when disabled or when a
+        cassette records or replays the run, so every scrape reaches the
+        cassette and replay sends no validator requests.
+    """
+    global _page_cache  # pylint: disable=global-statement
+    if not USE_PAGE_CACHE or CASSETTE_MODE != "off":
+        return None
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = PageCache(PAGE_CACHE_PATH)
+    return _page_cache
+
+
+def print_page_cache_stats() -> None:
+    """
+    Prints page cache hits, misses, revalidations and evictions.
+    """
+    if _page_cache is None:
+        return
+    stats = _page_cache.get_stats()
+    print(
+        f"PAGE CACHE... Hits {stats['hits']} Misses {stats['misses']} "
+        f"Hit_Rate {stats['hit_rate']:.0%} Revalidated {stats['revalidated']} "
+        f"Evicted {stats['evicted']}"
+    )
+
+
+def close_page_cache() -> None:
+    """
+    Closes the shared page cache connections.
+    """
+    if _page_cache is not None:
+        _page_cache.close()
+
+
+atexit.register(close_page_cache)
@@ -0,0 +1,288 @@
+"""passage_filter.py"""
+
+import re
+import math
+from collections import Counter, OrderedDict
+from threading import Lock
+from typing import Optional
+
+from core.query_index import get_query_words
+from core.utilities import estimate_tokens
+from core.config import (
+    USE_PASSAGE_FILTER,
+    PASSAGE_FILTER_MIN_TOKENS,
+    PASSAGE_TOKENS,
+    PASSAGE_TOP_K,
+    PASSAGE_TOKEN_BUDGET,
+    PASSAGE_STORE_SIZE,
+)
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Perplexity answers end with a numbered Citations block that must stay whole
+CITATIONS_PATTERN = re.compile(r"\n\s*Citations:\s*\n")
+
+
+def split_citations(text: str) -> tuple:
+    """
+    Splits a tool result into its body and trailing Citations block.
+
+    Args:
+        text (str): The tool result.
+
+    Returns:
+        Tuple(str, str): The body, and the Citations block or "".
+    """
+    matches = list(CITATIONS_PATTERN.finditer(text))
+    if not matches:
+        return text, ""
+    start = matches[-1].start()
+    return text[:start], text[start:]
+
+
+def split_passages(text: str, passage_tokens: int = PASSAGE_TOKENS) -> list:
+    """
+    Chunks text into passages of about passage_tokens.
+
+    Paragraphs are merged until a passage is full; paragraphs longer than a
+    passage are split on sentence boundaries.
+
+    Args:
+        text (str): The text.
+        passage_tokens (int, optional): Target tokens per passage.
+
+    Returns:
+        list: The passages, in order.
+    """
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= passage_tokens:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(
+                sentence
+                for sentence in re.split(r"(?<=[.!?])\s+", paragraph)
+                if sentence
+            )
+
+    passages = []
+    current = []
+    current_tokens = 0
+    for piece in pieces:
+        tokens = estimate_tokens(piece)
+        if current and current_tokens + tokens > passage_tokens:
+            passages.append("\n\n".join(current))
+            current = []
+            current_tokens = 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        passages.append("\n\n".join(current))
+    return passages
+
+
+class BM25Index:
+    """
+    In-memory Okapi BM25 index over the passages of one document.
+    """
+
+    def __init__(self, passages: list, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(get_query_words(passage)) for passage in passages]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if passages else 0
+        document_frequency = Counter()
+        for counts in self.term_counts:
+            document_frequency.update(counts.keys())
+        total = len(passages)
+        self.idf = {
+            term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def score(self, query_terms: Counter) -> list:
+        """
+        Scores every passage against weighted query terms.
+
+        Args:
+            query_terms (Counter): Query terms and their weights.
+
+        Returns:
+            list: One score per passage.
+        """
+        scores = []
+        for counts, length in zip(self.term_counts, self.lengths):
+            norm = self.k1 * (
+                1 - self.b + self.b * length / (self.average_length or 1)
+            )
+            score = 0.0
+            for term, weight in query_terms.items():
+                frequency = counts.get(term)
+                if frequency:
+                    score += (
+                        weight
+                        * self.idf[term]
+                        * frequency
+                        * (self.k1 + 1)
+                        / (frequency + norm)
+                    )
+            scores.append(score)
+        return scores
+
+
+class ToolResultStore:
+    """
+    Keeps the full text of filtered tool results under short reference ids.
+    """
+
+    def __init__(self, max_entries: int = PASSAGE_STORE_SIZE):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._next_id = 1
+        self._lock = Lock()
+        self.filtered = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.retrieved = 0
+
+    def put(self, text: str) -> str:
+        """
+        Stores a full tool result.
+
+        Args:
+            text (str): The full tool result.
+
+        Returns:
+            str: The reference id.
+        """
+        with self._lock:
+            ref = f"T{self._next_id}"
+            self._next_id += 1
+            self._results[ref] = text
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return ref
+
+    def get(self, ref: str) -> Optional[str]:
+        """
+        Returns a stored full tool result.
+
+        Args:
+            ref (str): The reference id.
+
+        Returns:
+            Optional[str]: The full text, or None if unknown or evicted.
+        """
+        with self._lock:
+            text = self._results.get(ref.strip())
+            if text is not None:
+                self.retrieved += 1
+            return text
+
+    def record_filter(self, tokens_before: int, tokens_after: int) -> None:
+        """Counts a filtered tool result."""
+        with self._lock:
+            self.filtered += 1
+            self.tokens_before += tokens_before
+            self.tokens_after += tokens_after
+
+
+tool_result_store = ToolResultStore()
+
+
+def filter_passages(text: str, question: str, sub_query: str = None) -> str:
+    """
+    Keeps the passages of a tool result most relevant to the question.
+
+    Passages are ranked with BM25 against the user question and the tool's
+    own query, which counts double, and the best ones are kept in their
+    original order up to PASSAGE_TOP_K passages and PASSAGE_TOKEN_BUDGET
+    tokens. The Citations block is kept whole and the full text is stored
+    for retrieve_full_tool_result.
+
+    Args:
+        text (str): The tool result.
+        question (str): The user question.
+        sub_query (str, optional): The query the tool was called with.
+
+    Returns:
+        str: The filtered tool result, or text unchanged when it is short
+        or nothing matches.
+    """
+    if not USE_PASSAGE_FILTER or not (question or sub_query):
+        return text
+    tokens_before = estimate_tokens(text)
+    if tokens_before < PASSAGE_FILTER_MIN_TOKENS:
+        return text
+
+    body, citations = split_citations(text)
+    passages = split_passages(body)
+    if len(passages) <= 1:
+        return text
+
+    query_terms = Counter(get_query_words(question or ""))
+    for term in get_query_words(sub_query or ""):
+        query_terms[term] += 2
+    scores = BM25Index(passages).score(query_terms)
+    ranked = sorted(
+        (index for index, score in enumerate(scores) if score > 0),
+        key=lambda index: scores[index],
+        reverse=True,
+    )
+    if not ranked:
+        return text
+
+    kept = []
+    budget = PASSAGE_TOKEN_BUDGET
+    for index in ranked[:PASSAGE_TOP_K]:
+        tokens = estimate_tokens(passages[index])
+        if kept and tokens > budget:
+            continue
+        kept.append(index)
+        budget -= tokens
+    kept.sort()
+
+    ref = tool_result_store.put(text)
+    filtered = "\n\n[...]\n\n".join(passages[index] for index in kept)
+    filtered += (
+        f"\n\n[Kept {len(kept)} of {len(passages)} passages relevant to the "
+        f'question. Call retrieve_full_tool_result with ref "{ref}" for the '
+        "full text.]"
+    )
+    filtered += citations
+    tool_result_store.record_filter(tokens_before, estimate_tokens(filtered))
+    return filtered
+
+
+def retrieve_full_tool_result(ref: str) -> str:
+    """
+    Returns the full text of a filtered tool result.
+
+    Args:
+        ref (str): The reference id given in the filtered result.
+
+    Returns:
+        str: The full text, or an error message for the model.
+    """
+    text = tool_result_store.get(ref or "")
+    if text is None:
+        return f"No stored tool result with ref '{ref}'."
+    return text
+
+
+def print_passage_filter_stats() -> None:
+    """
+    Prints how much tool result text passage filtering kept out of the context.
+    """
+    store = tool_result_store
+    if store.filtered:
+        print(
+            f"PASSAGE FILTER... Filtered {store.filtered} "
+            f"Tokens {store.tokens_before} -> {store.tokens_after} "
+            f"Retrieved {store.retrieved}"
+        )
@@ -1,10 +1,17 @@
 """perplexity_client.py"""
 
-import requests
-
 from openai.types.chat.chat_completion import ChatCompletion
 
+from core.http_session import get_session, get_async_session
 from core.llm_helpers import print_token_usage_details
+from core.retry_policy import DEFAULT_RETRY_POLICY, get_attempt_timeout
+from core.cassette import get_cassette
+from core.rate_limiter import get_rate_limiter, estimate_request_tokens
+from core.circuit_breaker import (
+    get_circuit_breaker,
+    call_through,
+    async_call_through,
+)
 from core.utilities import remove_think_text
 from core.config import (
     Service,
@@ -12,18 +19,26 @@ from core.config import (
     PERPLEXITY_MODELS_WITH_SEARCH_CONTENT_SIZE,
     PERPLEXITY_SEARCH_CONTENT_SIZE,
     PERPLEXITY_API_KEY,
+    PERPLEXITY_BASE_URL,
 )
 
 
 class PerplexityClient:
     """PerplexityClient"""
 
-    def call_perplexity(self, query: str, recency: str = "month") -> str:
+    url = f"{PERPLEXITY_BASE_URL}/chat/completions"
+
+    def _build_request(self, query: str, recency: str) -> tuple:
         """
-        Calls the Perplexity AI API with the given query.
-        Returns the text content from the model’s answer.
+        Builds the headers and payload for a Perplexity chat completion.
+
+        Args:
+            query (str): Question for perplexity to answer.
+            recency (str): day, month, etc...
+
+        Returns:
+            Tuple(dict, dict): headers, payload.
         """
-        url = "https://api.perplexity.ai/chat/completions"
         payload = {
             "model": DEFAULT_PERPLEXITY_MODEL,
             "messages": [
@@ -44,31 +59,137 @@ class PerplexityClient:
             "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
             "Content-Type": "application/json",
         }
+        return headers, payload
 
-        try:
-            response = requests.post(url, headers=headers, json=payload, timeout=180)
+    def _format_response(self, data: dict) -> tuple:
+        """
+        Logs usage and formats the answer text with its numbered citations.
+
+        Args:
+            data (dict): The decoded Perplexity response.
+
+        Returns:
+            Tuple(str, float): The answer followed by a Citations block, and its cost.
+        """
+        chat_response = ChatCompletion.model_validate(data)
 
+        cost = print_token_usage_details(
+            chat_response,
+            Service.PERPLEXITY,
+            DEFAULT_PERPLEXITY_MODEL,
+            PERPLEXITY_SEARCH_CONTENT_SIZE,
+        )
+        retval = data["choices"][0]["message"]["content"]
+
+        retval = remove_think_text(retval)
+
+        joined_citations = "\n".join(
+            [f"[{i+1}] {cite}" for i, cite in enumerate(data["citations"])]
+        )
+        citations = f"\n\nCitations:\n{joined_citations}"
+        retval = retval + citations
+
+        # print(f"* * *  Research Assistant Response  * * *\n\n{retval}\n\n")
+        return retval, cost
+
+    def search(self, query: str, recency: str = "month") -> tuple:
+        """
+        Calls the Perplexity AI API with the given query.
+
+        Args:
+            query (str): Question for perplexity to answer.
+            recency (str): day, month, etc...
+
+        Raises:
+            Exception: If the call fails after retries.
+
+        Returns:
+            Tuple(str, float): The answer with citations, and its cost.
+        """
+        headers, payload = self._build_request(query, recency)
+
+        limiter = get_rate_limiter(Service.PERPLEXITY, DEFAULT_PERPLEXITY_MODEL)
+        breaker = get_circuit_breaker(Service.PERPLEXITY, "chat/completions")
+
+        def post():
+            if limiter:
+                limiter.acquire(estimate_request_tokens(payload))
+            response = get_session().post(
+                self.url, headers=headers, json=payload, timeout=get_attempt_timeout(180)
+            )
             response.raise_for_status()
-            data = response.json()
-            chat_response = ChatCompletion.model_validate(data)
-
-            print_token_usage_details(
-                chat_response,
-                Service.PERPLEXITY,
-                DEFAULT_PERPLEXITY_MODEL,
-                PERPLEXITY_SEARCH_CONTENT_SIZE,
+            return response.json()
+
+        def call():
+            return DEFAULT_RETRY_POLICY.call(
+                call_through, breaker, post, label="PERPLEXITY"
+            )
+
+        cassette = get_cassette()
+        if cassette:
+            data = cassette.call("perplexity", Service.PERPLEXITY.name, payload, call)
+        else:
+            data = call()
+        return self._format_response(data)
+
+    def call_perplexity(self, query: str, recency: str = "month") -> str:
+        """
+        Calls the Perplexity AI API with the given query.
+        Returns the text content from the model’s answer.
+        """
+        try:
+            return self.search(query, recency)[0]
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            return f"Error calling Perplexity API: {str(e)}"
+
+    async def async_search(self, query: str, recency: str = "month") -> tuple:
+        """
+        Calls the Perplexity AI API with the given query without blocking the event loop.
+
+        Args:
+            query (str): Question for perplexity to answer.
+            recency (str): day, month, etc...
+
+        Raises:
+            Exception: If the call fails after retries.
+
+        Returns:
+            Tuple(str, float): The answer with citations, and its cost.
+        """
+        headers, payload = self._build_request(query, recency)
+
+        limiter = get_rate_limiter(Service.PERPLEXITY, DEFAULT_PERPLEXITY_MODEL)
+        breaker = get_circuit_breaker(Service.PERPLEXITY, "chat/completions")
+
+        async def post():
+            if limiter:
+                await limiter.async_acquire(estimate_request_tokens(payload))
+            response = await get_async_session().post(
+                self.url, headers=headers, json=payload, timeout=180
             )
-            retval = data["choices"][0]["message"]["content"]
+            response.raise_for_status()
+            return response.json()
 
-            retval = remove_think_text(retval)
+        async def call():
+            return await DEFAULT_RETRY_POLICY.async_call(
+                async_call_through, breaker, post, label="PERPLEXITY"
+            )
 
-            joined_citations = "\n".join(
-                [f"[{i+1}] {cite}" for i, cite in enumerate(data["citations"])]
+        cassette = get_cassette()
+        if cassette:
+            data = await cassette.async_call(
+                "perplexity", Service.PERPLEXITY.name, payload, call
             )
-            citations = f"\n\nCitations:\n{joined_citations}"
-            retval = retval + citations
+        else:
+            data = await call()
+        return self._format_response(data)
 
-            # print(f"* * *  Research Assistant Response  * * *\n\n{retval}\n\n")
-            return retval
+    async def async_call_perplexity(self, query: str, recency: str = "month") -> str:
+        """
+        Calls the Perplexity AI API with the given query without blocking the event loop.
+        Returns the text content from the model’s answer.
+        """
+        try:
+            return (await self.async_search(query, recency))[0]
         except Exception as e:  # pylint: disable=broad-exception-caught
             return f"Error calling Perplexity API: {str(e)}"
@@ -102,3 +102,25 @@ def get_model_pricing(
             return 0, 0, 0
     else:
         return 0, 0, 0
+
+
+def get_cached_input_price(service: Service, model_id: str, input_price: float):
+    """
+    Retrieves the price of prompt tokens served from the provider's prompt cache.
+
+    Args:
+        service (Service): The AI service.
+        model_id (str): The model identifier.
+        input_price (float): The regular input price, used when no discount is known.
+
+    Returns:
+        float: cached_input_price per million tokens.
+    """
+    cached_input_pricing = {
+        Service.OPENAI: {
+            OPENAI_O1_MINI: 0.55,
+            OPENAI_O3_MINI: 0.55,
+            OPENAI_GPT_4O: 1.25,
+        },
+    }
+    return cached_input_pricing.get(service, {}).get(model_id, input_price)
@@ -1,19 +1,130 @@
 """prompt_getter.py"""
 
 import os
+import time
 import logging
+from string import Formatter
+from threading import Lock
+
+from core.config import PROMPT_RELOAD_INTERVAL
 
-# Set up the logger for this module with lazy evaluation
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-if not logger.handlers:
-    stream_handler = logging.StreamHandler()
-    stream_handler.setLevel(logging.DEBUG)
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
+
+PROMPT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+
+
+class PromptTemplate:
+    """
+    A prompt file parsed once into literal text and named placeholders.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.mtime = os.path.getmtime(filepath)
+        try:
+            with open(filepath, "r", encoding="utf-8") as file:
+                self.content = file.read()
+        except IOError as io_err:
+            logger.error("Error reading file %s: %s", filepath, io_err)
+            raise IOError(f"Error reading file '{filepath}': {io_err}") from io_err
+        self.parts = []
+        self.placeholders = set()
+        self.is_simple = True
+        for literal, field, spec, conversion in Formatter().parse(self.content):
+            if field is not None:
+                if not field or field.isdigit():
+                    raise ValueError(
+                        f"Prompt file '{filepath}' has a positional placeholder, "
+                        "use named placeholders"
+                    )
+                if not field.isidentifier() or spec or conversion:
+                    # attribute, index or format spec, rendered by str.format
+                    self.is_simple = False
+                self.placeholders.add(field.split(".")[0].split("[")[0])
+            self.parts.append((literal, field))
+
+    def render(self, **kwargs) -> str:
+        """
+        Substitutes keyword arguments into the template.
+
+        Args:
+            **kwargs: Values for the placeholders.
+
+        Raises:
+            KeyError: If a placeholder has no value.
+
+        Returns:
+            str: The formatted prompt string.
+        """
+        missing = self.placeholders.difference(kwargs)
+        if missing:
+            logger.error("Placeholder missing for formatting: %s", sorted(missing))
+            raise KeyError(
+                f"Missing placeholder for formatting: {', '.join(sorted(missing))}"
+            )
+        if not self.is_simple:
+            return self.content.format(**kwargs)
+        return "".join(
+            literal if field is None else literal + str(kwargs[field])
+            for literal, field in self.parts
+        )
+
+
+class PromptTemplateStore:
+    """
+    Loads every prompt file once and reloads a file only when its mtime changes.
+    """
+
+    def __init__(self, directory: str, reload_interval: float):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._templates = {}
+        self._checked_at = {}
+        self._lock = Lock()
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".md"):
+                self._load(filename)
+
+    def _load(self, filename: str) -> PromptTemplate:
+        template = PromptTemplate(os.path.join(self.directory, filename))
+        with self._lock:
+            self._templates[filename] = template
+            self._checked_at[filename] = time.monotonic()
+        return template
+
+    def get(self, filename: str) -> PromptTemplate:
+        """
+        Returns the compiled template, checking its mtime at most once per
+        reload interval.
+
+        Args:
+            filename (str): The name of the markdown file in the prompt directory.
+
+        Raises:
+            FileNotFoundError: If the prompt file does not exist.
+
+        Returns:
+            PromptTemplate: The compiled template.
+        """
+        template = self._templates.get(filename)
+        if template is not None:
+            if time.monotonic() - self._checked_at[filename] < self.reload_interval:
+                return template
+            self._checked_at[filename] = time.monotonic()
+            try:
+                if os.path.getmtime(template.filepath) == template.mtime:
+                    return template
+            except OSError:
+                with self._lock:
+                    self._templates.pop(filename, None)
+                    self._checked_at.pop(filename, None)
+                template = None
+
+        filepath = os.path.join(self.directory, filename)
+        if not os.path.isfile(filepath):
+            logger.error("Prompt file not found: %s", filepath)
+            raise FileNotFoundError(f"Prompt file '{filepath}' not found.")
+        return self._load(filename)
 
 
 class PromptGetter:
@@ -21,11 +132,30 @@ class PromptGetter:
     A class to retrieve and format markdown prompt files.
     """
 
+    _store = None
+    _store_lock = Lock()
+
+    @classmethod
+    def get_store(cls) -> PromptTemplateStore:
+        """
+        Returns the shared template store, loading every prompt on first use.
+
+        Returns:
+            PromptTemplateStore: The template store.
+        """
+        if cls._store is None:
+            with cls._store_lock:
+                if cls._store is None:
+                    cls._store = PromptTemplateStore(
+                        PROMPT_DIRECTORY, PROMPT_RELOAD_INTERVAL
+                    )
+        return cls._store
+
     @staticmethod
     def get_prompt(filename: str, **kwargs) -> str:
         """
-        Read a markdown file from the prompt directory, format it with provided keyword arguments,
-        and return the formatted prompt string.
+        Format a markdown prompt file from the prompt directory with provided keyword
+        arguments, and return the formatted prompt string.
 
         Args:
             filename (str): The name of the markdown file located in the prompt_directory.
@@ -39,33 +169,4 @@ class PromptGetter:
             IOError: If there is an error reading the file.
             KeyError: If a placeholder required for formatting is missing in kwargs.
         """
-        prompt_directory = "./core/prompts"
-
-        filepath = os.path.join(prompt_directory, filename)
-        logger.debug("Attempting to read prompt file: %s", filepath)
-
-        if not os.path.isfile(filepath):
-            logger.error("Prompt file not found: %s", filepath)
-            raise FileNotFoundError(f"Prompt file '{filepath}' not found.")
-
-        try:
-            with open(filepath, "r", encoding="utf-8") as file:
-                content = file.read()
-            logger.debug("Successfully read prompt file: %s", filepath)
-        except IOError as io_err:
-            logger.error("Error reading file %s: %s", filepath, io_err)
-            raise IOError(f"Error reading file '{filepath}': {io_err}") from io_err
-
-        try:
-            formatted_prompt = content.format(**kwargs)
-            logger.debug("Successfully formatted the prompt with provided parameters.")
-        except KeyError as key_err:
-            logger.error("Placeholder missing for formatting: %s", key_err)
-            raise KeyError(
-                f"Missing placeholder for formatting: {key_err}"
-            ) from key_err
-        except Exception as fmt_err:
-            logger.error("Unexpected error during prompt formatting: %s", fmt_err)
-            raise fmt_err
-
-        return formatted_prompt
+        return PromptGetter.get_store().get(filename).render(**kwargs)
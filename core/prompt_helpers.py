@@ -3,7 +3,7 @@
 import json
 from typing import Tuple
 
-from core.llm_helpers import call_openai, call_llm
+from core.llm_helpers import call_openai, call_llm, async_call_openai, async_call_llm
 from core.utilities import remove_think_text, convert_invalid_json_to_valid, add_score
 from core.config import (
     Service,
@@ -245,13 +245,16 @@ def score_answer(question: str, messages: list) -> Tuple[bool, str]:
     return is_pass, scoring_pros_cons
 
 
-def parse_rating_response(response_data: str, threshold: float) -> bool:
+def parse_rating_response(
+    response_data: str, threshold: float, score_list: list = None
+) -> bool:
     """
     Parses the rating response from LLM and compares with threshold.
 
     Args:
         response_data (str): The response content.
         threshold (float): The rating threshold.
+        score_list (list, optional): Per-session scores, defaults to the global list.
 
     Returns:
         bool: True if rating >= threshold.
@@ -271,7 +274,7 @@ def parse_rating_response(response_data: str, threshold: float) -> bool:
             evaluation = data["Critical_Evaluation"]
             if all(key in evaluation for key in ["Pros", "Cons", "Rating"]):
                 rating = float(evaluation["Rating"])
-                add_score(rating)
+                add_score(rating, score_list)
                 return rating >= threshold
     except (json.JSONDecodeError, ValueError, TypeError) as e:
         print(f"FAILED parse_rating_response: {e}")
@@ -305,3 +308,70 @@ def get_manager_feedback(question: str, assistant_content: str) -> str:
             "***** MANAGER FEEDBACK *****",
         )
     return manager_feedback
+
+
+async def async_score_answer(
+    question: str, messages: list, score_list: list
+) -> Tuple[bool, str]:
+    """
+    Scores the answer using LLM evaluation without blocking the event loop.
+
+    Args:
+        question (str): The user question.
+        messages (list): Conversation messages.
+        score_list (list): Per-session scores the rating is appended to.
+
+    Returns:
+        Tuple(bool, str): Whether it passes the threshold and the feedback.
+    """
+    if Service.OPENAI == Service.OPENAI:
+        scoring_pros_cons = await async_call_openai(
+            get_prompt_llm_as_a_judge(question), model=OPENAI_GPT_4O, messages=messages
+        )
+    else:
+        scoring_pros_cons = await async_call_llm(
+            get_prompt_llm_as_a_judge(question),
+            LLM_USE_MODEL_SCORING,
+            USE_SERVICE_SCORING,
+            "***** SCORING *****",
+            messages,
+        )
+    is_pass = parse_rating_response(
+        scoring_pros_cons, ANSWER_QUALITY_THRESHOLD, score_list
+    )
+    print(
+        f"DID THE ANSWER PASS ANSWER_QUALITY_THRESHOLD = {ANSWER_QUALITY_THRESHOLD} {is_pass}"
+    )
+    return is_pass, scoring_pros_cons
+
+
+async def async_get_manager_feedback(
+    question: str, assistant_content: str, score_list: list
+) -> str:
+    """
+    Gets manager feedback using LLM without blocking the event loop.
+
+    Args:
+        question (str): The user's question.
+        assistant_content (str): The assistant's answer.
+        score_list (list): Per-session scores.
+
+    Returns:
+        str: Manager feedback.
+    """
+    scores_text = "Scores:" + ", ".join(map(str, score_list))
+    manager_feedback_prompt = get_prompt_manager_feedback(
+        question, scores_text, assistant_content
+    )
+    if Service.OPENAI == Service.OPENAI:
+        manager_feedback = await async_call_openai(
+            manager_feedback_prompt, OPENAI_USE_MODEL_FEEDBACK
+        )
+    else:
+        manager_feedback = await async_call_llm(
+            manager_feedback_prompt,
+            LLM_USE_MODEL_FEEDBACK,
+            Service.GROQ,
+            "***** MANAGER FEEDBACK *****",
+        )
+    return manager_feedback
@@ -0,0 +1,398 @@
+"""query_index.py"""
+
+import re
+import json
+import time
+import random
+import hashlib
+from threading import Lock
+from typing import Optional, Tuple
+
+from core.search_cache import get_search_cache, get_ttl
+from core.config import (
+    USE_QUERY_DEDUP,
+    CASSETTE_MODE,
+    QUERY_DEDUP_THRESHOLD,
+    QUERY_SHINGLE_SIZE,
+    QUERY_MINHASH_PERMUTATIONS,
+    QUERY_LSH_BANDS,
+)
+
+# Words that carry no meaning for matching research queries
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by can could do does did for from how i in is it its
+    me my of on or please should tell than that the their there these this to
+    was were what when where which who whom whose why will with would you your
+    about into over any some latest current recent
+    """.split()
+)
+
+MERSENNE_PRIME = (1 << 61) - 1
+HASH_MASK = (1 << 32) - 1
+
+
+def get_query_words(query: str) -> list:
+    """
+    Returns the meaningful words of a query, lowercased.
+
+    Args:
+        query (str): The query.
+
+    Returns:
+        list: Words without punctuation and stopwords.
+    """
+    words = re.findall(r"\w+", query.lower())
+    return [word for word in words if word not in STOPWORDS] or words
+
+
+def get_shingles(query: str, size: int = QUERY_SHINGLE_SIZE) -> set:
+    """
+    Returns the character shingles of a query's words.
+
+    Shingles are taken per word, so word order does not matter and
+    inflections ("price", "prices") still share most shingles.
+
+    Args:
+        query (str): The query.
+        size (int, optional): Characters per shingle.
+
+    Returns:
+        set: The shingles.
+    """
+    shingles = set()
+    for word in get_query_words(query):
+        padded = f" {word} "
+        if len(padded) <= size:
+            shingles.add(padded)
+            continue
+        for start in range(len(padded) - size + 1):
+            shingles.add(padded[start : start + size])
+    return shingles
+
+
+def get_key_terms(query: str) -> Tuple[set, set]:
+    """
+    Returns the terms of a query that must match exactly for a duplicate.
+
+    Shingle similarity barely moves when only a year, a quarter or a name
+    changes ("revenue 2023" / "revenue 2024", "Austria" / "Australia"), yet
+    these change what is asked.
+
+    Args:
+        query (str): The query.
+
+    Returns:
+        Tuple(set, set): Terms with digits, and capitalized words, lowercased.
+    """
+    numbers = set(re.findall(r"\w*\d\w*", query.lower()))
+    entities = {
+        word.lower()
+        for word in re.findall(r"\b[A-Z][\w&-]*", query)
+        if word.lower() not in STOPWORDS and not any(char.isdigit() for char in word)
+    }
+    return numbers, entities
+
+
+def key_terms_match(first: str, second: str) -> bool:
+    """
+    Checks that two queries ask about the same numbers and named entities.
+
+    Numbers must be identical. Each capitalized word of one query must be a
+    word of the other, so a capital at the start of a sentence does not
+    count as a difference.
+
+    Args:
+        first (str): A query.
+        second (str): Another query.
+
+    Returns:
+        bool: True if the key terms match.
+    """
+    first_numbers, first_entities = get_key_terms(first)
+    second_numbers, second_entities = get_key_terms(second)
+    if first_numbers != second_numbers:
+        return False
+    first_words = set(re.findall(r"\w+", first.lower()))
+    second_words = set(re.findall(r"\w+", second.lower()))
+    return first_entities <= second_words and second_entities <= first_words
+
+
+def jaccard(first: set, second: set) -> float:
+    """Returns the Jaccard similarity of two sets."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def strip_context(question: str) -> str:
+    """Returns a "question Context: ..." line without its context."""
+    return re.split(r"\bContext\s*:", question, maxsplit=1, flags=re.IGNORECASE)[0]
+
+
+class QueryIndex:
+    """
+    MinHash/LSH index of past queries for near-duplicate lookups.
+
+    Signatures are split into bands; queries sharing any band are candidates,
+    and candidates are confirmed by the exact Jaccard similarity of their
+    shingles and by matching key terms (numbers, named entities). Entries
+    given an expiry time are dropped once it has passed.
+    """
+
+    def __init__(
+        self,
+        threshold: float = QUERY_DEDUP_THRESHOLD,
+        permutations: int = QUERY_MINHASH_PERMUTATIONS,
+        bands: int = QUERY_LSH_BANDS,
+    ):
+        if permutations % bands:
+            raise ValueError("permutations must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = permutations // bands
+        generator = random.Random(1)
+        self._hash_params = [
+            (generator.randrange(1, MERSENNE_PRIME), generator.randrange(MERSENNE_PRIME))
+            for _ in range(permutations)
+        ]
+        self._buckets = [{} for _ in range(bands)]
+        self._entries = []
+        self._lock = Lock()
+        self.lookups = 0
+        self.matches = 0
+        self.expired = 0
+
+    def get_signature(self, shingles: set) -> tuple:
+        """
+        Computes the MinHash signature of a shingle set.
+
+        Args:
+            shingles (set): The shingles.
+
+        Returns:
+            tuple: One minimum hash per permutation.
+        """
+        hashes = [
+            int.from_bytes(
+                hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(),
+                "little",
+            )
+            for shingle in shingles
+        ] or [0]
+        return tuple(
+            min((a * value + b) % MERSENNE_PRIME for value in hashes) & HASH_MASK
+            for a, b in self._hash_params
+        )
+
+    def _band_keys(self, signature: tuple) -> list:
+        return [
+            signature[band * self.rows : (band + 1) * self.rows]
+            for band in range(self.bands)
+        ]
+
+    def add(self, query: str, payload=None, expires_at: float = None) -> None:
+        """
+        Adds a query to the index.
+
+        Args:
+            query (str): The query.
+            payload (optional): Data returned with the query on a match.
+            expires_at (float, optional): Epoch time after which the entry is dropped.
+        """
+        shingles = get_shingles(query)
+        band_keys = self._band_keys(self.get_signature(shingles))
+        with self._lock:
+            entry_id = len(self._entries)
+            self._entries.append((query, shingles, payload, expires_at, band_keys))
+            for band, key in enumerate(band_keys):
+                self._buckets[band].setdefault(key, []).append(entry_id)
+
+    def _drop(self, entry_id: int) -> None:
+        """Removes an entry from its buckets; the caller holds the lock."""
+        band_keys = self._entries[entry_id][4]
+        self._entries[entry_id] = None
+        for band, key in enumerate(band_keys):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.remove(entry_id)
+                if not bucket:
+                    del self._buckets[band][key]
+        self.expired += 1
+
+    def find(
+        self, query: str, threshold: float = None, accept=None
+    ) -> Optional[Tuple[str, object, float]]:
+        """
+        Returns the most similar indexed query at or above the threshold.
+
+        Args:
+            query (str): The query.
+            threshold (float, optional): Minimum Jaccard similarity.
+            accept (callable, optional): Filters candidate payloads.
+
+        Returns:
+            Optional[Tuple[str, object, float]]: query, payload and similarity.
+        """
+        if threshold is None:
+            threshold = self.threshold
+        shingles = get_shingles(query)
+        signature = self.get_signature(shingles)
+        now = time.time()
+        best = None
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            for entry_id in sorted(candidates):
+                indexed_query, indexed_shingles, payload, expires_at, _ = self._entries[
+                    entry_id
+                ]
+                if expires_at is not None and expires_at <= now:
+                    self._drop(entry_id)
+                    continue
+                if accept is not None and not accept(payload):
+                    continue
+                similarity = jaccard(shingles, indexed_shingles)
+                if (
+                    similarity >= threshold
+                    and (best is None or similarity > best[2])
+                    and key_terms_match(query, indexed_query)
+                ):
+                    best = (indexed_query, payload, similarity)
+            if best is not None:
+                self.matches += 1
+        return best
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries) - self.expired
+
+
+def get_tool_call_queries(tool_calls) -> list:
+    """
+    Returns the query argument of each tool call that has one.
+
+    Args:
+        tool_calls (list): Tool call dicts or SDK tool call objects.
+
+    Returns:
+        list: The query strings.
+    """
+    queries = []
+    for tc in tool_calls or []:
+        arguments = (
+            tc["function"]["arguments"] if isinstance(tc, dict) else tc.function.arguments
+        )
+        try:
+            arguments = json.loads(arguments)
+        except (TypeError, json.JSONDecodeError):
+            arguments = {}
+        query = arguments.get("query") if isinstance(arguments, dict) else None
+        if query:
+            queries.append(query)
+    return queries
+
+
+def dedupe_questions(questions: list, prior_questions: list) -> list:
+    """
+    Drops questions similar to each other or to prior questions.
+
+    Args:
+        questions (list): Proposed "question Context: ..." lines.
+        prior_questions (list): Questions already asked.
+
+    Returns:
+        list: The unique new questions, in their original order.
+    """
+    index = QueryIndex()
+    for prior in prior_questions:
+        index.add(strip_context(prior))
+    unique = []
+    for question in questions:
+        question = question.strip()
+        if not question:
+            continue
+        if index.find(strip_context(question)) is None:
+            index.add(strip_context(question))
+            unique.append(question)
+    return unique
+
+
+_search_index = None
+_search_index_lock = Lock()
+
+
+def get_search_index() -> Optional[QueryIndex]:
+    """
+    Returns the shared index of answered web_search queries.
+
+    The index is seeded from fresh search cache entries, so near-duplicates
+    of queries answered in earlier runs are found too.
+
+    Returns:
+        Optional[QueryIndex]: The index, or None when disabled or when a
+        cassette records or replays the run.
+    """
+    global _search_index  # pylint: disable=global-statement
+    if not USE_QUERY_DEDUP or CASSETTE_MODE != "off":
+        return None
+    if _search_index is None:
+        with _search_index_lock:
+            if _search_index is None:
+                index = QueryIndex()
+                cache = get_search_cache()
+                if cache:
+                    for query, recency, response, expires_at in cache.iter_fresh():
+                        index.add(query, (recency, response), expires_at)
+                _search_index = index
+    return _search_index
+
+
+def find_similar_answer(query: str, recency: str) -> Optional[str]:
+    """
+    Returns the answer to a near-duplicate query with the same recency.
+
+    Args:
+        query (str): The search query.
+        recency (str): The search_recency_filter.
+
+    Returns:
+        Optional[str]: The answer, labelled with the query it answers, or None.
+    """
+    index = get_search_index()
+    if index is None:
+        return None
+    match = index.find(query, accept=lambda payload: payload[0] == recency)
+    if match is None:
+        return None
+    matched_query, (_, response), similarity = match
+    print(f"QUERY DEDUP... '{query}' ~ '{matched_query}' ({similarity:.2f})")
+    return f"Answer to the closely related query: {matched_query}\n\n{response}"
+
+
+def add_answered_query(query: str, recency: str, response: str) -> None:
+    """
+    Indexes an answered web_search query.
+
+    Args:
+        query (str): The search query.
+        recency (str): The search_recency_filter.
+        response (str): The answer.
+    """
+    index = get_search_index()
+    if index is not None:
+        index.add(query, (recency, response), time.time() + get_ttl(recency))
+
+
+def print_query_index_stats() -> None:
+    """
+    Prints how many web_search queries were served as near-duplicates.
+    """
+    if _search_index is None:
+        return
+    print(
+        f"QUERY DEDUP... Lookups {_search_index.lookups} "
+        f"Near_Duplicates {_search_index.matches} Indexed {len(_search_index)}"
+    )
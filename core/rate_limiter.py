@@ -0,0 +1,195 @@
+"""rate_limiter.py"""
+
+import time
+import asyncio
+from threading import Lock
+
+from core.utilities import estimate_tokens
+from core.config import (
+    Service,
+    USE_RATE_LIMITER,
+    RATE_LIMITS,
+    RATE_LIMITS_BY_MODEL,
+)
+
+
+class TokenBucket:
+    """
+    A token bucket that hands out reservations instead of rejecting callers.
+
+    The level may go negative, each caller waits until its own reservation is
+    covered by refill, so concurrent callers are queued first come first served
+    and released at a smooth rate.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Takes amount from the bucket and returns how long the caller must wait.
+
+        Args:
+            amount (float): Units to take.
+            now (float): The current time.monotonic().
+
+        Returns:
+            float: Seconds to wait before the reservation is covered.
+        """
+        self.level = min(
+            self.capacity, self.level + (now - self.updated) * self.refill_per_second
+        )
+        self.updated = now
+        self.level -= amount
+        if self.level >= 0:
+            return 0.0
+        return -self.level / self.refill_per_second
+
+    def refund(self, amount: float) -> None:
+        """
+        Returns units to the bucket, e.g. when usage was lower than estimated.
+
+        Args:
+            amount (float): Units to give back, negative to take more.
+        """
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Client side requests-per-minute and tokens-per-minute budget for one
+    service and model, shared by every thread and session in the process.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.lock = Lock()
+        self.requests = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60)
+            if requests_per_minute
+            else None
+        )
+        self.tokens = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+            if tokens_per_minute
+            else None
+        )
+
+    def reserve(self, tokens: int = 0) -> float:
+        """
+        Reserves one request and the given tokens.
+
+        Args:
+            tokens (int): Estimated tokens for the request.
+
+        Returns:
+            float: Seconds to wait before sending.
+        """
+        with self.lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self.requests:
+                wait = max(wait, self.requests.reserve(1, now))
+            if self.tokens and tokens:
+                wait = max(wait, self.tokens.reserve(tokens, now))
+            return wait
+
+    def acquire(self, tokens: int = 0) -> None:
+        """
+        Blocks until one request and the given tokens fit in the budget.
+
+        Args:
+            tokens (int): Estimated tokens for the request.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            print(f"RATE LIMIT... waiting {wait:.2f} seconds")
+            time.sleep(wait)
+
+    async def async_acquire(self, tokens: int = 0) -> None:
+        """
+        Waits on the event loop until one request and the given tokens fit in the budget.
+
+        Args:
+            tokens (int): Estimated tokens for the request.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            print(f"RATE LIMIT... waiting {wait:.2f} seconds")
+            await asyncio.sleep(wait)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """
+        Corrects the token budget once the real usage is known.
+
+        Args:
+            estimated_tokens (int): Tokens reserved before the call.
+            actual_tokens (int): Tokens reported by the provider.
+        """
+        if not self.tokens or not actual_tokens:
+            return
+        with self.lock:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+
+_limiters = {}
+_limiters_lock = Lock()
+
+
+def get_rate_limiter(service: Service, model: str = None) -> RateLimiter:
+    """
+    Returns the shared rate limiter for a service and model.
+
+    Args:
+        service (Service): The service identifier.
+        model (str, optional): The model identifier.
+
+    Returns:
+        RateLimiter: The limiter, or None when no limit applies.
+    """
+    if not USE_RATE_LIMITER:
+        return None
+    key = (service, model)
+    with _limiters_lock:
+        if key not in _limiters:
+            limits = RATE_LIMITS_BY_MODEL.get(model) or RATE_LIMITS.get(service)
+            _limiters[key] = RateLimiter(**limits) if limits else None
+        return _limiters[key]
+
+
+def estimate_request_tokens(args: dict) -> int:
+    """
+    Estimates the prompt tokens of a chat completion request.
+
+    Args:
+        args (dict): Arguments for the API call.
+
+    Returns:
+        int: Estimated prompt tokens.
+    """
+    total = 0
+    for message in args.get("messages") or []:
+        content = (
+            message.get("content")
+            if isinstance(message, dict)
+            else getattr(message, "content", None)
+        )
+        total += estimate_tokens(str(content or ""))
+    return total
+
+
+def get_usage_tokens(response) -> int:
+    """
+    Returns total tokens reported by a chat completion response.
+
+    Args:
+        response: The LLM response object.
+
+    Returns:
+        int: Total tokens, or 0 if not reported.
+    """
+    usage = getattr(response, "usage", None)
+    total_tokens = getattr(usage, "total_tokens", None)
+    return total_tokens if isinstance(total_tokens, int) else 0
@@ -2,12 +2,13 @@
 
 from typing import Tuple
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 
-from core.tools_util import parse_tool_calls_from_text
+from core.tools_util import parse_tool_calls_from_text, in_result_order
 from core.web_services import web_search
 from core.llm_helpers import call_openai, call_llm
 from core.utilities import remove_think_text, parse_reasoning_from_text
+from core.query_index import dedupe_questions, get_tool_call_queries
 from core.config import (
     Service,
     DEEPSEEK_R1,
@@ -24,6 +25,7 @@ from core.config import (
     OPENAI_USE_MODEL_EXPANDED_REASONING,
     USE_SERVICE_EXPANDED_REASONING,
     LLM_USE_MODEL_EXPANDED_REASONING,
+    USE_QUERY_DEDUP,
     research_questions,
 )
 
@@ -173,6 +175,35 @@ def get_reasoning_tools_and_messages(
     return tool_calls, messages, assistant_content, reasoning_content
 
 
+def dedupe_questions_with_llm(llm_question_response: str, tool_calls) -> str:
+    """
+    Asks the LLM to drop proposed questions similar to earlier ones.
+
+    Args:
+        llm_question_response (str): Proposed questions, one per line.
+        tool_calls (list): The tool calls of the current turn.
+
+    Returns:
+        str: The remaining questions, one per line.
+    """
+    prompt = f"""
+    In a moment but not now, pre-read the proposed_questions, tool_calls, and prior_questions below, then consolidate the questions which are similar in proposed_questions. Eliminate any question from proposed_questions which is similar to a question in tool_calls or prior_questions. For each question identified, respond on a single line with the question and it's context identified with Context:. Response must not include additional formatting, numbering, bullets, introduction, commentary, or conclusion. All I need is a list of questions, one per line, with the associated context on the same line.
+
+    ```proposed_questions
+    {llm_question_response}
+    ```
+
+    ```tool_calls
+    {tool_calls}
+    ```
+
+    ```prior_questions
+    {research_questions}
+    ```
+    """
+    return call_openai(prompt, OPENAI_USE_MODEL_EXPANDED_REASONING)
+
+
 def expand_reasoning(reasoning_content, tool_calls, messages):
     """expand_reasoning"""
     if reasoning_content:
@@ -208,27 +239,20 @@ def expand_reasoning(reasoning_content, tool_calls, messages):
                     "***** EXPANDED REASONING *****",
                 )
 
-            prompt = f"""
-            In a moment but not now, pre-read the proposed_questions, tool_calls, and prior_questions below, then consolidate the questions which are similar in proposed_questions. Eliminate any question from proposed_questions which is similar to a question in tool_calls or prior_questions. For each question identified, respond on a single line with the question and it's context identified with Context:. Response must not include additional formatting, numbering, bullets, introduction, commentary, or conclusion. All I need is a list of questions, one per line, with the associated context on the same line.
-
-            ```proposed_questions
-            {llm_question_response}
-            ```
-
-            ```tool_calls
-            {tool_calls}
-            ```
-
-            ```prior_questions
-            {research_questions}
-            ```
-            """
-            llm_question_response2 = call_openai(
-                prompt, OPENAI_USE_MODEL_EXPANDED_REASONING
-            )
-            questions = llm_question_response2.splitlines()
-            # eliminate empty questions
-            questions = [s for s in questions if s]
+            if USE_QUERY_DEDUP:
+                # local MinHash lookup instead of a second LLM round trip
+                questions = dedupe_questions(
+                    llm_question_response.splitlines(),
+                    get_tool_call_queries(tool_calls) + research_questions,
+                )
+                llm_question_response2 = "\n".join(questions)
+            else:
+                llm_question_response2 = dedupe_questions_with_llm(
+                    llm_question_response, tool_calls
+                )
+                questions = llm_question_response2.splitlines()
+                # eliminate empty questions
+                questions = [s for s in questions if s]
 
             research_questions.extend(s for s in questions if s)
 
@@ -262,7 +286,7 @@ def expand_reasoning(reasoning_content, tool_calls, messages):
                     executor.submit(process_question, question): question
                     for question in questions
                 }
-                for future in as_completed(future_to_question):
+                for future in in_result_order(list(future_to_question)):
                     result = future.result()
                     if result:
                         messages.append(result)
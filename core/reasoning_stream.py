@@ -0,0 +1,220 @@
+"""reasoning_stream.py"""
+
+import time
+
+from openai.types.chat.chat_completion import ChatCompletion
+
+from core.tools_util import parse_tool_calls_from_text
+from core.llm_helpers import async_call_llm_api_with_retry
+from core.response_cache import get_service_name, dump_response, load_response
+from core.cassette import get_cassette
+from core.rate_limiter import estimate_request_tokens
+from core.utilities import estimate_tokens
+from core.config import Service, THINK_START, THINK_END
+
+
+class StreamingToolCallParser:
+    """
+    Finds complete ```json tool blocks in streamed text as soon as they close.
+
+    Text inside THINK_START/THINK_END is skipped, matching what
+    get_reasoning_tools_and_messages parses once the response is complete.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.in_think = False
+
+    def feed(self, text: str) -> list:
+        """
+        Appends streamed text and returns tool calls completed by it.
+
+        Args:
+            text (str): The next content delta.
+
+        Returns:
+            list: Newly completed tool call dictionaries.
+        """
+        self.buffer += text
+        tool_calls = []
+        while True:
+            if self.in_think:
+                end = self.buffer.find(THINK_END, self.position)
+                if end < 0:
+                    self.position = max(
+                        self.position, len(self.buffer) - len(THINK_END)
+                    )
+                    break
+                self.position = end + len(THINK_END)
+                self.in_think = False
+                continue
+
+            think = self.buffer.find(THINK_START, self.position)
+            fence = self.buffer.find("```", self.position)
+            if think >= 0 and (fence < 0 or think < fence):
+                self.position = think + len(THINK_START)
+                self.in_think = True
+                continue
+            if fence < 0:
+                # keep enough tail to match a partially streamed marker
+                self.position = max(
+                    self.position, len(self.buffer) - len(THINK_START)
+                )
+                break
+            close = self.buffer.find("```", fence + 3)
+            if close < 0:
+                # wait at the opening fence until the block is complete
+                self.position = fence
+                break
+            tool_calls.extend(
+                parse_tool_calls_from_text(self.buffer[fence : close + 3])
+            )
+            self.position = close + 3
+        return tool_calls
+
+
+class ReasoningStreamAccumulator:
+    """
+    Collects the chunks of a streamed completion into a ChatCompletion.
+    """
+
+    def __init__(self, args: dict):
+        self.args = args
+        self.parser = StreamingToolCallParser()
+        self.content = []
+        self.reasoning = []
+        self.finish_reason = None
+        self.usage = None
+        self.response_id = ""
+        self.created = int(time.time())
+
+    def add(self, chunk) -> list:
+        """
+        Adds a streamed chunk.
+
+        Args:
+            chunk: The chat completion chunk.
+
+        Returns:
+            list: Tool calls completed by the chunk.
+        """
+        tool_calls = []
+        self.response_id = getattr(chunk, "id", None) or self.response_id
+        self.created = getattr(chunk, "created", None) or self.created
+        chunk_usage = getattr(chunk, "usage", None) or getattr(
+            getattr(chunk, "x_groq", None), "usage", None
+        )
+        if chunk_usage:
+            self.usage = chunk_usage
+        for choice in getattr(chunk, "choices", None) or []:
+            delta = choice.delta
+            if getattr(delta, "reasoning_content", None):
+                self.reasoning.append(delta.reasoning_content)
+            if delta.content:
+                self.content.append(delta.content)
+                tool_calls.extend(self.parser.feed(delta.content))
+            if choice.finish_reason:
+                self.finish_reason = choice.finish_reason
+        return tool_calls
+
+    def get_response(self) -> ChatCompletion:
+        """
+        Assembles the streamed chunks.
+
+        Returns:
+            ChatCompletion: The response, as call_llm_api_with_retry returns.
+        """
+        text = "".join(self.content)
+        usage = self.usage
+        if usage is not None:
+            usage = usage.model_dump() if hasattr(usage, "model_dump") else dict(usage)
+        else:
+            prompt_tokens = estimate_request_tokens(self.args)
+            completion_tokens = estimate_tokens(text)
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            }
+        message = {"role": "assistant", "content": text}
+        if self.reasoning:
+            message["reasoning_content"] = "".join(self.reasoning)
+        return ChatCompletion.model_validate(
+            {
+                "id": self.response_id,
+                "object": "chat.completion",
+                "created": self.created,
+                "model": self.args.get("model", ""),
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": self.finish_reason or "stop",
+                        "message": message,
+                    }
+                ],
+                "usage": usage,
+            }
+        )
+
+
+def get_stream_args(args: dict, service: Service) -> dict:
+    """
+    Returns the arguments of a streamed request.
+
+    Args:
+        args (dict): Arguments for the API call.
+        service (Service): The service.
+
+    Returns:
+        dict: The arguments with streaming turned on.
+    """
+    stream_args = {**args, "stream": True}
+    if service == Service.OPENAI:
+        stream_args["stream_options"] = {"include_usage": True}
+    return stream_args
+
+
+async def async_stream_reasoning_response(
+    client, args: dict, service: Service, on_tool_call
+) -> ChatCompletion:
+    """
+    Streams a reasoning completion on the event loop and reports each tool call
+    as soon as it is complete.
+
+    A cassette records the assembled response. On replay it is returned
+    without streaming and on_tool_call is not called, so the tool calls are
+    started once the response is complete.
+
+    Args:
+        client: The async LLM client instance.
+        args (dict): Arguments for the API call.
+        service (Service): The service, used for rate limiting.
+        on_tool_call (callable): Called with each tool call dictionary.
+
+    Returns:
+        ChatCompletion: The assembled response, as async_call_llm_api_with_retry returns.
+    """
+    stream_args = get_stream_args(args, service)
+
+    async def call():
+        accumulator = ReasoningStreamAccumulator(args)
+        stream = await async_call_llm_api_with_retry(
+            client, stream_args, service=service
+        )
+        async for chunk in stream:
+            for tool_call in accumulator.add(chunk):
+                on_tool_call(tool_call)
+        return accumulator.get_response()
+
+    cassette = get_cassette()
+    if cassette:
+        return await cassette.async_call(
+            "llm",
+            get_service_name(service, client),
+            stream_args,
+            call,
+            dump=dump_response,
+            load=load_response,
+        )
+    return await call()
@@ -0,0 +1,351 @@
+"""report_writer.py"""
+
+import atexit
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from core.llm_helpers import call_llm, call_openai, async_call_llm, async_call_openai
+from core.token_counter import get_message_text
+from core.conversation import ToolResultMessage
+from core.context_compactor import condense_extractively
+from core.utilities import estimate_tokens
+from core.config import (
+    Service,
+    USE_SERVICE_SUMMARY,
+    OPENAI_USE_MODEL_SUMMARY,
+    LLM_USE_MODEL_SUMMARY,
+    USE_SERVICE_REPORT_SECTION,
+    LLM_USE_MODEL_REPORT_SECTION,
+    USE_MAP_REDUCE_REPORT,
+    REPORT_MIN_TOKENS,
+    REPORT_SECTION_TOKENS,
+    REPORT_MAX_SECTIONS,
+    REPORT_NOTES_TOKENS,
+    REPORT_MAX_WORKERS,
+)
+
+
+def _get_role(message) -> str:
+    if isinstance(message, dict):
+        return message.get("role", "")
+    return getattr(message, "role", "") or ""
+
+
+def _is_tool_result(message) -> bool:
+    """Tool results come back as tool messages, or as marked user messages in the JSON protocol."""
+    return _get_role(message) == "tool" or isinstance(message, ToolResultMessage)
+
+
+def split_block(text: str, max_tokens: int) -> list:
+    """
+    Splits a block longer than max_tokens into parts at paragraph breaks.
+
+    A paragraph longer than max_tokens is cut at line breaks, and a line
+    longer than that at max_tokens worth of characters.
+
+    Args:
+        text (str): The block text.
+        max_tokens (int): The most tokens per part.
+
+    Returns:
+        list: The parts, in order.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    max_chars = max_tokens * 4
+    pieces = []
+    for paragraph in text.split("\n\n"):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for line in paragraph.split("\n"):
+            pieces.extend(
+                line[start : start + max_chars]
+                for start in range(0, max(len(line), 1), max_chars)
+            )
+    parts = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > max_chars:
+            parts.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+def partition_transcript(messages) -> list:
+    """
+    Splits the research part of a conversation into sections.
+
+    The leading instructions and question, everything before the first
+    assistant turn, are left out. A section is closed at a tool result
+    boundary once it holds REPORT_SECTION_TOKENS, so each tool result stays
+    whole together with the turn that asked for it. A section that would
+    reach twice that size is closed at any message, and a single message
+    longer than REPORT_SECTION_TOKENS is split at paragraph breaks. When that
+    makes more than REPORT_MAX_SECTIONS sections, the section size grows
+    instead.
+
+    Args:
+        messages: The message stack.
+
+    Returns:
+        list: The text of each section, in order.
+    """
+    blocks = []
+    started = False
+    for message in messages:
+        role = _get_role(message)
+        started = started or role == "assistant"
+        text = get_message_text(message).strip()
+        if not started or not text or role == "system":
+            continue
+        blocks.append((_is_tool_result(message), f"[{role.upper()}]: {text}"))
+
+    total = sum(estimate_tokens(text) for _, text in blocks)
+    section_tokens = max(REPORT_SECTION_TOKENS, total // REPORT_MAX_SECTIONS + 1)
+    sections = []
+    current = []
+    current_tokens = 0
+    for is_tool_result, block in blocks:
+        for index, text in enumerate(split_block(block, section_tokens)):
+            tokens = estimate_tokens(text)
+            size = current_tokens + tokens
+            # a tool result opens a new section unless the current one is still small
+            is_boundary = (
+                is_tool_result and index == 0 and current_tokens >= section_tokens // 2
+            )
+            if current and (
+                size > 2 * section_tokens or (is_boundary and size > section_tokens)
+            ):
+                sections.append("\n\n".join(current))
+                current = []
+                current_tokens = 0
+            current.append(text)
+            current_tokens += tokens
+    if current:
+        if sections and current_tokens < section_tokens // 4:
+            # a short tail, e.g. the closing turn, stays with the last section
+            current.insert(0, sections.pop())
+        sections.append("\n\n".join(current))
+    return sections
+
+
+def get_section_prompt(question: str, section: str, index: int, count: int) -> str:
+    """
+    Returns the prompt asking for the notes of one section.
+
+    Args:
+        question (str): The user's question.
+        section (str): The section text.
+        index (int): The position of the section, from 1.
+        count (int): The number of sections.
+
+    Returns:
+        str: The prompt.
+    """
+    return f"""
+    You are drafting notes for part {index} of {count} of a research conversation. A final investigative report answering the user's question will be written from the notes of every part.
+    Write at most {REPORT_NOTES_TOKENS} tokens of notes with every finding, number, date, name, disagreement and open question in this part that bears on the question. Keep every source id such as [S3] and every URL next to the fact it supports. Respond with the notes only, no introduction or commentary.
+
+    User's Question:
+    {question}
+
+    ```conversation part {index}
+    {section}
+    ```
+    """
+
+
+def get_reduce_prompt(prompt: str, notes: list) -> str:
+    """
+    Returns the final report prompt followed by the section notes.
+
+    Args:
+        prompt (str): The final report prompt.
+        notes (list): The notes of each section, in order.
+
+    Returns:
+        str: The reduce prompt.
+    """
+    joined = "\n\n".join(
+        f"### Research notes, part {index} of {len(notes)}\n{text}"
+        for index, text in enumerate(notes, start=1)
+    )
+    return (
+        f"{prompt}\n\nThe research conversation was condensed into the notes "
+        f"below, in the order the research was done.\n\n{joined}"
+    )
+
+
+def _get_notes(section: str, notes: str) -> str:
+    """Falls back to extractive notes when the section call failed."""
+    if not notes or notes.startswith("Error calling LLM"):
+        return condense_extractively(section, REPORT_NOTES_TOKENS * 4)
+    return notes.strip()
+
+
+_report_executor = None
+_report_executor_lock = Lock()
+_stats = {"map_reduce": 0, "sections": 0}
+_stats_lock = Lock()
+
+
+def get_report_executor() -> ThreadPoolExecutor:
+    """
+    Returns the process-wide executor that drafts section notes.
+
+    Returns:
+        ThreadPoolExecutor: The shared executor.
+    """
+    global _report_executor  # pylint: disable=global-statement
+    if _report_executor is None:
+        with _report_executor_lock:
+            if _report_executor is None:
+                _report_executor = ThreadPoolExecutor(
+                    max_workers=REPORT_MAX_WORKERS,
+                    thread_name_prefix="report",
+                )
+                atexit.register(_report_executor.shutdown, cancel_futures=True)
+    return _report_executor
+
+
+def _get_sections(messages) -> list:
+    """Returns the sections to map, or [] when one summary call is enough."""
+    if not USE_MAP_REDUCE_REPORT:
+        return []
+    sections = partition_transcript(messages)
+    if len(sections) < 2:
+        return []
+    if sum(estimate_tokens(section) for section in sections) < REPORT_MIN_TOKENS:
+        return []
+    with _stats_lock:
+        _stats["map_reduce"] += 1
+        _stats["sections"] += len(sections)
+    print(f"REPORT... Drafting notes for {len(sections)} sections in parallel")
+    return sections
+
+
+def summarize(prompt: str, messages=None) -> str:
+    """
+    Calls the summary model with the prompt after messages.
+
+    Args:
+        prompt (str): The prompt.
+        messages (optional): The message stack, or None.
+
+    Returns:
+        str: The summary model's response.
+    """
+    if USE_SERVICE_SUMMARY == Service.OPENAI:
+        return call_openai(prompt, OPENAI_USE_MODEL_SUMMARY, messages)
+    return call_llm(
+        prompt, LLM_USE_MODEL_SUMMARY, USE_SERVICE_SUMMARY, None, messages
+    )
+
+
+async def async_summarize(prompt: str, messages=None) -> str:
+    """
+    Calls the summary model with the prompt after messages without blocking the event loop.
+
+    Args:
+        prompt (str): The prompt.
+        messages (optional): The message stack, or None.
+
+    Returns:
+        str: The summary model's response.
+    """
+    if USE_SERVICE_SUMMARY == Service.OPENAI:
+        return await async_call_openai(prompt, OPENAI_USE_MODEL_SUMMARY, messages)
+    return await async_call_llm(
+        prompt, LLM_USE_MODEL_SUMMARY, USE_SERVICE_SUMMARY, None, messages
+    )
+
+
+def write_final_report(prompt: str, question: str, messages) -> str:
+    """
+    Writes the final report from the research conversation.
+
+    Long conversations are split into sections whose notes are drafted in
+    parallel by the section model, then the summary model writes the report
+    from the notes, so the time taken follows the longest section rather
+    than the whole transcript. Short conversations are sent whole with the
+    prompt in a single summary call.
+
+    Args:
+        prompt (str): The final report prompt.
+        question (str): The user's question.
+        messages: The message stack.
+
+    Returns:
+        str: The final report.
+    """
+    sections = _get_sections(messages)
+    if not sections:
+        return summarize(prompt, messages)
+    executor = get_report_executor()
+    futures = [
+        executor.submit(
+            call_llm,
+            get_section_prompt(question, section, index, len(sections)),
+            LLM_USE_MODEL_REPORT_SECTION,
+            USE_SERVICE_REPORT_SECTION,
+        )
+        for index, section in enumerate(sections, start=1)
+    ]
+    notes = []
+    for section, future in zip(sections, futures):
+        try:
+            text = future.result()
+        except Exception:  # pylint: disable=broad-exception-caught
+            text = None
+        notes.append(_get_notes(section, text))
+    return summarize(get_reduce_prompt(prompt, notes))
+
+
+async def async_write_final_report(prompt: str, question: str, messages) -> str:
+    """
+    Writes the final report from the research conversation without blocking the event loop.
+
+    Args:
+        prompt (str): The final report prompt.
+        question (str): The user's question.
+        messages: The message stack.
+
+    Returns:
+        str: The final report.
+    """
+    sections = _get_sections(messages)
+    if not sections:
+        return await async_summarize(prompt, messages)
+    results = await asyncio.gather(
+        *(
+            async_call_llm(
+                get_section_prompt(question, section, index, len(sections)),
+                LLM_USE_MODEL_REPORT_SECTION,
+                USE_SERVICE_REPORT_SECTION,
+            )
+            for index, section in enumerate(sections, start=1)
+        ),
+        return_exceptions=True,
+    )
+    notes = [
+        _get_notes(section, None if isinstance(text, BaseException) else text)
+        for section, text in zip(sections, results)
+    ]
+    return await async_summarize(get_reduce_prompt(prompt, notes))
+
+
+def print_report_writer_stats() -> None:
+    """
+    Prints how many reports were written by map-reduce and from how many sections.
+    """
+    if _stats["map_reduce"]:
+        print(
+            f"REPORT... Map_Reduce {_stats['map_reduce']} "
+            f"Sections {_stats['sections']}"
+        )
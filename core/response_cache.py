@@ -0,0 +1,263 @@
+"""response_cache.py"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+from threading import Lock
+from typing import Optional
+
+from openai.types.chat.chat_completion import ChatCompletion
+
+from core.config import (
+    Service,
+    RESPONSE_CACHE_MODE,
+    RESPONSE_CACHE_DIR,
+    CASSETTE_MODE,
+)
+
+RESPONSE_CACHE_MODES = {"off", "record", "replay", "replay_only"}
+
+# The timestamp prepended to prompts changes every call, it must not change the key
+DATETIME_PATTERN = re.compile(
+    r"Current date and time:\w+, \w+ \d{2}, \d{4}, \d{2}:\d{2}:\d{2}"
+)
+
+# Arguments that change how a response is delivered, not what it says
+IGNORED_ARGS = {"stream", "stream_options", "timeout", "extra_headers"}
+
+# Set on responses served from the cache, never stored with them
+REPLAYED_ATTRIBUTE = "replayed_from_cache"
+
+
+class ResponseCacheMiss(LookupError):
+    """Raised in replay_only mode when a request was never recorded."""
+
+    # recording cannot appear by retrying
+    retryable = False
+
+
+def _to_jsonable(value):
+    """Serializes SDK message and tool call objects found in message lists."""
+    model_dump = getattr(value, "model_dump", None)
+    if callable(model_dump):
+        return model_dump(exclude_none=True)
+    return str(value)
+
+
+def dump_response(response) -> dict:
+    """
+    Serializes a chat completion response for storage.
+
+    Args:
+        response: The chat completion response.
+
+    Returns:
+        dict: The response as JSON-compatible data.
+    """
+    return response.model_dump()
+
+
+def load_response(data: dict) -> ChatCompletion:
+    """
+    Rebuilds a stored chat completion response.
+
+    Args:
+        data (dict): The stored response.
+
+    Returns:
+        ChatCompletion: The response, keeping provider-specific fields such as
+        reasoning_content.
+    """
+    return ChatCompletion.construct(**data)
+
+
+def make_response_key(service_name: str, args: dict) -> str:
+    """
+    Builds a stable hash of a chat completion request.
+
+    Args:
+        service_name (str): The service or client name.
+        args (dict): The chat completion arguments.
+
+    Returns:
+        str: The sha256 key.
+    """
+    request = {
+        name: value for name, value in args.items() if name not in IGNORED_ARGS
+    }
+    request["service"] = service_name
+    text = json.dumps(request, sort_keys=True, default=_to_jsonable, ensure_ascii=False)
+    text = DATETIME_PATTERN.sub("Current date and time:", text)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk record/replay cache of full chat completion responses.
+
+    Each response is one JSON file named by its request hash and written
+    atomically, so concurrent sessions and runs can share the directory.
+    """
+
+    def __init__(self, directory: str, mode: str):
+        if mode not in RESPONSE_CACHE_MODES:
+            raise ValueError(f"Unsupported response cache mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self.cost_saved = 0.0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, service_name: str, args: dict) -> Optional[ChatCompletion]:
+        """
+        Returns the recorded response for a request in replay modes.
+
+        Args:
+            service_name (str): The service or client name.
+            args (dict): The chat completion arguments.
+
+        Raises:
+            ResponseCacheMiss: In replay_only mode when nothing was recorded.
+
+        Returns:
+            Optional[ChatCompletion]: The recorded response, or None.
+        """
+        if self.mode not in ("replay", "replay_only"):
+            return None
+        key = make_response_key(service_name, args)
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as file:
+                record = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            if self.mode == "replay_only":
+                raise ResponseCacheMiss(
+                    f"No recorded response for {service_name} {args.get('model')}"
+                ) from None
+            return None
+        with self._lock:
+            self.hits += 1
+        response = load_response(record["response"])
+        # pydantic models refuse unknown attributes, and this one must not be dumped
+        object.__setattr__(response, REPLAYED_ATTRIBUTE, True)
+        return response
+
+    def put(self, service_name: str, args: dict, response) -> None:
+        """
+        Records a live response in record and replay modes.
+
+        Args:
+            service_name (str): The service or client name.
+            args (dict): The chat completion arguments.
+            response: The chat completion response.
+        """
+        if self.mode not in ("record", "replay"):
+            return
+        model_dump = getattr(response, "model_dump", None)
+        if not callable(model_dump):
+            return
+        key = make_response_key(service_name, args)
+        path = self._path(key)
+        record = {
+            "service": service_name,
+            "model": args.get("model"),
+            "recorded_at": time.time(),
+            "response": dump_response(response),
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix=".tmp"
+        )
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(record, file, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        with self._lock:
+            self.recorded += 1
+
+    def add_cost_saved(self, cost: float) -> None:
+        """
+        Adds the price of a replayed response to the cost saved.
+
+        Args:
+            cost (float): What the call would have cost, in dollars.
+        """
+        with self._lock:
+            self.cost_saved += cost
+
+
+def is_replayed(response) -> bool:
+    """
+    Tells whether a response was served from the response cache.
+
+    Args:
+        response: The chat completion response.
+
+    Returns:
+        bool: True if no provider was called, so nothing was billed.
+    """
+    return getattr(response, REPLAYED_ATTRIBUTE, False)
+
+
+def get_service_name(service: Service, client) -> str:
+    """
+    Returns the name a response is recorded under.
+
+    Args:
+        service (Service): The service, or None if unknown.
+        client: The LLM client instance.
+
+    Returns:
+        str: The service name, or the client class name.
+    """
+    return service.name if service else type(client).__name__
+
+
+_response_cache = None
+_response_cache_lock = Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Returns the shared response cache.
+
+    Returns:
+        Optional[ResponseCache]: The cache, or None when RESPONSE_CACHE_MODE is
+        off or when a cassette records or replays the run, so the cassette
+        keeps every call's real timing.
+    """
+    global _response_cache  # pylint: disable=global-statement
+    if RESPONSE_CACHE_MODE == "off" or CASSETTE_MODE != "off":
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(RESPONSE_CACHE_DIR, RESPONSE_CACHE_MODE)
+    return _response_cache
+
+
+def print_response_cache_stats() -> None:
+    """
+    Prints replayed and recorded LLM response counts and the cost saved.
+    """
+    if _response_cache is None:
+        return
+    print(
+        f"RESPONSE CACHE... Mode {_response_cache.mode} "
+        f"Replayed {_response_cache.hits} Misses {_response_cache.misses} "
+        f"Recorded {_response_cache.recorded} "
+        f"Saved ${_response_cache.cost_saved:.6f}"
+    )
@@ -0,0 +1,327 @@
+"""retry_policy.py"""
+
+import time
+import random
+import asyncio
+import contextvars
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from core.config import (
+    LLM_RETRY_COUNT,
+    LLM_RETRY_BASE_WAIT_TIME,
+    LLM_RETRY_WAIT_TIME,
+    LLM_RETRY_DEADLINE,
+)
+
+# HTTP status codes worth another attempt, every other 4xx fails fast
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# Exceptions raised by our own code or bad arguments, retrying cannot help
+NON_RETRYABLE_EXCEPTIONS = (ValueError, TypeError, KeyError, AttributeError)
+
+
+class RetryDeadlineExceeded(Exception):
+    """Raised when the next retry would pass the per-call deadline."""
+
+
+# time.monotonic() deadline of the innermost retried call in this thread or task
+_call_deadline = contextvars.ContextVar("call_deadline", default=None)
+
+
+def get_attempt_timeout(timeout: float) -> float:
+    """
+    Caps a request timeout to what is left of the current call's retry deadline.
+
+    Sync attempts cannot be interrupted, so HTTP and SDK requests made inside
+    RetryPolicy.call pass this as their own timeout.
+
+    Args:
+        timeout (float): The request's usual timeout, in seconds.
+
+    Returns:
+        float: The timeout to use, in seconds.
+    """
+    deadline = _call_deadline.get()
+    if deadline is None:
+        return timeout
+    return max(min(timeout, deadline - time.monotonic()), 0.1)
+
+
+def _start_deadline(seconds: float) -> tuple:
+    """Sets the deadline of a retried call, keeping an outer call's if it is sooner."""
+    deadline = time.monotonic() + seconds
+    outer = _call_deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    return deadline, _call_deadline.set(deadline)
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """
+    Extracts the HTTP status code from an SDK or HTTP library exception.
+
+    Args:
+        error (Exception): The raised exception.
+
+    Returns:
+        Optional[int]: The status code, or None for transport errors.
+    """
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code
+    response = getattr(error, "response", None)
+    status_code = getattr(response, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code
+    return None
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Classifies an exception as transient (retry) or permanent (fail fast).
+
+    Args:
+        error (Exception): The raised exception.
+
+    Returns:
+        bool: True if another attempt may succeed.
+    """
+    if getattr(error, "retryable", None) is False:
+        return False
+    status_code = get_status_code(error)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+    # JSON decoding errors subclass ValueError but usually mean a truncated body
+    if type(error).__name__ == "JSONDecodeError":
+        return True
+    if isinstance(error, NON_RETRYABLE_EXCEPTIONS):
+        return False
+    # connection resets, timeouts and other transport failures
+    return True
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """
+    Parses rate limit durations such as "20", "1.5s", "250ms" or "6m0s".
+
+    Args:
+        value (str): The header value.
+
+    Returns:
+        Optional[float]: The duration in seconds, or None if unparsable.
+    """
+    value = value.strip().lower()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    number = ""
+    i = 0
+    matched = False
+    while i < len(value):
+        char = value[i]
+        if char.isdigit() or char == ".":
+            number += char
+            i += 1
+            continue
+        if not number:
+            return None
+        if value.startswith("ms", i):
+            total += float(number) / 1000
+            i += 2
+        elif char in "hms":
+            total += float(number) * {"h": 3600, "m": 60, "s": 1}[char]
+            i += 1
+        else:
+            return None
+        number = ""
+        matched = True
+    if number:
+        return None
+    return total if matched else None
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Reads how long the server asked us to wait from the response headers.
+
+    Honors Retry-After (seconds or HTTP date), retry-after-ms and the
+    x-ratelimit-reset-* headers sent by OpenAI compatible providers.
+
+    Args:
+        error (Exception): The raised exception.
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if not provided.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        seconds = parse_duration(retry_after)
+        if seconds is not None:
+            return seconds
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+            return max(retry_at.timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            pass
+
+    if get_status_code(error) == 429:
+        resets = [
+            parse_duration(headers.get(name, ""))
+            for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        ]
+        resets = [reset for reset in resets if reset is not None]
+        if resets:
+            return max(resets)
+    return None
+
+
+class RetryPolicy:
+    """
+    Capped exponential backoff with full jitter and a total deadline per call.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = LLM_RETRY_COUNT,
+        base_delay: float = LLM_RETRY_BASE_WAIT_TIME,
+        max_delay: float = LLM_RETRY_WAIT_TIME,
+        deadline: float = LLM_RETRY_DEADLINE,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def get_delay(self, attempt: int, error: Exception) -> float:
+        """
+        Returns the wait before the next attempt.
+
+        Args:
+            attempt (int): The attempt that just failed, starting at 1.
+            error (Exception): The raised exception.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        backoff = random.uniform(
+            0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        )
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            # the server knows best, add a little jitter so threads spread out
+            return retry_after + random.uniform(0, self.base_delay)
+        return backoff
+
+    def _next_delay(self, attempt: int, error: Exception, started: float, label: str):
+        """
+        Decides whether to retry and returns the wait, or re-raises.
+
+        Args:
+            attempt (int): The attempt that just failed, starting at 1.
+            error (Exception): The raised exception.
+            started (float): time.monotonic() of the first attempt.
+            label (str): Name used in log lines.
+
+        Returns:
+            float: Seconds to wait before the next attempt.
+        """
+        if not is_retryable_error(error):
+            print(f"Error calling {label}, not retryable: {error}")
+            raise error
+        if attempt >= self.max_attempts:
+            print(f"Error calling {label}, giving up after {attempt} tries: {error}")
+            raise error
+        delay = self.get_delay(attempt, error)
+        remaining = self.deadline - (time.monotonic() - started)
+        if delay >= remaining:
+            print(f"Error calling {label}, retry deadline of {self.deadline}s reached")
+            raise RetryDeadlineExceeded(
+                f"{label} retry deadline of {self.deadline}s exceeded: {error}"
+            ) from error
+        print(f"Error calling {label}, waiting {delay:.1f} seconds: {error}")
+        return delay
+
+    def call(self, func, *args, label: str = "LLM", **kwargs):
+        """
+        Calls func with retries according to this policy.
+
+        Requests made by func should take their timeout from
+        get_attempt_timeout, so one hung attempt cannot outlive the deadline.
+
+        Args:
+            func (callable): The function to call.
+            *args: Positional arguments for func.
+            label (str): Name used in log lines.
+            **kwargs: Keyword arguments for func.
+
+        Returns:
+            Any: The return value of func.
+        """
+        started = time.monotonic()
+        _, token = _start_deadline(self.deadline)
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                if attempt > 1:
+                    print(f"{label} CALL TRY {attempt} of {self.max_attempts}")
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    time.sleep(self._next_delay(attempt, e, started, label))
+        finally:
+            _call_deadline.reset(token)
+
+    async def async_call(self, func, *args, label: str = "LLM", **kwargs):
+        """
+        Awaits func with retries according to this policy.
+
+        Each attempt is cancelled once the deadline passes.
+
+        Args:
+            func (callable): The coroutine function to call.
+            *args: Positional arguments for func.
+            label (str): Name used in log lines.
+            **kwargs: Keyword arguments for func.
+
+        Returns:
+            Any: The return value of func.
+        """
+        started = time.monotonic()
+        deadline, token = _start_deadline(self.deadline)
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                if attempt > 1:
+                    print(f"{label} CALL TRY {attempt} of {self.max_attempts}")
+                try:
+                    return await asyncio.wait_for(
+                        func(*args, **kwargs),
+                        max(deadline - time.monotonic(), 0.1),
+                    )
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    await asyncio.sleep(self._next_delay(attempt, e, started, label))
+        finally:
+            _call_deadline.reset(token)
+
+
+# Shared by the LLM helpers and the Perplexity / Firecrawl HTTP clients
+DEFAULT_RETRY_POLICY = RetryPolicy()
@@ -0,0 +1,257 @@
+"""scrape_pipeline.py"""
+
+import re
+import json
+import time
+from collections import Counter
+
+from core.utilities import estimate_tokens
+from core.config import FIRECRAWL_MAX_PAGE_TOKENS
+
+# Site chrome phrases; a line is only dropped for one when it is also nav-like
+BOILERPLATE_PATTERN = re.compile(
+    r"(skip to (main )?content|accept (all )?cookies|cookie (policy|settings|preferences)"
+    r"|we use cookies|all rights reserved|privacy policy|terms of (use|service)"
+    r"|sign in|log in|sign up|subscribe( now)?|share (this|on)|follow us"
+    r"|back to top|advertisement|toggle navigation|open menu|close menu)",
+    flags=re.IGNORECASE,
+)
+BOILERPLATE_MAX_LINE_LENGTH = 100
+BOILERPLATE_MIN_LINK_SHARE = 0.5  # share of a line's characters inside links
+
+LINK_PATTERN = re.compile(r"!?\[[^\]]*\]\([^)]*\)")
+IMAGE_LINE_PATTERN = re.compile(r"^\s*(!\[[^\]]*\]\([^)]*\)\s*)+$")
+LIST_MARKER_PATTERN = re.compile(r"^\s*([-*+]|\d+\.)\s+")
+
+
+class ResponseTooSlow(TimeoutError):
+    """Raised when a streamed download passes its total deadline."""
+
+    # a page this slow will be slow again; retrying only spends more time
+    retryable = False
+
+
+def _add_chunk(body: bytearray, chunk: bytes, max_bytes: int, deadline: float) -> bool:
+    """Appends a chunk and returns True once max_bytes is reached."""
+    if time.monotonic() > deadline:
+        raise ResponseTooSlow("Scrape exceeded its deadline while downloading")
+    body.extend(chunk)
+    return len(body) >= max_bytes
+
+
+def read_limited_body(chunks, max_bytes: int, deadline: float) -> tuple:
+    """
+    Reads streamed chunks until max_bytes or the deadline.
+
+    Args:
+        chunks (iterable): Byte chunks of the response body.
+        max_bytes (int): Maximum bytes to keep.
+        deadline (float): time.monotonic() by which reading must finish.
+
+    Raises:
+        ResponseTooSlow: If the deadline passes while reading.
+
+    Returns:
+        Tuple(bytes, bool): The body and whether it was truncated.
+    """
+    body = bytearray()
+    for chunk in chunks:
+        if _add_chunk(body, chunk, max_bytes, deadline):
+            return bytes(body[:max_bytes]), True
+    return bytes(body), False
+
+
+async def async_read_limited_body(chunks, max_bytes: int, deadline: float) -> tuple:
+    """
+    Reads async streamed chunks until max_bytes or the deadline.
+
+    Args:
+        chunks (async iterable): Byte chunks of the response body.
+        max_bytes (int): Maximum bytes to keep.
+        deadline (float): time.monotonic() by which reading must finish.
+
+    Raises:
+        ResponseTooSlow: If the deadline passes while reading.
+
+    Returns:
+        Tuple(bytes, bool): The body and whether it was truncated.
+    """
+    body = bytearray()
+    async for chunk in chunks:
+        if _add_chunk(body, chunk, max_bytes, deadline):
+            return bytes(body[:max_bytes]), True
+    return bytes(body), False
+
+
+def salvage_markdown(raw: str) -> str:
+    """
+    Recovers the markdown field from a JSON body cut off by the byte cap.
+
+    Args:
+        raw (str): The truncated JSON text.
+
+    Returns:
+        str: The decoded markdown prefix, or "" if absent.
+    """
+    match = re.search(r'"markdown"\s*:\s*"', raw)
+    if not match:
+        return ""
+    fragment = raw[match.end() :]
+    # find the closing quote of the string, skipping escaped characters
+    index = 0
+    while index < len(fragment) and fragment[index] != '"':
+        index += 2 if fragment[index] == "\\" else 1
+    candidate = fragment[: min(index, len(fragment))]
+    # a cut inside an escape sequence (e.g. "\u00") leaves at most 5 bad chars
+    for trim in range(7):
+        try:
+            return json.loads('"' + candidate[: len(candidate) - trim] + '"')
+        except json.JSONDecodeError:
+            continue
+    return ""
+
+
+def decode_scrape_body(body: bytes, truncated: bool) -> dict:
+    """
+    Decodes a Firecrawl scrape body, salvaging markdown when truncated.
+
+    Args:
+        body (bytes): The response body.
+        truncated (bool): Whether the byte cap cut the body short.
+
+    Returns:
+        dict: The Firecrawl response shape.
+    """
+    text = body.decode("utf-8", errors="ignore")
+    if not truncated:
+        return json.loads(text)
+    print(f"FIRECRAWL... response truncated at {len(body)} bytes")
+    return {"success": True, "data": {"markdown": salvage_markdown(text)}}
+
+
+def extract_markdown(data) -> str:
+    """
+    Returns only the markdown field of a Firecrawl response.
+
+    Args:
+        data (dict): The Firecrawl response.
+
+    Returns:
+        str: The page markdown.
+    """
+    if not isinstance(data, dict):
+        return str(data or "")
+    page = data.get("data") if isinstance(data.get("data"), dict) else data
+    return page.get("markdown") or ""
+
+
+def _is_link_only(line: str) -> bool:
+    """Returns True if a line holds nothing but links and punctuation."""
+    stripped = LIST_MARKER_PATTERN.sub("", line)
+    if not LINK_PATTERN.search(stripped):
+        return False
+    return not re.search(r"\w", LINK_PATTERN.sub("", stripped))
+
+
+def _link_text(match) -> str:
+    """Returns the text of a markdown link match."""
+    return re.sub(r"^!?\[([^\]]*)\].*$", r"\1", match.group(0), flags=re.DOTALL)
+
+
+def _is_nav_like(line: str, repeats: int) -> bool:
+    """
+    Returns True if a short line matching a chrome phrase is navigation, not content.
+
+    That is when the line is only the phrase ("Sign up", "Accept all
+    cookies"), is mostly links, or appears more than once on the page.
+    Sentences that merely mention a privacy policy or logging in are kept.
+    """
+    stripped = LIST_MARKER_PATTERN.sub("", line)
+    if len(stripped) > BOILERPLATE_MAX_LINE_LENGTH or not BOILERPLATE_PATTERN.search(
+        stripped
+    ):
+        return False
+    bare = re.sub(r"[^\w\s]", " ", LINK_PATTERN.sub(_link_text, stripped))
+    if BOILERPLATE_PATTERN.fullmatch(" ".join(bare.split())):
+        return True
+    link_chars = sum(len(link) for link in LINK_PATTERN.findall(stripped))
+    return repeats > 1 or link_chars >= BOILERPLATE_MIN_LINK_SHARE * len(stripped)
+
+
+def strip_boilerplate(markdown: str) -> str:
+    """
+    Removes navigation menus, image-only lines and site chrome from markdown.
+
+    Args:
+        markdown (str): The page markdown.
+
+    Returns:
+        str: The cleaned markdown.
+    """
+    lines = markdown.splitlines()
+    keep = [True] * len(lines)
+
+    # runs of three or more link-only lines are menus, breadcrumbs or footers
+    run_start = None
+    for index, line in enumerate(lines + [""]):
+        if index < len(lines) and _is_link_only(line):
+            if run_start is None:
+                run_start = index
+            continue
+        if run_start is not None and index - run_start >= 3:
+            for drop in range(run_start, index):
+                keep[drop] = False
+        run_start = None
+
+    repeats = Counter(line.strip() for line in lines)
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if IMAGE_LINE_PATTERN.match(stripped):
+            keep[index] = False
+        elif not stripped.startswith("#") and _is_nav_like(
+            stripped, repeats[stripped]
+        ):
+            keep[index] = False
+        elif _is_link_only(stripped) and len(LINK_PATTERN.findall(stripped)) >= 2:
+            keep[index] = False
+
+    cleaned = "\n".join(line for line, kept in zip(lines, keep) if kept)
+    return re.sub(r"\n{3,}", "\n\n", cleaned).strip()
+
+
+def truncate_to_token_budget(text: str, max_tokens: int) -> str:
+    """
+    Cuts text at a paragraph boundary to fit the token budget.
+
+    Args:
+        text (str): The text to cut.
+        max_tokens (int): The token budget.
+
+    Returns:
+        str: The text, with a marker if it was cut.
+    """
+    total_tokens = estimate_tokens(text)
+    if total_tokens <= max_tokens:
+        return text
+    max_chars = max_tokens * 4
+    cut = text.rfind("\n\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    kept = text[:cut].rstrip()
+    dropped_tokens = total_tokens - estimate_tokens(kept)
+    return f"{kept}\n\n[... truncated about {dropped_tokens} tokens ...]"
+
+
+def process_scraped_page(data, max_tokens: int = FIRECRAWL_MAX_PAGE_TOKENS) -> str:
+    """
+    Turns a Firecrawl response into bounded, clean markdown for the message stack.
+
+    Args:
+        data (dict): The Firecrawl response.
+        max_tokens (int, optional): Token budget for the page.
+
+    Returns:
+        str: The cleaned, budgeted markdown.
+    """
+    markdown = strip_boilerplate(extract_markdown(data))
+    return truncate_to_token_budget(markdown, max_tokens)
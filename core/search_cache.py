@@ -0,0 +1,244 @@
+"""search_cache.py"""
+
+import re
+import time
+import atexit
+import hashlib
+import unicodedata
+from threading import Lock
+from typing import Optional
+
+from core.sqlite_store import SQLiteStore
+from core.config import (
+    USE_SEARCH_CACHE,
+    CASSETTE_MODE,
+    SEARCH_CACHE_PATH,
+    SEARCH_CACHE_TTLS,
+    SEARCH_CACHE_DEFAULT_TTL,
+    DEFAULT_PERPLEXITY_MODEL,
+    PERPLEXITY_SEARCH_CONTENT_SIZE,
+)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a query so trivially reworded repeats share a cache entry.
+
+    Args:
+        query (str): The search query.
+
+    Returns:
+        str: Lowercased query with collapsed whitespace and no edge punctuation.
+    """
+    query = unicodedata.normalize("NFKC", query).lower()
+    query = re.sub(r"\s+", " ", query)
+    return query.strip(" \t\n\"'`.,;:!?")
+
+
+def get_ttl(recency: str) -> float:
+    """
+    Returns how long an answer stays fresh.
+
+    Args:
+        recency (str): The search_recency_filter.
+
+    Returns:
+        float: The TTL in seconds.
+    """
+    return SEARCH_CACHE_TTLS.get(recency, SEARCH_CACHE_DEFAULT_TTL)
+
+
+class SearchCache(SQLiteStore):
+    """SQLite-backed cache of web_search answers."""
+
+    def __init__(self, path: str):
+        super().__init__(
+            path,
+            """
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                recency TEXT NOT NULL,
+                model TEXT NOT NULL,
+                context_size TEXT NOT NULL,
+                response TEXT NOT NULL,
+                cost REAL NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            );
+            """,
+        )
+        self.hits = 0
+        self.misses = 0
+        self.cost_saved = 0.0
+
+    @staticmethod
+    def make_key(query: str, recency: str) -> str:
+        """
+        Builds the cache key for a query.
+
+        Args:
+            query (str): The search query.
+            recency (str): The search_recency_filter.
+
+        Returns:
+            str: The sha256 key.
+        """
+        parts = [
+            normalize_query(query),
+            recency,
+            DEFAULT_PERPLEXITY_MODEL,
+            PERPLEXITY_SEARCH_CONTENT_SIZE,
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, query: str, recency: str) -> Optional[str]:
+        """
+        Returns the cached answer for a query, if still fresh.
+
+        Args:
+            query (str): The search query.
+            recency (str): The search_recency_filter.
+
+        Returns:
+            Optional[str]: The cached answer, or None on a miss.
+        """
+        key = self.make_key(query, recency)
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT response, cost FROM search_cache WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        connection.execute(
+            "UPDATE search_cache SET hit_count = hit_count + 1 WHERE key = ?", (key,)
+        )
+        with self._lock:
+            self.hits += 1
+            self.cost_saved += row[1]
+        return row[0]
+
+    def put(self, query: str, recency: str, response: str, cost: float) -> None:
+        """
+        Stores an answer with a TTL that follows its recency filter.
+
+        Args:
+            query (str): The search query.
+            recency (str): The search_recency_filter.
+            response (str): The answer to cache.
+            cost (float): What the answer cost, credited on later hits.
+        """
+        now = time.time()
+        ttl = get_ttl(recency)
+        self._connect().execute(
+            """
+            INSERT OR REPLACE INTO search_cache (
+                key, query, recency, model, context_size,
+                response, cost, created_at, expires_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                self.make_key(query, recency),
+                query,
+                recency,
+                DEFAULT_PERPLEXITY_MODEL,
+                PERPLEXITY_SEARCH_CONTENT_SIZE,
+                response,
+                cost,
+                now,
+                now + ttl,
+            ),
+        )
+
+    def iter_fresh(self):
+        """
+        Yields every entry that has not expired.
+
+        Yields:
+            Tuple(str, str, str, float): query, recency, response and expires_at.
+        """
+        yield from self._connect().execute(
+            "SELECT query, recency, response, expires_at FROM search_cache "
+            "WHERE expires_at > ?",
+            (time.time(),),
+        )
+
+    def purge_expired(self) -> int:
+        """
+        Deletes expired entries.
+
+        Returns:
+            int: The number of entries deleted.
+        """
+        cursor = self._connect().execute(
+            "DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),)
+        )
+        return cursor.rowcount
+
+    def get_stats(self) -> dict:
+        """
+        Returns this process's cache counters.
+
+        Returns:
+            dict: hits, misses, hit_rate and cost_saved.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "cost_saved": self.cost_saved,
+            }
+
+
+_search_cache = None
+_search_cache_lock = Lock()
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """
+    Returns the shared search cache.
+
+    Returns:
+        Optional[SearchCache]: The cache, or None when disabled or when a
+        cassette records or replays the run, so every search reaches the
+        cassette whatever the cache holds.
+    """
+    global _search_cache  # pylint: disable=global-statement
+    if not USE_SEARCH_CACHE or CASSETTE_MODE != "off":
+        return None
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchCache(SEARCH_CACHE_PATH)
+                _search_cache.purge_expired()
+    return _search_cache
+
+
+def print_search_cache_stats() -> None:
+    """
+    Prints web_search cache hits, misses and the Perplexity cost saved.
+    """
+    if _search_cache is None:
+        return
+    stats = _search_cache.get_stats()
+    print(
+        f"SEARCH CACHE... Hits {stats['hits']} Misses {stats['misses']} "
+        f"Hit_Rate {stats['hit_rate']:.0%} Saved ${stats['cost_saved']:.6f}"
+    )
+
+
+def close_search_cache() -> None:
+    """
+    Closes the shared search cache connections.
+    """
+    if _search_cache is not None:
+        _search_cache.close()
+
+
+atexit.register(close_search_cache)
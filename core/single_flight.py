@@ -0,0 +1,71 @@
+"""single_flight.py"""
+
+import json
+import asyncio
+
+
+def make_call_key(name: str, arguments: dict) -> str:
+    """
+    Builds a key that is equal for calls with the same name and arguments.
+
+    Args:
+        name (str): The function or tool name.
+        arguments (dict): The call arguments, already canonicalized.
+
+    Returns:
+        str: The key.
+    """
+    return name + ":" + json.dumps(
+        arguments, sort_keys=True, separators=(",", ":"), default=str
+    )
+
+
+class AsyncSingleFlight:
+    """
+    Collapses identical concurrent coroutine calls on an event loop into one task.
+    """
+
+    def __init__(self):
+        # keyed by (event loop id, call key), tasks are bound to their loop
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: str, func, *args, **kwargs):
+        """
+        Awaits func once for every concurrent caller with the same key.
+
+        Args:
+            key (str): The call key.
+            func (callable): The coroutine function to run.
+            *args: Positional arguments for func.
+            **kwargs: Keyword arguments for func.
+
+        Returns:
+            Any: The result of func.
+        """
+        call_key = (id(asyncio.get_running_loop()), key)
+        task = self._calls.get(call_key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._calls[call_key] = task
+            task.add_done_callback(lambda _: self._calls.pop(call_key, None))
+            self.executed += 1
+        else:
+            self.shared += 1
+        # one caller being cancelled must not cancel the call for the others
+        return await asyncio.shield(task)
+
+
+async_tool_flight = AsyncSingleFlight()
+
+
+def print_single_flight_stats() -> None:
+    """
+    Prints how many tool calls shared an in-flight execution.
+    """
+    if async_tool_flight.executed:
+        print(
+            f"SINGLE FLIGHT... Executed {async_tool_flight.executed} "
+            f"Shared {async_tool_flight.shared}"
+        )
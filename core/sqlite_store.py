@@ -0,0 +1,63 @@
+"""sqlite_store.py"""
+
+import os
+import sqlite3
+import threading
+from threading import Lock
+from contextlib import contextmanager
+
+
+class SQLiteStore:
+    """
+    Base class for the on-disk caches.
+
+    WAL mode lets several processes read while one writes; each thread gets
+    its own connection.
+    """
+
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(schema)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Returns this thread's connection, opening it on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        """Runs the statements of the block as one write transaction on this thread's connection."""
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def close(self) -> None:
+        """
+        Closes every thread's connection.
+        """
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
@@ -0,0 +1,256 @@
+"""token_counter.py"""
+
+import json
+from threading import Lock
+
+from core.config import (
+    TOKEN_CHARS_PER_TOKEN,
+    TOKENS_PER_MESSAGE,
+    TOKEN_CALIBRATION_RATE,
+)
+
+try:
+    import tiktoken
+except ImportError:  # optional, the calibrated character estimate is used instead
+    tiktoken = None
+
+# Used for models tiktoken does not know, the calibration absorbs the difference
+DEFAULT_ENCODING = "o200k_base"
+
+
+def get_message_text(message) -> str:
+    """
+    Returns the text of a message that is sent as prompt tokens.
+
+    Args:
+        message: A message dict or SDK message object.
+
+    Returns:
+        str: The content and tool call arguments of the message.
+    """
+    if isinstance(message, dict):
+        content = message.get("content")
+        tool_calls = message.get("tool_calls")
+    else:
+        content = getattr(message, "content", None)
+        tool_calls = getattr(message, "tool_calls", None)
+    if isinstance(content, list):
+        content = " ".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in content
+        )
+    text = str(content or "")
+    for tc in tool_calls or []:
+        function = tc["function"] if isinstance(tc, dict) else tc.function
+        if isinstance(function, dict):
+            text += f" {function.get('name', '')} {function.get('arguments', '')}"
+        else:
+            text += f" {function.name} {function.arguments}"
+    return text
+
+
+class TokenEstimator:
+    """
+    Counts tokens for one model with tiktoken when it is installed and knows
+    the encoding, otherwise estimates them from the character count.
+
+    Either way the raw count is multiplied by a scale learned from the
+    prompt_tokens the provider reports, so tokenizer mismatches (Llama,
+    DeepSeek) and the fallback estimate converge to the billed count.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self.encoding = self._get_encoding(model)
+        self.scale = 1.0
+        self.calibrations = 0
+        self._lock = Lock()
+
+    @staticmethod
+    def _get_encoding(model: str):
+        if tiktoken is None:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            pass
+        try:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # the encoding file could not be loaded, e.g. offline
+            return None
+
+    @property
+    def tokenizer(self) -> str:
+        """The name of the local tokenizer, or "estimate"."""
+        return self.encoding.name if self.encoding else "estimate"
+
+    def count_raw(self, text: str) -> float:
+        """
+        Counts the tokens of a text before calibration.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            float: The uncalibrated token count.
+        """
+        if not text:
+            return 0.0
+        if self.encoding:
+            return float(len(self.encoding.encode(text, disallowed_special=())))
+        return len(text) / TOKEN_CHARS_PER_TOKEN
+
+    def calibrate(self, raw_tokens: float, reported_tokens: int) -> None:
+        """
+        Moves the scale toward the ratio of reported to counted tokens.
+
+        Args:
+            raw_tokens (float): The uncalibrated count of the request.
+            reported_tokens (int): The prompt_tokens reported by the provider.
+        """
+        if raw_tokens <= 0 or not isinstance(reported_tokens, int) or reported_tokens <= 0:
+            return
+        ratio = reported_tokens / raw_tokens
+        with self._lock:
+            if self.calibrations == 0:
+                self.scale = ratio
+            else:
+                self.scale += TOKEN_CALIBRATION_RATE * (ratio - self.scale)
+            self.calibrations += 1
+
+
+_estimators = {}
+_estimators_lock = Lock()
+_stats = {"preflight_aborts": 0}
+_stats_lock = Lock()
+
+
+def get_token_estimator(model: str) -> TokenEstimator:
+    """
+    Returns the shared estimator of a model, so calibration carries across sessions.
+
+    Args:
+        model (str): The model identifier.
+
+    Returns:
+        TokenEstimator: The estimator.
+    """
+    with _estimators_lock:
+        if model not in _estimators:
+            _estimators[model] = TokenEstimator(model)
+        return _estimators[model]
+
+
+def _get_content(message):
+    if isinstance(message, dict):
+        return message.get("content")
+    return getattr(message, "content", None)
+
+
+class MessageTokenCounter:
+    """
+    Keeps a running prompt token total for a growing message list.
+
+    Each message is counted once; its count is reused while the message keeps
+    the same content object. Totals are kept as a prefix sum, so appending
+    only counts the new messages and popping only drops the tail.
+    """
+
+    def __init__(self, model: str):
+        self.estimator = get_token_estimator(model)
+        self._messages = []
+        self._contents = []
+        self._totals = [0.0]
+        self._tools = None
+        self._tools_tokens = 0.0
+        self.last_raw = 0.0
+        self.last_tokens = 0
+
+    def _sync(self, messages: list) -> float:
+        """Updates the prefix sums to match messages and returns the raw total."""
+        common = 0
+        limit = min(len(messages), len(self._messages))
+        while common < limit:
+            message = messages[common]
+            if message is not self._messages[common] or (
+                _get_content(message) is not self._contents[common]
+            ):
+                break
+            common += 1
+        del self._messages[common:]
+        del self._contents[common:]
+        del self._totals[common + 1 :]
+        for message in messages[common:]:
+            tokens = self.estimator.count_raw(get_message_text(message))
+            self._messages.append(message)
+            self._contents.append(_get_content(message))
+            self._totals.append(self._totals[-1] + tokens + TOKENS_PER_MESSAGE)
+        return self._totals[-1]
+
+    def count(self, messages: list, tools: list = None) -> int:
+        """
+        Returns the calibrated prompt tokens of messages and tool definitions.
+
+        Args:
+            messages (list): The message stack.
+            tools (list, optional): Tool definitions sent with the request.
+
+        Returns:
+            int: The estimated prompt tokens.
+        """
+        if tools is not self._tools:
+            self._tools = tools
+            self._tools_tokens = (
+                self.estimator.count_raw(json.dumps(tools, ensure_ascii=False))
+                if tools
+                else 0.0
+            )
+        self.last_raw = self._sync(messages) + self._tools_tokens
+        self.last_tokens = int(self.last_raw * self.estimator.scale) + 1
+        return self.last_tokens
+
+    def record_usage(self, response) -> None:
+        """
+        Calibrates the estimator with the prompt_tokens of the last counted request.
+
+        Args:
+            response: The chat completion response.
+        """
+        usage = getattr(response, "usage", None)
+        self.estimator.calibrate(self.last_raw, getattr(usage, "prompt_tokens", None))
+
+    def exceeds(self, max_tokens: int) -> bool:
+        """
+        Checks the last counted request against the prompt budget before it is sent.
+
+        Args:
+            max_tokens (int): The prompt token budget.
+
+        Returns:
+            bool: True if the request would exceed the budget.
+        """
+        if self.last_tokens <= max_tokens:
+            return False
+        with _stats_lock:
+            _stats["preflight_aborts"] += 1
+        print(
+            f"TOKENS... Estimated {self.last_tokens} over budget {max_tokens} "
+            "before sending"
+        )
+        return True
+
+
+def print_token_counter_stats() -> None:
+    """
+    Prints the tokenizer, calibration scale and pre-flight aborts per model.
+    """
+    with _estimators_lock:
+        estimators = list(_estimators.values())
+    for estimator in estimators:
+        print(
+            f"TOKEN COUNTER... {estimator.model} Tokenizer {estimator.tokenizer} "
+            f"Scale {estimator.scale:.2f} Calibrations {estimator.calibrations}"
+        )
+    if _stats["preflight_aborts"]:
+        print(f"TOKEN COUNTER... Preflight_Aborts {_stats['preflight_aborts']}")
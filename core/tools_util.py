@@ -2,14 +2,22 @@
 
 import re
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+from typing import Tuple
+from concurrent.futures import as_completed
 
-from core.config import (
-    MAX_TOOL_PARALLEL_THREADS,
-    lock,
-)
-from core.web_services import web_search, call_web_content_retriever
-from core.llm_helpers import call_openai
+from core.config import USE_PREFIX_STABLE_LAYOUT, lock
+from core.web_services import async_web_search, async_call_web_content_retriever
+from core.llm_helpers import async_call_openai
+from core.search_cache import normalize_query
+from core.page_cache import canonicalize_url
+from core.single_flight import make_call_key, async_tool_flight
+from core.passage_filter import filter_passages, retrieve_full_tool_result
+from core.conversation import Conversation, ToolResultMessage
+from core.citation_registry import rewrite_citations, resolve_citation_url
+
+# Tools whose results are filtered down to the passages relevant to the question
+FILTERED_TOOLS = {"web_search", "call_web_content_retriever"}
 
 
 def parse_tool_calls_from_text(assistant_content: str):
@@ -42,63 +50,95 @@ def parse_tool_calls_from_text(assistant_content: str):
     return tool_calls
 
 
+def format_message_block(message: dict) -> str:
+    """
+    Formats one message as a block of the single user message transcript.
+
+    Args:
+        message (dict): The message dictionary.
+
+    Returns:
+        str: The formatted block.
+    """
+    role = message.get("role", "unknown")
+    content = message.get("content", "")
+    return f"\n=====\n[{role.upper()}]:\n=====\n{content}\n\n"
+
+
 def compress_messages_to_single_user_message(messages: list) -> list:
     """
     Compresses multiple messages into a single user message string.
 
+    A Conversation keeps the transcript rendered on the previous turn, so
+    only messages appended since then are formatted.
+
     Args:
-        messages (list): A list of message dictionaries.
+        messages (list): A list of message dictionaries or a Conversation.
 
     Returns:
         list: A list with a single message dict.
     """
-    formatted_output = ""
-    for message in messages:
-        role = message.get("role", "unknown")
-        content = message.get("content", "")
-        formatted_output += f"\n=====\n[{role.upper()}]:\n=====\n{content}\n\n"
+    if isinstance(messages, Conversation):
+        formatted_output = messages.render(format_message_block)
+    else:
+        formatted_output = "".join(format_message_block(message) for message in messages)
     return [{"role": "user", "content": formatted_output}]
 
 
-def process_single_tool_call(tc: dict, model_version: str) -> dict:
+def parse_tool_call(tc) -> Tuple[str, dict]:
     """
-    Processes a single tool call and dispatches to the correct function.
+    Extracts the function name and decoded arguments from a tool call.
 
     Args:
-        tc (dict): The tool call dictionary.
-        model_version (str): The model version identifier.
+        tc: The tool call dictionary or SDK tool call object.
 
     Returns:
-        dict: The resulting message from the tool call.
+        Tuple(str, dict): The function name and its arguments.
     """
     func_name = tc["function"]["name"] if isinstance(tc, dict) else tc.function.name
     arguments_json = (
         tc["function"]["arguments"] if isinstance(tc, dict) else tc.function.arguments
     )
     print(f"***** TOOL CALL ***** Tool name: {func_name} Arguments: {arguments_json}")
+    return func_name, decode_tool_arguments(arguments_json)
+
+
+def decode_tool_arguments(arguments_json) -> dict:
+    """
+    Decodes the JSON arguments of a tool call.
+
+    Args:
+        arguments_json (str): The arguments as sent by the model.
+
+    Returns:
+        dict: The arguments, or {} if they are not valid JSON.
+    """
     try:
         arguments = json.loads(arguments_json)
-    except json.JSONDecodeError:
-        arguments = {}
-    if func_name == "web_search":
-        query = arguments.get("query", "")
-        result = web_search(query)
-        result = f"Tool Response to query '{query}': {result}"
-    elif func_name == "call_web_content_retriever":
-        url = arguments.get("url", "")
-        result = call_web_content_retriever(url)
-    elif func_name == "call_research_professional":
-        subprompt = arguments.get("prompt", "")
-        result = call_openai(subprompt)
-    elif func_name == "call_openai":
-        subprompt = arguments.get("prompt", "")
-        result = call_openai(subprompt)
-    else:
-        result = f"Tool {func_name} is not implemented."
+    except (TypeError, json.JSONDecodeError):
+        return {}
+    return arguments if isinstance(arguments, dict) else {}
+
+
+def build_tool_result_message(
+    tc, func_name: str, result: str, model_version: str
+) -> dict:
+    """
+    Wraps a tool result in a message and appends it to the intermediate log.
+
+    Args:
+        tc: The tool call that produced the result.
+        func_name (str): The tool name.
+        result (str): The tool output.
+        model_version (str): The model version identifier.
+
+    Returns:
+        dict: The resulting message from the tool call.
+    """
     tool_role = (
         "tool" if model_version in [] else "user"
     )  # MODELS_WITH_TOOL_USAGE handled in llm_helpers
-    tool_result_message = {"role": tool_role, "content": result}
+    tool_result_message = ToolResultMessage(role=tool_role, content=result)
     if model_version in []:  # if needed add extra keys
         tool_result_message["tool_response"] = func_name
         if isinstance(tc, dict) and "id" in tc:
@@ -115,25 +155,232 @@ def process_single_tool_call(tc: dict, model_version: str) -> dict:
     return tool_result_message
 
 
-def process_tool_calls(messages: list, tool_calls: list, model_version: str) -> list:
+def get_tool_call_key(func_name: str, arguments: dict) -> str:
+    """
+    Returns the single-flight key of a tool call.
+
+    Queries and URLs are normalized the way the search and page caches key
+    them, so calls those caches would treat as equal share one execution.
+
+    Args:
+        func_name (str): The tool name.
+        arguments (dict): The tool arguments.
+
+    Returns:
+        str: The key.
+    """
+    canonical = {
+        name: value.strip() if isinstance(value, str) else value
+        for name, value in arguments.items()
+    }
+    if func_name == "web_search" and isinstance(canonical.get("query"), str):
+        canonical["query"] = normalize_query(canonical["query"])
+    elif func_name == "call_web_content_retriever" and canonical.get("url"):
+        canonical["url"] = canonicalize_url(
+            resolve_citation_url(str(canonical["url"]))
+        )
+    return make_call_key(func_name, canonical)
+
+
+def filter_tool_result(
+    func_name: str, arguments: dict, result: str, question: str
+) -> str:
+    """
+    Keeps the passages of a search or page result relevant to the question.
+
+    Args:
+        func_name (str): The tool name.
+        arguments (dict): The tool arguments.
+        result (str): The tool output.
+        question (str): The user question, or None.
+
+    Returns:
+        str: The filtered tool output.
+    """
+    if func_name not in FILTERED_TOOLS:
+        return result
+    return filter_passages(str(result), question, arguments.get("query"))
+
+
+async def async_run_tool(func_name: str, arguments: dict) -> str:
+    """
+    Runs a tool on the event loop and returns its output.
+
+    Args:
+        func_name (str): The tool name.
+        arguments (dict): The tool arguments.
+
+    Returns:
+        str: The tool output.
+    """
+    if func_name == "web_search":
+        query = arguments.get("query", "")
+        result = rewrite_citations(await async_web_search(query))
+        result = f"Tool Response to query '{query}': {result}"
+    elif func_name == "call_web_content_retriever":
+        url = resolve_citation_url(arguments.get("url", ""))
+        result = await async_call_web_content_retriever(url)
+    elif func_name == "call_research_professional":
+        subprompt = arguments.get("prompt", "")
+        result = await async_call_openai(subprompt)
+    elif func_name == "call_openai":
+        subprompt = arguments.get("prompt", "")
+        result = await async_call_openai(subprompt)
+    elif func_name == "retrieve_full_tool_result":
+        result = retrieve_full_tool_result(arguments.get("ref", ""))
+    else:
+        result = f"Tool {func_name} is not implemented."
+    return str(result)
+
+
+async def async_process_single_tool_call(
+    tc: dict, model_version: str, question: str = None
+) -> dict:
     """
-    Processes multiple tool calls concurrently.
+    Processes a single tool call on the event loop and dispatches to the correct function.
+
+    Identical calls in flight at the same time on this event loop, from this
+    batch or another session, share one execution.
+
+    Args:
+        tc (dict): The tool call dictionary.
+        model_version (str): The model version identifier.
+        question (str, optional): The user question, used to filter the result.
+
+    Returns:
+        dict: The resulting message from the tool call.
+    """
+    func_name, arguments = parse_tool_call(tc)
+    result = await async_tool_flight.do(
+        get_tool_call_key(func_name, arguments), async_run_tool, func_name, arguments
+    )
+    result = filter_tool_result(func_name, arguments, result, question)
+    # appends to the intermediate log file, keep it off the event loop
+    return await asyncio.to_thread(
+        build_tool_result_message, tc, func_name, result, model_version
+    )
+
+
+def async_submit_tool_call(
+    tc: dict, model_version: str, question: str = None
+) -> asyncio.Task:
+    """
+    Starts a tool call as a task on the running event loop.
+
+    Args:
+        tc (dict): The tool call dictionary.
+        model_version (str): The model version identifier.
+        question (str, optional): The user question, used to filter the result.
+
+    Returns:
+        asyncio.Task: Resolves to the resulting message from the tool call.
+    """
+    return asyncio.ensure_future(
+        async_process_single_tool_call(tc, model_version, question)
+    )
+
+
+def get_tool_call_identity(tc) -> str:
+    """
+    Returns the single-flight key of a tool call without logging it.
+
+    Args:
+        tc: The tool call dictionary or SDK tool call object.
+
+    Returns:
+        str: The key, equal for calls with the same name and canonical arguments.
+    """
+    function = tc["function"] if isinstance(tc, dict) else tc.function
+    if isinstance(function, dict):
+        func_name, arguments_json = function.get("name"), function.get("arguments")
+    else:
+        func_name, arguments_json = function.name, function.arguments
+    return get_tool_call_key(func_name, decode_tool_arguments(arguments_json))
+
+
+def claim_submitted(tool_calls: list, submitted: list) -> Tuple[list, list]:
+    """
+    Pairs the final tool calls with the calls started while streaming.
+
+    The streamed and final parses may differ in count or order, so calls are
+    matched by name and canonical arguments, not position.
+
+    Args:
+        tool_calls (list): The tool calls of the complete response.
+        submitted (list): (tool call, future) pairs started while streaming.
+
+    Returns:
+        Tuple(list, list): One future or None per tool call, and the started
+        futures no tool call claimed.
+    """
+    started = {}
+    for tc, future in submitted:
+        started.setdefault(get_tool_call_identity(tc), []).append(future)
+    claimed = []
+    for tc in tool_calls:
+        futures = started.get(get_tool_call_identity(tc))
+        claimed.append(futures.pop(0) if futures else None)
+    unclaimed = [future for futures in started.values() for future in futures]
+    return claimed, unclaimed
+
+
+def in_result_order(futures: list):
+    """
+    Returns futures in the order their results go into the message stack.
+
+    With USE_PREFIX_STABLE_LAYOUT results keep the order of the tool calls, so
+    a rerun of the same turn produces the same prompt prefix; otherwise they
+    are taken as they complete.
+
+    Args:
+        futures (list): Futures in tool call order.
+
+    Returns:
+        Iterable[Future]: The futures in result order.
+    """
+    if USE_PREFIX_STABLE_LAYOUT:
+        return futures
+    return as_completed(futures)
+
+
+async def async_process_tool_calls(
+    messages: list,
+    tool_calls: list,
+    model_version: str,
+    submitted: list = None,
+    question: str = None,
+) -> list:
+    """
+    Processes multiple tool calls concurrently on the event loop.
 
     Args:
         messages (list): List of current messages.
         tool_calls (list): List of tool call dictionaries.
         model_version (str): The model version identifier.
+        submitted (list, optional): (tool call, task) pairs already started
+            while the response was streaming.
+        question (str, optional): The user question, used to filter results.
 
     Returns:
         list: Updated list of messages with tool call responses.
     """
-    with ThreadPoolExecutor(max_workers=MAX_TOOL_PARALLEL_THREADS) as executor:
-        future_to_tool_call = {
-            executor.submit(process_single_tool_call, tc, model_version): tc
+    if submitted is not None:
+        claimed, unclaimed = claim_submitted(tool_calls, submitted)
+        for task in unclaimed:
+            task.cancel()
+        pending = [
+            task or async_submit_tool_call(tc, model_version, question)
+            for tc, task in zip(tool_calls, claimed)
+        ]
+    else:
+        pending = [
+            async_process_single_tool_call(tc, model_version, question)
             for tc in tool_calls
-        }
-        for future in as_completed(future_to_tool_call):
-            tool_result_message = future.result()
-            with lock:
-                messages.append(tool_result_message)
+        ]
+    if USE_PREFIX_STABLE_LAYOUT:
+        messages.extend(await asyncio.gather(*pending))
+        return messages
+    for future in asyncio.as_completed(pending):
+        tool_result_message = await future
+        messages.append(tool_result_message)
     return messages
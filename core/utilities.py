@@ -8,6 +8,7 @@ from typing import List, Tuple
 from core.config import (
     THINK_START,
     THINK_END,
+    USE_PREFIX_STABLE_LAYOUT,
     scores,
 )
 
@@ -74,22 +75,30 @@ def remove_think_text(input_string: str) -> str:
     return retval
 
 
-def add_score(score: float) -> None:
+def add_score(score: float, score_list: list = None) -> None:
     """
-    Appends a new score to the global scores list and prints scores.
+    Appends a new score to the scores list and prints scores.
 
     Args:
         score (float): The score to add.
+        score_list (list, optional): Per-session scores, defaults to the global list.
     """
-    scores.append(score)
-    print_scores()
+    if score_list is None:
+        score_list = scores
+    score_list.append(score)
+    print_scores(score_list)
 
 
-def print_scores() -> None:
+def print_scores(score_list: list = None) -> None:
     """
     Prints the current scores and logs them to a file.
+
+    Args:
+        score_list (list, optional): Per-session scores, defaults to the global list.
     """
-    score_text = ", ".join(map(str, scores))
+    if score_list is None:
+        score_list = scores
+    score_text = ", ".join(map(str, score_list))
     print("Scores:", score_text)
 
 
@@ -214,6 +223,19 @@ def convert_invalid_json_to_valid(input_str: str) -> str:
         return f"Error decoding JSON: {e}"
 
 
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimates the token count of a text, about 4 characters per token.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated token count.
+    """
+    return len(text) // 4 + 1 if text else 0
+
+
 def get_current_datetime() -> str:
     """
     Returns the current date and time as a formatted string.
@@ -226,6 +248,24 @@ def get_current_datetime() -> str:
     return f"Current date and time:{formatted_time}"
 
 
+def with_current_datetime(prompt: str) -> str:
+    """
+    Adds the current date and time to a prompt.
+
+    With USE_PREFIX_STABLE_LAYOUT the timestamp goes after the prompt, so the
+    prompt text stays a byte-stable prefix that providers can cache.
+
+    Args:
+        prompt (str): The prompt text.
+
+    Returns:
+        str: The prompt with the current date and time.
+    """
+    if USE_PREFIX_STABLE_LAYOUT:
+        return prompt + "\n\n" + get_current_datetime()
+    return get_current_datetime() + "\n" + prompt
+
+
 def debug_json(data, header: str = "JSON Debug Output:") -> None:
     """
     Prints formatted JSON for debugging.
@@ -1,7 +1,44 @@
 """web_services.py"""
 
+import asyncio
+import sqlite3
+
 from core.firecrawl_client import FireCrawlClient
 from core.perplexity_client import PerplexityClient
+from core.scrape_pipeline import process_scraped_page, extract_markdown
+from core.search_cache import get_search_cache
+from core.query_index import find_similar_answer, add_answered_query
+from core.page_cache import (
+    get_page_cache,
+    revalidate,
+    async_revalidate,
+    capture_validators,
+)
+
+# Stateless clients shared by every tool call; connections are pooled in
+# core.http_session
+_perplexity_client = PerplexityClient()
+_firecrawl_client = FireCrawlClient()
+
+
+def _store_page(cache, url: str, data) -> None:
+    """
+    Stores a scraped page's markdown and collects its validators in the background.
+
+    Args:
+        cache (PageCache): The page cache, or None when disabled.
+        url (str): The scraped URL.
+        data (dict): The Firecrawl response.
+    """
+    markdown = extract_markdown(data)
+    if cache and markdown:
+        try:
+            cache.put(url, markdown)
+        except sqlite3.Error as e:
+            # the page was scraped, a failed cache write must not lose it
+            print(f"PAGE CACHE... Could not store {url}: {e}")
+            return
+        capture_validators(cache, url)
 
 
 def web_search(query: str, recency: str = "month") -> str:
@@ -15,8 +52,22 @@ def web_search(query: str, recency: str = "month") -> str:
     Returns:
         str: Perplexity response
     """
-    p = PerplexityClient()
-    return p.call_perplexity(query, recency)
+    cache = get_search_cache()
+    if cache:
+        cached = cache.get(query, recency)
+        if cached is not None:
+            return cached
+    similar = find_similar_answer(query, recency)
+    if similar is not None:
+        return similar
+    try:
+        response, cost = _perplexity_client.search(query, recency)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return f"Error calling Perplexity API: {str(e)}"
+    if cache:
+        cache.put(query, recency, response, cost)
+    add_answered_query(query, recency, response)
+    return response
 
 
 def call_web_content_retriever(url: str) -> str:
@@ -27,10 +78,77 @@ def call_web_content_retriever(url: str) -> str:
         url (str): The URL to scrape.
 
     Returns:
-        str: The scraped markdown content or an error message.
+        str: The cleaned, token-budgeted markdown content or an error message.
+    """
+    try:
+        cache = get_page_cache()
+        if cache:
+            entry = cache.lookup(url)
+            if entry:
+                fresh = cache.is_fresh(entry)
+                if fresh or revalidate(entry, url):
+                    cache.record_hit(url, revalidated=not fresh)
+                    return process_scraped_page({"markdown": entry["markdown"]})
+            cache.record_miss()
+        data = _firecrawl_client.scrape_with_firecrawl(url)
+        _store_page(cache, url, data)
+        return process_scraped_page(data)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return f"Error returning markdown data from {url}: {str(e)}"
+
+
+async def async_web_search(query: str, recency: str = "month") -> str:
+    """
+    Calls the Perplexity AI API with the given query without blocking the event loop.
+
+    Args:
+        query (str): Question for perplexity to answer.
+        recency (str): day, month, etc...
+
+    Returns:
+        str: Perplexity response
+    """
+    # SQLite lookups run on a worker thread, not on the event loop
+    cache = get_search_cache()
+    if cache:
+        cached = await asyncio.to_thread(cache.get, query, recency)
+        if cached is not None:
+            return cached
+    similar = await asyncio.to_thread(find_similar_answer, query, recency)
+    if similar is not None:
+        return similar
+    try:
+        response, cost = await _perplexity_client.async_search(query, recency)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return f"Error calling Perplexity API: {str(e)}"
+    if cache:
+        await asyncio.to_thread(cache.put, query, recency, response, cost)
+    add_answered_query(query, recency, response)
+    return response
+
+
+async def async_call_web_content_retriever(url: str) -> str:
+    """
+    Calls FireCrawl to fetch content from a URL without blocking the event loop.
+
+    Args:
+        url (str): The URL to scrape.
+
+    Returns:
+        str: The cleaned, token-budgeted markdown content or an error message.
     """
     try:
-        f = FireCrawlClient()
-        return f.scrape_with_firecrawl(url)
+        cache = get_page_cache()
+        if cache:
+            entry = await asyncio.to_thread(cache.lookup, url)
+            if entry:
+                fresh = cache.is_fresh(entry)
+                if fresh or await async_revalidate(entry, url):
+                    await asyncio.to_thread(cache.record_hit, url, not fresh)
+                    return process_scraped_page({"markdown": entry["markdown"]})
+            cache.record_miss()
+        data = await _firecrawl_client.async_scrape_with_firecrawl(url)
+        await asyncio.to_thread(_store_page, cache, url, data)
+        return process_scraped_page(data)
     except Exception as e:  # pylint: disable=broad-exception-caught
         return f"Error returning markdown data from {url}: {str(e)}"
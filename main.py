@@ -4,7 +4,21 @@ import time
 
 from core.research_professional import call_research_professional
 from core.prompt_getter import PromptGetter
-from core.llm_helpers import call_llm
+from core.http_session import print_http_stats
+from core.llm_router import print_latency_stats
+from core.circuit_breaker import print_circuit_states
+from core.search_cache import print_search_cache_stats
+from core.page_cache import print_page_cache_stats
+from core.query_index import print_query_index_stats
+from core.response_cache import print_response_cache_stats
+from core.single_flight import print_single_flight_stats
+from core.cassette import print_cassette_stats
+from core.token_counter import print_token_counter_stats
+from core.context_compactor import print_compaction_stats
+from core.passage_filter import print_passage_filter_stats
+from core.citation_registry import print_citation_registry_stats
+from core.report_writer import print_report_writer_stats
+from core.llm_helpers import call_llm, print_prompt_cache_stats
 from core.config import Service, GROQ_LLAMA_4_MAVERICK
 
 
@@ -41,6 +55,21 @@ def main():
             file.write(content_with_newlines)
     except IOError:
         print("Error writing the final output.")
+    print_http_stats()
+    print_latency_stats()
+    print_circuit_states()
+    print_search_cache_stats()
+    print_page_cache_stats()
+    print_query_index_stats()
+    print_response_cache_stats()
+    print_single_flight_stats()
+    print_prompt_cache_stats()
+    print_cassette_stats()
+    print_token_counter_stats()
+    print_compaction_stats()
+    print_passage_filter_stats()
+    print_citation_registry_stats()
+    print_report_writer_stats()
     print("\n--- End of conversation ---")
 
 
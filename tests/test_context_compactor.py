@@ -0,0 +1,29 @@
+"""test_context_compactor.py"""
+
+from core.citation_registry import rewrite_citations, get_bibliography
+from core.context_compactor import condense_extractively, keep_citations, get_sources
+
+
+def make_search_result() -> str:
+    body = " ".join(
+        f"Sentence {index} says something about the topic." for index in range(150)
+    )
+    return (
+        f"{body} The key fact [1]. Another fact [2].\n\nCitations:\n"
+        "[1] https://example.com/report\n[2] https://news.example.org/story"
+    )
+
+
+def test_condensing_keeps_source_ids():
+    condensed = condense_extractively(rewrite_citations(make_search_result()), 1600)
+    assert "https://example.com/report" in get_bibliography([{"content": condensed}])
+    assert "https://news.example.org/story" in get_bibliography(
+        [{"content": condensed}]
+    )
+
+
+def test_summary_gets_missing_sources_appended():
+    text = rewrite_citations(make_search_result())
+    summary = keep_citations("A short summary.", get_sources(text))
+    for key, _ in get_sources(text):
+        assert key in summary
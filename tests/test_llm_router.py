@@ -0,0 +1,69 @@
+"""test_llm_router.py"""
+
+import asyncio
+import time
+
+import pytest
+
+import core.circuit_breaker as circuit_breaker
+import core.llm_router as llm_router
+from core.config import (
+    Service,
+    GROQ_LLAMA_4_MAVERICK,
+    TOGETHER_LLAMA_4_MAVERICK,
+    FIREWORKS_LLAMA_4_MAVERICK,
+)
+
+
+class ProviderError(Exception):
+    """A failed provider call."""
+
+
+@pytest.fixture(name="tried")
+def fixture_tried(monkeypatch):
+    """Opens the Groq circuit and records the candidates called, in order."""
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    breaker = circuit_breaker.get_circuit_breaker(Service.GROQ, "chat/completions")
+    breaker.state = circuit_breaker.OPEN
+    breaker.opened_at = time.monotonic()
+    tried = []
+
+    def respond(service, model):
+        tried.append(service)
+        # the first alternative fails, so the router fails over to the next
+        if service == Service.TOGETHER:
+            raise ProviderError("503 Service Unavailable")
+        return "response", service, model
+
+    async def async_respond(service, model, args):  # pylint: disable=unused-argument
+        return respond(service, model)
+
+    monkeypatch.setattr(
+        llm_router, "_call_candidate", lambda service, model, args: respond(service, model)
+    )
+    monkeypatch.setattr(llm_router, "_async_call_candidate", async_respond)
+    return tried
+
+
+def test_open_circuit_is_tried_last(tried):
+    candidates = llm_router.get_equivalent_models(Service.GROQ, GROQ_LLAMA_4_MAVERICK)
+    assert candidates == [
+        (Service.TOGETHER, TOGETHER_LLAMA_4_MAVERICK),
+        (Service.FIREWORKS, FIREWORKS_LLAMA_4_MAVERICK),
+        (Service.GROQ, GROQ_LLAMA_4_MAVERICK),
+    ]
+    assert not tried
+
+
+def test_routed_call_skips_open_circuit(tried):
+    result = llm_router.call_llm_routed(Service.GROQ, GROQ_LLAMA_4_MAVERICK, {})
+    assert result == ("response", Service.FIREWORKS, FIREWORKS_LLAMA_4_MAVERICK)
+    assert tried == [Service.TOGETHER, Service.FIREWORKS]
+
+
+def test_async_routed_call_skips_open_circuit(tried):
+    result = asyncio.run(
+        llm_router.async_call_llm_routed(Service.GROQ, GROQ_LLAMA_4_MAVERICK, {})
+    )
+    assert result == ("response", Service.FIREWORKS, FIREWORKS_LLAMA_4_MAVERICK)
+    assert tried == [Service.TOGETHER, Service.FIREWORKS]
@@ -0,0 +1,25 @@
+"""test_page_cache.py"""
+
+import sqlite3
+
+from core.page_cache import PageCache
+
+
+def count_bodies(path) -> int:
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT COUNT(*) FROM bodies").fetchone()[0]
+
+
+def test_overwrite_deletes_only_the_replaced_body(tmp_path):
+    path = str(tmp_path / "pages.db")
+    cache = PageCache(path)
+    cache.put("https://a.example.com/page", "first")
+    cache.put("https://b.example.com/page", "first")
+    cache.put("https://a.example.com/page", "second")
+    # the first body is still referenced by the other page
+    assert count_bodies(path) == 2
+    assert cache.lookup("https://b.example.com/page")["markdown"] == "first"
+
+    cache.put("https://b.example.com/page", "third")
+    assert count_bodies(path) == 2
+    assert cache.lookup("https://a.example.com/page")["markdown"] == "second"
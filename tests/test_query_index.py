@@ -0,0 +1,61 @@
+"""test_query_index.py"""
+
+import time
+
+import pytest
+
+from core.query_index import QueryIndex, dedupe_questions, key_terms_match
+
+DISTINCT_PAIRS = [
+    ("Tesla revenue 2023", "Tesla revenue 2024"),
+    ("Apple Q3 2024 revenue", "Apple Q4 2024 revenue"),
+    ("GDP growth of Germany in 2023", "GDP growth of Germany in 2022"),
+    ("latest AI regulations in the EU", "recent AI regulations in the US"),
+    ("population of Austria", "population of Australia"),
+]
+
+DUPLICATE_PAIRS = [
+    ("Tesla revenue 2023", "tesla revenue in 2023"),
+    ("What is Tesla's revenue in 2023?", "Tesla revenue 2023"),
+    ("price of bitcoin today", "bitcoin price today"),
+    ("latest AI regulations in the EU", "current AI regulations in the EU"),
+]
+
+
+@pytest.mark.parametrize("indexed, query", DISTINCT_PAIRS)
+def test_distinct_queries_do_not_match(indexed, query):
+    index = QueryIndex()
+    index.add(indexed, "answer")
+    assert not key_terms_match(indexed, query)
+    assert index.find(query) is None
+
+
+@pytest.mark.parametrize("indexed, query", DUPLICATE_PAIRS)
+def test_reworded_queries_match(indexed, query):
+    index = QueryIndex()
+    index.add(indexed, "answer")
+    match = index.find(query)
+    assert match is not None
+    assert match[0] == indexed
+
+
+def test_expired_entries_are_dropped():
+    index = QueryIndex()
+    index.add("Tesla revenue 2023", "old answer", expires_at=time.time() - 1)
+    index.add("bitcoin price today", "fresh answer", expires_at=time.time() + 60)
+    assert index.find("tesla revenue in 2023") is None
+    assert index.find("price of bitcoin today")[1] == "fresh answer"
+    assert len(index) == 1
+
+
+def test_dedupe_questions_keeps_distinct_sub_questions():
+    questions = [
+        f"{second} Context: comparing years" for _, second in DISTINCT_PAIRS
+    ]
+    prior = [first for first, _ in DISTINCT_PAIRS]
+    assert dedupe_questions(questions, prior) == questions
+
+
+def test_dedupe_questions_drops_rewordings():
+    questions = ["bitcoin price today Context: a", "price of bitcoin today Context: b"]
+    assert dedupe_questions(questions, []) == questions[:1]
@@ -0,0 +1,35 @@
+"""test_report_writer.py"""
+
+from core.config import REPORT_SECTION_TOKENS
+from core.conversation import ToolResultMessage
+from core.report_writer import partition_transcript
+from core.utilities import estimate_tokens
+
+
+def make_transcript(results: list) -> list:
+    messages = [
+        {"role": "user", "content": "question"},
+        {"role": "assistant", "content": "calling a tool"},
+    ]
+    for result in results:
+        messages.append(ToolResultMessage(role="user", content=result))
+        messages.append({"role": "assistant", "content": "next step"})
+    return messages
+
+
+def test_every_tool_result_is_a_boundary():
+    pages = [f"page {index} " + "word " * 12800 for index in range(6)]
+    sections = partition_transcript(make_transcript(pages))
+    assert len(sections) == 6
+    for index, section in enumerate(sections):
+        assert f"page {index} " in section
+
+
+def test_oversized_message_is_split():
+    page = "\n\n".join(["paragraph " * 300] * 80)
+    sections = partition_transcript(make_transcript([page]))
+    assert len(sections) > 1
+    assert all(
+        estimate_tokens(section) <= 2 * REPORT_SECTION_TOKENS + 10
+        for section in sections
+    )
@@ -0,0 +1,47 @@
+"""test_response_cache.py"""
+
+from openai.types.chat.chat_completion import ChatCompletion
+
+import core.llm_helpers as llm_helpers
+from core.config import Service, OPENAI_GPT_4O
+from core.response_cache import ResponseCache, is_replayed
+
+
+def make_response() -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 1,
+            "model": OPENAI_GPT_4O,
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "answer"},
+                }
+            ],
+            "usage": {
+                "prompt_tokens": 1000,
+                "completion_tokens": 500,
+                "total_tokens": 1500,
+            },
+        }
+    )
+
+
+def test_replayed_response_is_not_billed(tmp_path, monkeypatch):
+    args = {"model": OPENAI_GPT_4O, "messages": [{"role": "user", "content": "q"}]}
+    cache = ResponseCache(str(tmp_path), "replay")
+    cache.put(Service.OPENAI.name, args, make_response())
+    replayed = cache.get(Service.OPENAI.name, args)
+    assert is_replayed(replayed)
+    assert not is_replayed(make_response())
+    assert "replayed_from_cache" not in replayed.model_dump()
+
+    monkeypatch.setattr(llm_helpers, "get_response_cache", lambda: cache)
+    grand_total = llm_helpers.GRAND_TOTAL_COST
+    cost = llm_helpers.print_token_usage_details(replayed, Service.OPENAI, OPENAI_GPT_4O)
+    assert cost == 0.0
+    assert llm_helpers.GRAND_TOTAL_COST == grand_total
+    assert cache.cost_saved > 0
@@ -0,0 +1,33 @@
+"""test_retry_policy.py"""
+
+import asyncio
+import time
+
+import pytest
+
+from core.retry_policy import RetryPolicy, RetryDeadlineExceeded, get_attempt_timeout
+
+
+def test_hung_async_attempt_stops_at_deadline():
+    async def hang():
+        await asyncio.sleep(30)
+
+    policy = RetryPolicy(max_attempts=3, max_delay=0.1, deadline=0.5)
+    started = time.monotonic()
+    with pytest.raises(RetryDeadlineExceeded):
+        asyncio.run(policy.async_call(hang))
+    assert time.monotonic() - started < 2
+
+
+def test_sync_attempt_timeout_is_capped_by_deadline():
+    timeouts = []
+
+    def fail():
+        timeouts.append(get_attempt_timeout(180))
+        raise ConnectionError("connection reset")
+
+    policy = RetryPolicy(max_attempts=2, max_delay=0.1, deadline=5)
+    with pytest.raises(ConnectionError):
+        policy.call(fail)
+    assert all(timeout <= 5 for timeout in timeouts)
+    assert get_attempt_timeout(180) == 180